@@ -0,0 +1,246 @@
+"""
+Throughput Benchmarks.
+
+Measures the package against the local figshare stand-in, so the numbers reflect the client and not the network or the
+figshare site. Each benchmark starts its own stand-in, seeded at a realistic scale, and reports:
+
+    requests      -- small GET requests per second from a pool of threads.
+    create        -- articles created per second with Projects.create_article, in a project that keeps growing.
+    pagination    -- time and number of requests to list a large project, for several page sizes, with and without the
+                     total known up front.
+    upload        -- MB/s of Projects.upload_file.
+    download      -- MB/s of download_file, and of reading a lazy stream_file stream.
+
+Run from the command line, e.g.
+
+    python -m figshare_interface.benchmarks.throughput --latency 0.005 --scale 0.1 --output bench_output.txt
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .. import config
+from ..figshare_structures.projects import Projects
+from ..http_requests.figshare_requests import issue_request, download_file
+from ..standin.figshare_standin import StandinServer
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+TOKEN = 'benchmark'
+MB = 1048576
+
+
+@contextmanager
+def benchmark_settings(directory):
+    """
+    Quiet output, and keep upload journals and file hashes in a scratch directory rather than the user's home.
+    :param directory: Scratch directory.
+    """
+    names = ['verbose', 'upload_journal_dir', 'hash_cache_enabled', 'response_cache_enabled']
+    previous = {name: getattr(config, name) for name in names}
+    config.verbose = False
+    config.upload_journal_dir = os.path.join(directory, 'journals')
+    config.hash_cache_enabled = False
+    config.response_cache_enabled = False
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(config, name, value)
+
+
+def bench_requests(server, count=2000, workers=8):
+    """
+    Requests per second of small GETs, each to a different article so that none are coalesced.
+    :param server: Running StandinServer.
+    :param count: Number of requests.
+    :param workers: Number of threads making requests.
+    :return: Dictionary of results.
+    """
+    project_id = next(server.state.ids)
+    article_ids = [server.state.add_article(project_id, title='Article {n}'.format(n=n)) for n in range(count)]
+
+    def get(article_id):
+        return issue_request('GET', 'account/articles/{id}'.format(id=article_id), token=TOKEN)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(get, article_ids):
+            pass
+    seconds = time.perf_counter() - start
+    return {'requests': count, 'workers': workers, 'seconds': seconds, 'requests_per_s': count / seconds}
+
+
+def bench_create(server, count=200, existing=1000):
+    """
+    Articles created per second with Projects.create_article, in a project already holding `existing` articles.
+    :param server: Running StandinServer.
+    :param count: Number of articles to create.
+    :param existing: Number of articles the project starts with.
+    :return: Dictionary of results.
+    """
+    project_id = next(server.state.ids)
+    for n in range(existing):
+        server.state.add_article(project_id, title='Existing {n}'.format(n=n))
+
+    projects = Projects(TOKEN)
+    requests_before = server.state.request_count
+    start = time.perf_counter()
+    for n in range(count):
+        projects.create_article(project_id, {'title': 'New {n}'.format(n=n)})
+    seconds = time.perf_counter() - start
+    return {'articles': count, 'existing': existing, 'seconds': seconds, 'articles_per_s': count / seconds,
+            'requests': server.state.request_count - requests_before}
+
+
+def bench_pagination(server, articles=20000, page_sizes=(100, 1000)):
+    """
+    Cost of listing every article of a large project.
+    :param server: Running StandinServer.
+    :param articles: Number of articles in the project.
+    :param page_sizes: Page sizes to compare.
+    :return: List of dictionaries of results, one per page size and total known or not.
+    """
+    project_id = next(server.state.ids)
+    for n in range(articles):
+        server.state.add_article(project_id, title='Article {n}'.format(n=n))
+
+    projects = Projects(TOKEN)
+    results = []
+    for page_size in page_sizes:
+        for total in (None, articles):
+            requests_before = server.state.request_count
+            start = time.perf_counter()
+            listed = projects.list_articles(project_id, page_size=page_size, total=total)
+            seconds = time.perf_counter() - start
+            if len(listed) != articles:
+                raise ValueError('Listed {n} of {total} articles.'.format(n=len(listed), total=articles))
+            results.append({'articles': articles, 'page_size': page_size, 'total_known': total is not None,
+                            'seconds': seconds, 'requests': server.state.request_count - requests_before})
+    return results
+
+
+def bench_upload(server, directory, size=64 * MB):
+    """
+    MB/s of Projects.upload_file.
+    :param server: Running StandinServer.
+    :param directory: Scratch directory for the local file.
+    :param size: Size of the file in bytes.
+    :return: Dictionary of results.
+    """
+    project_id = next(server.state.ids)
+    article_id = server.state.add_article(project_id, title='Upload')
+    file_name = os.path.join(directory, 'upload.bin')
+    with open(file_name, 'wb') as fout:
+        fout.write(os.urandom(size))
+
+    start = time.perf_counter()
+    Projects(TOKEN).upload_file(article_id, file_name)
+    seconds = time.perf_counter() - start
+
+    uploaded = server.state.files[server.state.articles[article_id]['files'][0]]
+    if uploaded['status'] != 'available' or uploaded['computed_md5'] != uploaded['supplied_md5']:
+        raise ValueError('Uploaded file does not match the local file.')
+    return {'bytes': size, 'seconds': seconds, 'mb_per_s': size / MB / seconds}
+
+
+def bench_download(server, directory, size=64 * MB):
+    """
+    MB/s of download_file, and of reading the file through a lazy stream_file stream.
+    :param server: Running StandinServer.
+    :param directory: Scratch directory for the downloaded file.
+    :param size: Size of the file in bytes.
+    :return: Dictionary of results.
+    """
+    project_id = next(server.state.ids)
+    article_id = server.state.add_article(project_id, title='Download')
+    data = os.urandom(size)
+    file_id = server.state.add_file(article_id, 'download.bin', data)
+    url = '{base}/download/{id}'.format(base=server.base_url[:-len('/v2')], id=file_id)
+    local_filename = os.path.join(directory, 'download.bin')
+
+    start = time.perf_counter()
+    download_file(url, local_filename, TOKEN)
+    file_seconds = time.perf_counter() - start
+    with open(local_filename, 'rb') as fin:
+        if fin.read() != data:
+            raise ValueError('Downloaded file does not match.')
+
+    start = time.perf_counter()
+    stream = Projects.stream_file(url, TOKEN, lazy=True)
+    received = 0
+    with stream:
+        for chunk in iter(lambda: stream.read(MB), b''):
+            received += len(chunk)
+    stream_seconds = time.perf_counter() - start
+
+    return {'bytes': size, 'file_mb_per_s': size / MB / file_seconds, 'stream_mb_per_s': received / MB / stream_seconds}
+
+
+def run(latency=0.0, error_rate=0.0, scale=1.0):
+    """
+    Run every benchmark, each against a freshly started stand-in.
+    :param latency: Seconds the stand-in delays every request by.
+    :param error_rate: Fraction of retried requests, e.g. GETs, the stand-in answers with a 503.
+    :param scale: Multiplier of the number of requests, articles and bytes of each benchmark.
+    :return: Dictionary of results, keyed by benchmark name.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, benchmark_settings(directory):
+        benchmarks = [('requests', lambda server: bench_requests(server, count=max(1, int(2000 * scale)))),
+                      ('create', lambda server: bench_create(server, count=max(1, int(200 * scale)),
+                                                             existing=int(1000 * scale))),
+                      ('pagination', lambda server: bench_pagination(server, articles=max(1, int(20000 * scale)))),
+                      ('upload', lambda server: bench_upload(server, directory, size=max(1, int(64 * MB * scale)))),
+                      ('download', lambda server: bench_download(server, directory,
+                                                                 size=max(1, int(64 * MB * scale))))]
+        for name, benchmark in benchmarks:
+            # Errors are only injected into requests the retry policy repeats, so every benchmark can complete.
+            with StandinServer(latency=latency, error_rate=error_rate, error_methods=config.retry_methods) as server, \
+                    server.use():
+                results[name] = benchmark(server)
+    return results
+
+
+def format_results(results):
+    """
+    Format the results of run() as lines of text.
+    :param results: Dictionary from run().
+    :return: String.
+    """
+    lines = []
+    for name, result in results.items():
+        for entry in (result if isinstance(result, list) else [result]):
+            fields = ', '.join('{key}={value:.2f}'.format(key=key, value=value) if isinstance(value, float)
+                               else '{key}={value}'.format(key=key, value=value) for key, value in entry.items())
+            lines.append('{name:<12}{fields}'.format(name=name, fields=fields))
+    return '\n'.join(lines) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark figshare_interface against a local figshare stand-in.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of latency added to every request.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 503.')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier of the size of every benchmark.')
+    parser.add_argument('--output', help='Also write the results to this file.')
+    args = parser.parse_args(argv)
+
+    text = format_results(run(latency=args.latency, error_rate=args.error_rate, scale=args.scale))
+    print(text, end='')
+    if args.output:
+        with open(args.output, 'w') as fout:
+            fout.write(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -54,3 +54,118 @@ else:
 # Determine if in quite mode.
 verbose = config.getboolean('DEFAULT', 'verbose', fallback=True)
 assert type(verbose) is bool  # Check that verbose is a boolean
+
+"""
+HTTP Transport Settings.
+"""
+
+# Number of per-host connection pools to cache and the maximum number of kept-alive connections held in each.
+pool_connections = config.getint('http', 'Pool_connections', fallback=10)
+pool_maxsize = config.getint('http', 'Pool_maxsize', fallback=10)
+# If True, requests beyond pool_maxsize wait for a free connection instead of opening a throw-away one.
+pool_block = config.getboolean('http', 'Pool_block', fallback=False)
+# Opt-in: if True, identical GETs made concurrently from several threads are sent once and share the result. A GET
+# made just after a write may then join one sent before the write finished, and see the data from before it.
+coalesce_requests = config.getboolean('http', 'Coalesce_requests', fallback=False)
+# If True, creating or changing an item returns what is already known of it, fetching its full information lazily,
+# instead of following up with a GET. See http_requests/lazy_info.py.
+lean = config.getboolean('http', 'Lean', fallback=False)
+
+"""
+Upload Settings.
+"""
+
+# Number of file parts uploaded concurrently, and how many times a single failed part is re-sent before giving up.
+upload_workers = config.getint('upload', 'Workers', fallback=4)
+upload_part_retries = config.getint('upload', 'Part_retries', fallback=3)
+# Directory holding the journals that let an interrupted upload be resumed.
+upload_journal_dir = os.path.expanduser(config.get('upload', 'Journal_dir',
+                                                   fallback='~/.figshare_interface/upload_journals'))
+# Memory-map the source file and send each part as a zero-copy slice instead of reading it into a new buffer.
+upload_use_mmap = config.getboolean('upload', 'Use_mmap', fallback=False)
+
+"""
+Retry Settings.
+"""
+
+# Retries allowed per call, and across all the calls of one batch (pagination, multipart upload, ...).
+retry_max_retries = config.getint('retry', 'Max_retries', fallback=3)
+retry_batch_budget = config.getint('retry', 'Batch_budget', fallback=100)
+# Exponential backoff: the first window is Backoff_factor seconds, doubling up to Max_backoff.
+retry_backoff_factor = config.getfloat('retry', 'Backoff_factor', fallback=0.5)
+retry_max_backoff = config.getfloat('retry', 'Max_backoff', fallback=30)
+# A Retry-After longer than this is treated as a failure rather than waited out.
+retry_max_retry_after = config.getfloat('retry', 'Max_retry_after', fallback=120)
+# Retried status codes and HTTP methods. Only idempotent methods are retried by default.
+retry_status_forcelist = [int(code) for code in
+                          config.get('retry', 'Status_forcelist', fallback='429, 500, 502, 503, 504').split(',')]
+retry_methods = [method.strip().upper() for method in
+                 config.get('retry', 'Methods', fallback='GET, HEAD, PUT, DELETE, OPTIONS').split(',')]
+
+"""
+Download Settings.
+"""
+
+# Number of byte ranges of a file fetched concurrently, and the size in bytes of each range.
+download_workers = config.getint('download', 'Workers', fallback=4)
+download_range_size = config.getint('download', 'Range_size', fallback=8388608)
+
+"""
+File Hash Cache Settings.
+"""
+
+# MD5s of unchanged local files are remembered in this SQLite database rather than recomputed for every upload.
+hash_cache_enabled = config.getboolean('hash_cache', 'Enabled', fallback=True)
+hash_cache_path = os.path.expanduser(config.get('hash_cache', 'Path',
+                                                fallback='~/.figshare_interface/hash_cache.sqlite'))
+
+"""
+Response Cache Settings.
+"""
+
+# Opt-in in-memory cache of GET responses, holding at most Max_entries responses.
+response_cache_enabled = config.getboolean('response_cache', 'Enabled', fallback=False)
+response_cache_max_entries = config.getint('response_cache', 'Max_entries', fallback=1024)
+# Time to live in seconds of each cached endpoint, as 'template=seconds' pairs. Other endpoints are not cached.
+response_cache_ttls = {}
+for pair in config.get('response_cache', 'Ttls', fallback='').split(','):
+    if pair.strip():
+        template, seconds = pair.rsplit('=', 1)
+        response_cache_ttls[template.strip()] = float(seconds)
+
+"""
+Pagination Settings.
+"""
+
+# Number of items requested per page by default, and the most the API returns in one page.
+page_size = config.getint('pagination', 'Page_size', fallback=1000)
+max_page_size = config.getint('pagination', 'Max_page_size', fallback=1000)
+# Number of pages fetched concurrently when the total number of items in a listing is known.
+pagination_workers = config.getint('pagination', 'Workers', fallback=4)
+
+"""
+Metrics Settings.
+"""
+
+# Record counts, latencies, bytes and status codes of every HTTP request, see http_requests/metrics.py.
+metrics_enabled = config.getboolean('metrics', 'Enabled', fallback=False)
+
+"""
+Bulk Operation Settings.
+"""
+
+# Number of items of a bulk operation in progress at once, and the requests per second all of them share (0 for no
+# limit), allowing bursts of up to Burst requests.
+bulk_workers = config.getint('bulk', 'Workers', fallback=8)
+bulk_rate = config.getfloat('bulk', 'Rate', fallback=20)
+bulk_burst = config.getfloat('bulk', 'Burst', fallback=20)
+
+"""
+Metadata Index Settings.
+"""
+
+# SQLite mirror of project, article, file and collection metadata, see figshare_structures/metadata_index.py, and the
+# number of articles whose details are fetched at once while it syncs.
+metadata_index_path = os.path.expanduser(config.get('metadata_index', 'Path',
+                                                    fallback='~/.figshare_interface/metadata_index.sqlite'))
+metadata_index_workers = config.getint('metadata_index', 'Workers', fallback=4)
@@ -0,0 +1,243 @@
+"""
+Asyncio counterpart of Collections.
+"""
+
+import asyncio
+
+from requests.exceptions import HTTPError
+
+from ..http_requests.async_figshare_requests import *
+from .collections import Collections
+from .. import config
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class AsyncCollections:
+    """
+    Mirrors Collections, with every method that talks to figshare being a coroutine.
+    """
+
+    # Argument checks and the deletion prompt do no I/O, so share them with the blocking class.
+    check_arg = staticmethod(Collections.check_arg)
+    chunks = staticmethod(Collections.chunks)
+    _collection_data = staticmethod(Collections._collection_data)
+    _deferred_key = staticmethod(Collections._deferred_key)
+    _confirm_delete = staticmethod(Collections._confirm_delete)
+
+    def __init__(self, token):
+
+        self.token = token
+
+    async def get_list(self):
+        """
+        Used to get a list of private collections
+        :return: list of collections.
+        """
+        return await issue_request('GET', 'account/collections', token=self.token)
+
+    async def get_info(self, collection_id):
+        """
+        Returns information from a given figshare collection id.
+        :param collection_id: Integer figshare collection id number.
+        :return: Dictionary of collection information.
+        """
+        endpoint = 'account/collections/{id}'.format(id=collection_id)
+        return await issue_request('GET', endpoint, token=self.token)
+
+    async def get_articles(self, collection_id, page_size=None, page=1, page_max=1000, offset=None, total=None):
+        """
+        Returns a list of figshare_articles in the given collection. See iter_articles.
+        :return: List of collection figshare_articles.
+        """
+        return [article async for article in self.iter_articles(collection_id, page_size=page_size, page=page,
+                                                                page_max=page_max, offset=offset, total=total)]
+
+    def iter_articles(self, collection_id, page_size=None, page=1, page_max=1000, offset=None, total=None,
+                      prefetch=True):
+        """
+        Iterate over the figshare_articles in the given collection, fetching the pages as they are needed. See
+        Collections.iter_articles for the arguments.
+        :return: Asynchronous generator of collection figshare_articles.
+        """
+        endpoint = 'account/collections/{id}/articles'.format(id=collection_id)
+        # Listings are capped at 1000 pages.
+        return paginate('GET', endpoint, self.token, page_size=page_size, page=page, page_max=min(page_max, 1000),
+                        offset=offset, total=total, prefetch=prefetch)
+
+    async def check_if_exists(self, search):
+        """
+        Use to search your figshare collections for existing collection with the exact same title as input.
+        :param search: string containing the title name to search for.
+        :return: True, if title already exists. False, if it does not.
+        """
+        data = {
+            "search_for": "'title: {search}'".format(search=search)
+        }
+        result = await issue_request('POST', 'account/collections/search', data=data, token=self.token)
+
+        for collection in range(len(result)):
+            if result[collection]['title'] == search:
+                return True
+            else:
+                return False
+
+    async def search(self, search_string, page_size=20, page=1):
+        """
+        Use to perform a general search in the public figshare collections.
+        :param search_string: String conforming to figshares search parameters.
+        :return: list of dictionaries containing information on returned collections.
+        """
+        data = {
+            "search_for": "{search_string}".format(search_string=search_string),
+            "page_size": page_size,
+            "page": page
+        }
+        return await issue_request('POST', 'collections/search', data=data, token=self.token)
+
+    async def create(self, title, description, articles=None, authors=None, categories=None, tags=None,
+                     references=None, custom_fields=None):
+        """
+        Create a new figshare collection. See Collections.create for the constraints on each argument.
+        :return: Dictionary containing the newly created figshare collection information.
+        """
+        if await self.check_if_exists(title):
+            raise ValueError('Collection already exists with title: {title}'.format(title=title))
+
+        data, deferred = self._collection_data(title, description, articles=articles, authors=authors,
+                                               categories=categories, tags=tags, references=references,
+                                               custom_fields=custom_fields)
+
+        result = await issue_request('POST', 'account/collections', data=data, token=self.token)
+        if config.verbose:
+            print('Created collection: ', result['location'], '\n')
+
+        collection_info = await raw_issue_request('GET', result['location'], token=self.token)
+        collection_id = collection_info['id']
+
+        for key, value in deferred.items():
+            endpoint = 'account/collections/{collection_id}/{key}'.format(collection_id=collection_id, key=key)
+            for subsec in list(self.chunks(value, 10)):
+                await issue_request('POST', endpoint, data={self._deferred_key(key): subsec}, token=self.token)
+            if config.verbose:
+                print('{key} added to collection: {id}'.format(key=key.capitalize(), id=collection_id))
+
+        if deferred:
+            collection_info = await raw_issue_request('GET', result['location'], token=self.token)
+
+        return collection_info
+
+    async def update(self, collection_id: int, update_dict: dict=None):
+        """
+        Updates the metadata of the given Figshare Collection.
+
+        Args:
+            collection_id: Figshare collection ID number.
+            update_dict: Dictionary of metadata fields to be updated.
+
+        Returns:
+            Tuple of a status code and either the response or a list of errors, as Collections.update.
+        """
+        if update_dict is not None:
+
+            errors = []
+            result = None
+
+            if 'authors' in update_dict:
+                if len(update_dict['authors']) >= 10:
+                    resp_code, resp_data = await self.update_item(collection_id, 'authors', update_dict['authors'])
+                    if resp_code != 204:
+                        errors.append([resp_code, resp_data])
+                    del(update_dict['authors'])
+
+            endpoint = "account/collections/{col_id}".format(col_id=collection_id)
+
+            try:
+                result = await issue_request('PUT', endpoint, data=update_dict, token=self.token)
+            except HTTPError as err:
+                errors.append([err.response.status_code, err.response.reason])
+
+            if errors != []:
+                return 404, errors
+            else:
+                return 205, result
+
+    async def update_item(self, collection_id: int, key: str, value):
+        """
+        Updates a single collection metadata field.
+
+        Args:
+            collection_id: Figshare collection ID number.
+            key: Metadata field name.
+            value: metadata field value.
+
+        Returns:
+            Tuple of a status code and the response or error reason.
+        """
+        endpoint = 'account/collections/{collection_id}'.format(collection_id=collection_id)
+        result = None
+        for subsec in list(self.chunks(value, 10)):
+            try:
+                result = await issue_request('PUT', endpoint, data={key: subsec}, token=self.token)
+            except HTTPError as err:
+                return err.response.status_code, err.response.reason
+        return 204, result
+
+    async def publish(self, collection_id):
+
+        endpoint = 'account/collections/{collection_id}/publish'.format(collection_id=collection_id)
+        result = await issue_request('POST', endpoint, token=self.token)
+
+        if config.verbose:
+            print('Published collection: {id}.'.format(id=collection_id))
+
+        return result
+
+    async def publish_article(self, article_id):
+
+        endpoint = 'account/articles/{article_id}/publish'.format(article_id=article_id)
+        result = await issue_request('POST', endpoint, token=self.token)
+
+        if config.verbose:
+            print('Published article: {id}.'.format(id=article_id))
+
+        return result
+
+    async def get_article(self, article_id):
+
+        endpoint = 'articles/{article_id}'.format(article_id=article_id)
+        return await issue_request('GET', endpoint, token=self.token)
+
+    @staticmethod
+    async def download_file(url, local_filename, token):
+
+        return await download_file(url=url, local_filename=local_filename, token=token)
+
+    async def delete(self, collection_id: int, safe: bool=True):
+        """
+        Deletes a given collection, from the given Figshare collection ID number. A confirmation is required by
+        default, but can be suppressed.
+
+        Args:
+            collection_id: Figshare collection ID number.
+            safe (optional): Suppress confirmation.
+
+        Returns:
+            None
+        """
+        # The confirmation prompt is read in a worker thread, so the event loop carries on while it waits.
+        collection_info = await self.get_info(collection_id)
+
+        confirmed = await asyncio.get_running_loop().run_in_executor(None, self._confirm_delete, collection_id,
+                                                                      collection_info['title'], safe)
+        if confirmed:
+            endpoint = 'account/collections/{id}'.format(id=collection_id)
+            await issue_request('DELETE', endpoint, token=self.token)
+            if config.verbose:
+                print('Deleted Collection: ', collection_id, '.')
@@ -0,0 +1,31 @@
+"""
+Asyncio counterpart of Groups.
+"""
+
+from ..http_requests.async_figshare_requests import *
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class AsyncGroups:
+    """
+    Mirrors Groups, with every method that talks to figshare being a coroutine.
+    """
+
+    def __init__(self, token):
+
+        self.token = token  # OAuth token for access to figshare api.
+
+    async def get_list(self):
+        """
+        Use to get a list of dictionaries that contian information on the groups under the figshare institution
+        implementation associated to the authentication token used.
+        :return: list of dictionaries holding information on the groups.
+        """
+        return await issue_request('GET', 'account/institution/groups', token=self.token)
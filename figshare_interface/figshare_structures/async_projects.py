@@ -0,0 +1,376 @@
+"""
+Asyncio counterpart of Projects.
+"""
+
+import asyncio
+
+from requests.exceptions import HTTPError
+
+from ..http_requests.async_figshare_requests import *
+from .projects import Projects, _TitleIndex
+from .. import config
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class AsyncProjects:
+    """
+    Mirrors Projects, with every method that talks to figshare being a coroutine.
+    """
+
+    # Argument checks and the deletion prompt do no I/O, so share them with the blocking class.
+    _project_data = staticmethod(Projects._project_data)
+    _project_update_data = staticmethod(Projects._project_update_data)
+    _check_collaborator = staticmethod(Projects._check_collaborator)
+    _confirm_delete = staticmethod(Projects._confirm_delete)
+    _prepare_article_data = staticmethod(Projects._prepare_article_data)
+
+    def __init__(self, token):
+
+        self.token = token  # OAuth token for access to figshare API.
+
+        # Title indexes of your projects and of the articles of each project, seeded by the first duplicate check.
+        self._project_titles = None
+        self._article_titles = {}
+        self._titles_lock = asyncio.Lock()
+
+    async def get_list(self):
+        """
+        Used to get a list of private projects
+        :return: list of projects.
+        """
+        return await issue_request('GET', 'account/projects', token=self.token)
+
+    async def get_info(self, project_id):
+        """
+        Returns information from a given figshare project id.
+        :param project_id: Integer figshare project id number.
+        :return: Dictionary of project information.
+        """
+        endpoint = 'account/projects/{id}'.format(id=project_id)
+        return await issue_request('GET', endpoint, token=self.token)
+
+    async def search(self, search, limit=100):
+        """
+        Use to return the results of a search query at the projects endpoint.
+        :param search: String containing the figshare query. See 'https://docs.figshare.com/Search/search/'.
+        :param limit: Sets the maximum number of results to add to the return.
+        :return: List of dictionaries.
+        """
+        data = {"search_for": search}
+        endpoint = 'account/projects/search?limit={limit}'.format(limit=limit)
+        return await issue_request('POST', endpoint, data=data, token=self.token)
+
+    async def check_if_exists(self, search):
+        """
+        Use to check your figshare projects for existing projects with the exact same title as input. See
+        Projects.check_if_exists.
+        :param search: string containing the title name to search for.
+        :return: True, if title already exists. False, if it does not.
+        """
+        return search in await self.project_titles()
+
+    async def project_titles(self):
+        """
+        Return the title index of your projects, listing them from figshare if it is not seeded yet.
+        :return: _TitleIndex of project titles.
+        """
+        async with self._titles_lock:
+            if self._project_titles is None:
+                self._project_titles = _TitleIndex([project async for project in
+                                                    paginate('GET', 'account/projects', self.token)])
+            return self._project_titles
+
+    async def article_titles(self, project_id):
+        """
+        Return the title index of the articles of a project, listing them from figshare if it is not seeded yet.
+        See Projects.article_titles.
+        :param project_id: int. figshare project id number.
+        :return: _TitleIndex of article titles.
+        """
+        async with self._titles_lock:
+            if project_id not in self._article_titles:
+                self._article_titles[project_id] = _TitleIndex(await self.list_articles(project_id))
+            return self._article_titles[project_id]
+
+    def forget_titles(self, project_id=None):
+        """
+        Drop title indexes, so that the next duplicate check lists the titles from figshare again.
+        :param project_id: int. Drop the index of this project's articles. If None, drop every index.
+        :return:
+        """
+        if project_id is None:
+            self._project_titles = None
+            self._article_titles.clear()
+        else:
+            self._article_titles.pop(project_id, None)
+
+    async def create(self, title, description, funding, group_id):
+        """
+        Create a figshare project. See Projects.create for the constraints on each argument.
+        :param title: String containing the desired title of the project.
+        :param description: String containing a detailed description of the project.
+        :param funding: String containing acknowledgements to funding.
+        :param group_id: Integer of figshare group id.
+        :return: Dictionary containing the newly created figshare project information.
+        """
+        # Check to see if a project already exists with the same title.
+        if await self.check_if_exists(title):
+            raise ValueError('Project already exists with title: {title}'.format(title=title))
+
+        data = self._project_data(title, description, funding, group_id)
+
+        result = await issue_request('POST', 'account/projects', data=data, token=self.token)
+        if config.verbose:
+            print('Created project: ', result['location'], '\n')
+
+        project_info = await raw_issue_request('GET', result['location'], token=self.token)
+        (await self.project_titles()).add(project_info['id'], title)
+
+        return project_info
+
+    async def update(self, project_id, title=None, description=None, funding=None, group_id=None):
+        """
+        Update project information of an existing figshare project. See Projects.update.
+        :param project_id: Integer value of figshare project id to be updated
+        :param title: String containing updated project title.
+        :param description: String containing updated project description.
+        :param funding: String containing updated project funding.
+        :param group_id: Integer of updated fighsare group id.
+        :return: Dictionary of updated figshare project information.
+        """
+        data = self._project_update_data(title, description, funding, group_id)
+        if title is not None and await self.check_if_exists(title):
+            raise ValueError('Project already exists with title: {title}'.format(title=title))
+
+        if data != {}:
+            endpoint = 'account/projects/{project_id}'.format(project_id=project_id)
+
+            await issue_request('PUT', endpoint, data=data, token=self.token)
+            if config.verbose:
+                print('Project: {project_id} updated'.format(project_id=project_id))
+            if title is not None:
+                (await self.project_titles()).add(project_id, title)
+
+            return await self.get_info(project_id=project_id)
+
+    async def invite(self, project_id, collaborator):
+        """
+        Invite a collaborator to a project. See Projects.invite.
+        :param project_id: Integer of a Figshare project id.
+        :param collaborator: Dictionary with any of the keys user_id, role_name and email.
+        :return: Dictionary of updated figshare project information.
+        """
+        if collaborator is not None:
+            self._check_collaborator(collaborator)
+
+            endpoint = 'account/projects/{project_id}/collaborators'.format(project_id=project_id)
+
+            await issue_request('POST', endpoint, data=collaborator, token=self.token)
+            if config.verbose:
+                print('Collaborators invited to Project: {project_id}'.format(project_id=project_id))
+
+            return await self.get_info(project_id=project_id)
+
+    async def delete(self, project_id, safe=True):
+        """
+        Use to delete a Figshare project given a project id. A confirmation is required.
+        The confirmation prompt is read in a worker thread, so the event loop carries on while it waits.
+        :param project_id: Integer of a Figshare project id.
+        :param safe: Boolean that can be used to override the project deletion confirmation.
+        :return:
+        """
+        project_info = await self.get_info(project_id)
+
+        confirmed = await asyncio.get_running_loop().run_in_executor(None, self._confirm_delete, project_id,
+                                                                      project_info['title'], safe)
+        if confirmed:
+            endpoint = 'account/projects/{id}'.format(id=project_id)
+            await issue_request('DELETE', endpoint, token=self.token)
+            if self._project_titles is not None:
+                self._project_titles.remove(project_id)
+            self.forget_titles(project_id)
+            if config.verbose:
+                print('Deleted Project: ', project_id, '.')
+
+    async def list_articles(self, project_id, page_size=None, page=1, offset=None, total=None):
+        """
+        Returns every article in a project. See iter_articles.
+        :return: List of article dictionaries.
+        """
+        return [article async for article in self.iter_articles(project_id, page_size=page_size, page=page,
+                                                                offset=offset, total=total)]
+
+    def iter_articles(self, project_id, page_size=None, page=1, offset=None, total=None, prefetch=True):
+        """
+        Iterate over the figshare_articles in a project, fetching the pages as they are needed. See
+        Projects.iter_articles for the arguments.
+        :return: Asynchronous generator of article dictionaries.
+        """
+        endpoint = 'account/projects/{id}/articles'.format(id=project_id)
+        return paginate('GET', endpoint, self.token, page_size=page_size, page=page, offset=offset, total=total,
+                        prefetch=prefetch)
+
+    async def search_articles(self, search, page_size=None, page=1, offset=None, total=None):
+        """
+        Returns every private article matching a search. See iter_search_articles.
+        :return: List of article dictionaries.
+        """
+        return [article async for article in self.iter_search_articles(search, page_size=page_size, page=page,
+                                                                       offset=offset, total=total)]
+
+    def iter_search_articles(self, search, page_size=None, page=1, offset=None, total=None, prefetch=True):
+        """
+        Iterate over the results of a search of your figshare_articles, fetching the pages as they are needed. See
+        Projects.iter_search_articles for the arguments.
+        :return: Asynchronous generator of article dictionaries.
+        """
+        return paginate('POST', 'account/articles/search', self.token, data={"search_for": search},
+                        page_size=page_size, page=page, offset=offset, total=total, prefetch=prefetch)
+
+    async def get_article(self, project_id, article_id):
+        """
+        Returns the information of an article within a project.
+        :param project_id: Integer of a Figshare project id.
+        :param article_id: Integer of a Figshare article id.
+        :return: Dictionary of article information.
+        """
+        endpoint = 'account/projects/{project_id}/articles/{article_id}'.format(project_id=project_id,
+                                                                                article_id=article_id)
+        return await issue_request('GET', endpoint, token=self.token)
+
+    async def create_article(self, project_id, article_data):
+        """
+        Create an article in a project, refusing duplicate titles. See Projects.create_article.
+        :param project_id: Integer of a Figshare project id.
+        :param article_data: Dictionary of article metadata.
+        :return: Integer id of the new article.
+        """
+        article_data = self._prepare_article_data(article_data)
+
+        # Check to see if article already exists in project, reserving the title if it does not.
+        titles = await self.article_titles(project_id)
+        if not titles.claim(article_data['title']):
+            raise FileExistsError('Article with title: {title} already exists in project: {project_id}'.format(
+                title=article_data['title'], project_id=project_id))
+        try:
+            endpoint = 'account/projects/{project_id}/articles'.format(project_id=project_id)
+            result = await issue_request('POST', endpoint, data=article_data, token=self.token)
+            if config.verbose:
+                print('Article created: ', result['location'], '\n')
+
+            result = await raw_issue_request('GET', result['location'], token=self.token)
+        except BaseException:
+            # The title was not taken after all.
+            titles.release(article_data['title'])
+            raise
+        titles.add(result['id'], article_data['title'])
+
+        return result['id']
+
+    @staticmethod
+    async def update_article(token, article_id, article_data):
+        """
+        Update the metadata of an article. See Projects.update_article.
+        :param token: Authentication token.
+        :param article_id: Integer of a Figshare article id.
+        :param article_data: Dictionary of metadata fields to be updated.
+        :return:
+        """
+        article_data = Projects._check_article_update(article_data)
+
+        endpoint = 'account/articles/{id}'.format(id=article_id)
+        await issue_request('PUT', endpoint, data=article_data, token=token)
+
+    @staticmethod
+    async def publish_article(token, article_id):
+        """
+        Publish an article.
+        :param token: Authentication token.
+        :param article_id: Integer of a Figshare article id.
+        :return:
+        """
+        endpoint = 'account/articles/{article_id}/publish'.format(article_id=article_id)
+        await issue_request('POST', endpoint, token=token)
+
+        if config.verbose:
+            print('Published article: {id}.'.format(id=article_id))
+
+    async def list_files(self, article_id):
+        """
+        Returns the files attached to an article.
+        :param article_id: Integer of a Figshare article id.
+        :return: List of file dictionaries.
+        """
+        endpoint = 'account/articles/{article_id}/files'.format(article_id=article_id)
+        return await issue_request('GET', endpoint, token=self.token)
+
+    async def upload_file(self, article_id, file_name):
+        """
+        Upload a local file to an article, refusing duplicate file names.
+        :param article_id: Integer of a Figshare article id.
+        :param file_name: Local path to the file.
+        :return:
+        """
+        files_list = await self.list_files(article_id)
+        for file in files_list:
+            if file['name'] == file_name.split('/')[-1]:
+                raise FileExistsError('File already exists in article: {article_id}, with name: {name}'.format(
+                    article_id=article_id, name=file['name']))
+
+        file_info = await initiate_new_upload(article_id=article_id, file_name=file_name, token=self.token)
+        await upload_parts(file_name=file_name, file_info=file_info, token=self.token)
+        await complete_upload(article_id=article_id, file_id=file_info['id'], token=self.token)
+
+    @staticmethod
+    async def download_file(url, local_filename, token):
+
+        return await download_file(url=url, local_filename=local_filename, token=token)
+
+    @staticmethod
+    async def stream_file(url, token):
+
+        return await stream_file(url=url, token=token)
+
+    async def stream_article(self, article_id, article_file=0):
+        """
+        Download a file associated with an figshare article, but hold it in memory.
+        :param article_id: int. figshare article id
+        :param article_file: int. index of the file within the article.
+        :return: tuple. (string, bytes) -> (file name, byte stream of file)
+        """
+        files = await self.list_files(article_id)
+        file_name = files[article_file]['name']
+        download_url = files[article_file]['download_url']
+
+        file_stream = await self.stream_file(download_url, self.token)
+
+        return file_name, file_stream
+
+    async def article_delete(self, project_id: int, article_id: int):
+        """
+        Deletes an article from Figshare. Article is permanently removed from Figshare, not just the project.
+
+        Args:
+            project_id: Figshare project ID number article is within.
+            article_id: Figshare article ID number.
+
+        Returns:
+            Empty string on success, otherwise the body of the error response returned by figshare.
+        """
+        endpoint = 'account/projects/{project_id}/articles/{article_id}'.format(project_id=project_id,
+                                                                                article_id=article_id)
+        try:
+            await issue_request('DELETE', endpoint, token=self.token)
+            titles = self._article_titles.get(project_id)
+            if titles is not None:
+                titles.remove(article_id)
+            return ''
+        except HTTPError as err:
+            return err.response.text
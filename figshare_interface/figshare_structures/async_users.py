@@ -0,0 +1,27 @@
+"""
+Asyncio counterpart of User.
+"""
+
+from ..http_requests.async_figshare_requests import *
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class AsyncUser:
+    """
+    Mirrors User, with every method that talks to figshare being a coroutine.
+    """
+
+    def __init__(self, token):
+
+        self.token = token
+
+    async def get_info(self):
+
+        return await issue_request('GET', 'account', token=self.token)
@@ -3,6 +3,7 @@
 """
 
 from ..http_requests.figshare_requests import *
+from ..http_requests.pagination import paginate
 from .. import config
 
 __author__ = "Tobias Gill"
@@ -42,32 +43,43 @@ class Collections:
         result = issue_request(method='GET', endpoint=endpoint, token=self.token)
         return result
 
-    def get_articles(self, collection_id, page_size=100, page=1, page_max=1000):
+    def get_articles(self, collection_id, page_size=None, page=1, page_max=1000, offset=None, total=None):
         """
         Returns a list of figshare_articles in the given article.
 
         :param collection_id: Integer of figshare collection id number.
-        :param page_size: Defines the maximum number of figshare_articles to be returned per iteration.
+        :param page_size: Defines the maximum number of figshare_articles to be returned per iteration. Defaults to
+                          config.page_size.
         :param page: First result page to begin from.
         :param page_max: Maximum number of pages to search for.
+        :param offset: If given, start from this article and page by offset/limit instead of page number.
+        :param total: Number of figshare_articles in the collection, if known. The pages are then fetched concurrently.
         :return: List of collection figshare_articles.
         """
 
-        endpoint = 'account/collections/{id}/articles'.format(id=collection_id)
-        results = []
+        return list(self.iter_articles(collection_id, page_size=page_size, page=page, page_max=page_max,
+                                       offset=offset, total=total))
 
-        result_len = page_size
+    def iter_articles(self, collection_id, page_size=None, page=1, page_max=1000, offset=None, total=None,
+                      prefetch=True):
+        """
+        Iterate over the figshare_articles in the given collection, fetching the pages as they are needed.
 
-        while result_len == page_size and page < page_max + 1 and page < 1001:
-            data = {"page_size": page_size,
-                    "page": page}
-            result = issue_request(method='GET', endpoint=endpoint, data=data, token=self.token)
-            for r in result:
-                results.append(r)
-            page += 1
-            result_len = len(result)
+        :param collection_id: Integer of figshare collection id number.
+        :param page_size: Defines the maximum number of figshare_articles to be returned per iteration. Defaults to
+                          config.page_size.
+        :param page: First result page to begin from.
+        :param page_max: Maximum number of pages to search for.
+        :param offset: If given, start from this article and page by offset/limit instead of page number.
+        :param total: Number of figshare_articles in the collection, if known. The pages are then fetched concurrently.
+        :param prefetch: Fetch the next page in the background while the current one is consumed.
+        :return: Generator of collection figshare_articles.
+        """
 
-        return results
+        endpoint = 'account/collections/{id}/articles'.format(id=collection_id)
+        # Listings are capped at 1000 pages.
+        return paginate('GET', endpoint, self.token, page_size=page_size, page=page, page_max=min(page_max, 1000),
+                        offset=offset, total=total, prefetch=prefetch)
 
     def check_if_exists(self, search):
         """
@@ -158,132 +170,119 @@ class Collections:
         if self.check_if_exists(title):
             raise ValueError('Collection already exists with title: {title}'.format(title=title))
 
-        args_name = []
-        args = []
+        # Check the input parameters and construct the data dictionary to pass to HTTP request.
+        data, deferred = self._collection_data(title, description, articles=articles, authors=authors,
+                                               categories=categories, tags=tags, references=references,
+                                               custom_fields=custom_fields)
+
+        # Issue HTTP request. Returns dictionary of newly created collection information.
+        result = issue_request(method='POST', endpoint='account/collections', data=data, token=self.token)
+        if config.verbose:
+            print('Created collection: ', result['location'], '\n')
+
+        # Use the returned location url to check that information can be collected from figshare.
+        collection_info = raw_issue_request(method='GET', url=result['location'], token=self.token)
+
+        collection_id = collection_info['id']
+
+        # Add the long lists through their own endpoints, 10 entries at a time.
+        for key, value in deferred.items():
+            endpoint = 'account/collections/{collection_id}/{key}'.format(collection_id=collection_id, key=key)
+            for subsec in list(self.chunks(value, 10)):
+                data = {self._deferred_key(key): subsec}
+                issue_request(method='POST', endpoint=endpoint, data=data, token=self.token)
+            if config.verbose:
+                print('{key} added to collection: {id}'.format(key=key.capitalize(), id=collection_id))
+
+        collection_info = raw_issue_request(method='GET', url=result['location'], token=self.token)
+
+        # Return new project information.
+        return collection_info
 
-        # Check the structure of input parameters to see if they meet requirements for figshare inputs.
+    @staticmethod
+    def _collection_data(title, description, articles=None, authors=None, categories=None, tags=None,
+                         references=None, custom_fields=None):
+        """
+        Check the arguments of a new collection meet the requirements for figshare inputs. See create.
+        :return: Tuple of the dictionary of collection information to send to figshare, and a dictionary of the lists
+                 longer than 10 entries, which have to be added through their own endpoints after creation.
+        """
         # Title Checks.
-        self.check_arg(title, str)
+        Collections.check_arg(title, str)
         if not len(title) > 3 & len(title) < 501:  # Checks to see if the length of title is between 3 and 500 chars.
             raise ValueError('Title is not between 3 and 500 characters long.')
 
-        args_name.append('title')
-        args.append(title)
-
         # Check description
-        self.check_arg(description, str)
-        args_name.append('description')
-        args.append(description)
-
-        update_required = False
-        update_articles = False
-        update_authors = False
-        update_categories = False
-        update_references = False
-
-        # Check figshare_articles.
-        if articles is not None:
-            self.check_arg(articles, [int])
-            if len(articles) <= 10:
-                args_name.append('articles')
-                args.append(articles)
-            else:
-                update_required = True
-                update_articles = True
-
-        # Check authors.
-        if authors is not None:
-            self.check_arg(authors, [dict])
-            if len(authors) <= 10:
-                args_name.append('authors')
-                args.append(authors)
-            else:
-                update_required = True
-                update_authors = True
-
-        # Check categories
-        if categories is not None:
-            self.check_arg(categories, [int])
-            if len(categories) <= 10:
-                args_name.append('categories')
-                args.append(categories)
-            else:
-                update_required = True
-                update_categories = True
+        Collections.check_arg(description, str)
+
+        data = {'title': title, 'description': description}
+        deferred = {}
+
+        # Check figshare_articles, authors, categories and references.
+        for key, value, structure in [('articles', articles, [int]),
+                                      ('authors', authors, [dict]),
+                                      ('categories', categories, [int]),
+                                      ('references', references, [str])]:
+            if value is not None:
+                Collections.check_arg(value, structure)
+                if len(value) <= 10:
+                    data[key] = value
+                else:
+                    deferred[key] = value
 
         # Check Tags if given.
         if tags is not None:
-            self.check_arg(tags, [str])
-            args_name.append('tags')
-            args.append(tags)
-
-        # Check references is given.
-        if references is not None:
-            self.check_arg(references, [str])
-            if len(references) <= 10:
-                args_name.append('references')
-                args.append(references)
-            else:
-                update_required = True
-                update_references = True
+            Collections.check_arg(tags, [str])
+            data['tags'] = tags
 
         # Do not know what the structure of custom_fields will be therefore will have to check before calling.
         if custom_fields is not None:
-            args_name.append('custom_fields')
-            args.append(custom_fields)
-
-        # Construct data dictionary to pass to HTTP request.
-        data = {}
-        for arg in range(len(args)):
-            data[args_name[arg]] = args[arg]
+            data['custom_fields'] = custom_fields
 
-        # Issue HTTP request. Returns dictionary of newly created collection information.
-        result = issue_request(method='POST', endpoint='account/collections', data=data, token=self.token)
-        if config.verbose:
-            print('Created collection: ', result['location'], '\n')
+        return data, deferred
 
-        # Use the returned location url to check that information can be collected from figshare.
-        collection_info = raw_issue_request(method='GET', url=result['location'], token=self.token)
+    @staticmethod
+    def _deferred_key(key):
+        """Name under which the entries of a deferred list are posted to its endpoint."""
+        # The collection articles endpoint takes the article ids as figshare_articles.
+        return 'figshare_articles' if key == 'articles' else key
 
-        collection_id = collection_info['id']
+    @staticmethod
+    def _confirm_delete(collection_id, title, safe=True):
+        """
+        Ask the user to confirm the deletion of a collection. This blocks on input, so it must not be called on an
+        event loop.
+        :param collection_id: Figshare collection ID number.
+        :param title: Title of the collection.
+        :param safe: If False, do not ask and confirm straight away.
+        :return: True if the deletion is confirmed.
+        """
+        # Format a string for input confirmation
+        confirmation_str = "Are you sure you want to delete collection: {id}.\n{title}"
+        confirmation_str = confirmation_str.format(id=collection_id, title=title)
 
-        if update_required:
-            if update_articles:
-                for subsec in list(self.chunks(articles, 10)):
-                    data = {'figshare_articles': subsec}
-                    endpoint = 'account/collections/{collection_id}/articles'.format(collection_id=collection_id)
-                    issue_request(method='POST', endpoint=endpoint, data=data, token=self.token)
-                if config.verbose:
-                    print('Articles added to collection: {id}'.format(id=collection_id))
-
-            if update_authors:
-                for subsec in list(self.chunks(authors, 10)):
-                    data = {'authors': subsec}
-                    endpoint = 'account/collections/{collection_id}/authors'.format(collection_id=collection_id)
-                    issue_request(method='POST', endpoint=endpoint, data=data, token=self.token)
-                if config.verbose:
-                    print('Authors added to collection: {id}'.format(id=collection_id))
-
-            if update_categories:
-                for subsec in list(self.chunks(categories, 10)):
-                    data = {'categories': subsec}
-                    endpoint = 'account/collections/{collection_id}/categories'.format(collection_id=collection_id)
-                    issue_request(method='POST', endpoint=endpoint, data=data, token=self.token)
-                if config.verbose:
-                    print('Categories added to collection: {id}'.format(id=collection_id))
-
-            if update_references:
-                for subsec in list(self.chunks(references, 10)):
-                    data = {'references': subsec}
-                    endpoint = 'account/collections/{collection_id}/references'.format(collection_id=collection_id)
-                    issue_request(method='POST', endpoint=endpoint, data=data, token=self.token)
-                if config.verbose:
-                    print('References added to collection: {id}'.format(id=collection_id))
+        confirmation_resp = ''
+        if safe:
+            # If in default safe mode ask for confirmation.
+            # Ask user to confirm that they want to delete the collection found.
+            confirmation_resp = input(confirmation_str)
+        elif not safe:
+            # If set to unsafe automatically set confirmation to yes.
+            confirmation_resp = 'y'
 
-        collection_info = raw_issue_request(method='GET', url=result['location'], token=self.token)
+        # Lists for valid responses to input.
+        confirmation_yes = ['y', 'Y', 'yes', 'Yes', 'YES']
+        confirmation_no = ['n', 'N', 'no', 'No', 'NO']
 
-        # Return new project information.
-        return collection_info
+        if confirmation_resp in confirmation_yes:
+            return True
+        elif confirmation_resp in confirmation_no:
+            # If deletion is canceled.
+            print('Collection: {id}. deletion canceled.'.format(id=collection_id))
+        else:
+            # If input response is unknown.
+            print('Unknown response: {resp}. Collection not deleted.'.format(resp=confirmation_resp))
+        return False
 
     def update(self, collection_id: int, update_dict: dict=None):
         """
@@ -394,12 +393,8 @@ class Collections:
     @staticmethod
     def download_file(url, local_filename, token):
 
-        header = {'Authorization': 'token ' + token}
-        r = requests.get(url=url, stream=True, headers=header)
-        if r.status_code == 200:
-            with open(local_filename, 'wb') as f:
-                for chunk in r.iter_content(1048576):
-                    f.write(chunk)
+        # Delegate to the request layer so the download shares the pooled session.
+        return download_file(url=url, local_filename=local_filename, token=token)
 
     def delete(self, collection_id: int, safe: bool=True):
         """
@@ -416,35 +411,12 @@ class Collections:
         # Get the information for the given article
         collection_info = self.get_info(collection_id)
 
-        # Format a string for input confirmation
-        confirmation_str = "Are you sure you want to delete collection: {id}.\n{title}"
-        confirmation_str = confirmation_str.format(id=collection_id, title=collection_info['title'])
-
-        confirmation_resp = ''
-        if safe:
-            # If in default safe mode ask for confirmation.
-            # Ask user to confirm that they want to delete the project found.
-            confirmation_resp = input(confirmation_str)
-        elif not safe:
-            # If set to unsafe automatically set confirmation to yes.
-            confirmation_resp = 'y'
-
-        # Lists for valid responses to input.
-        confirmation_yes = ['y', 'Y', 'yes', 'Yes', 'YES']
-        confirmation_no = ['n', 'N', 'no', 'No', 'NO']
-
-        if confirmation_resp in confirmation_yes:
+        if self._confirm_delete(collection_id, collection_info['title'], safe):
             # If the delete is confirmed then proceed.
-            # Construct an endpoint from the given project_id.
+            # Construct an endpoint from the given collection_id.
             endpoint = 'account/collections/{id}'.format(id=collection_id)
 
             # Issue deletion request.
             issue_request(method='DELETE', endpoint=endpoint, token=self.token)
             if config.verbose:
                 print('Deleted Project: ', collection_id, '.')
-        elif confirmation_resp in confirmation_no:
-            # If deletion is canceled.
-            print('Collection: {id}. deletion canceled.')
-        else:
-            # If input response is unknown.
-            print('Unknown response: {resp}. Collection not deleted.'.format(resp=confirmation_resp))
@@ -0,0 +1,370 @@
+"""
+Local Metadata Index.
+
+Mirrors the metadata of your figshare projects, their articles and files, and your collections into a local SQLite
+database, so that questions such as "does this article exist", "what files are in article X" or "which articles have
+vgap > 1" are answered by an indexed query instead of a full listing over the network.
+
+The first sync() fetches everything. Later syncs only list the projects, articles and collections, and fetch the
+details and files of those whose modified_date has changed since they were indexed. Items that have disappeared from
+figshare are removed from the index.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .projects import Projects
+from .collections import Collections
+from ..http_requests.pagination import paginate
+from .. import config
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY, title TEXT, modified_date TEXT, info TEXT);
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY, project_id INTEGER, title TEXT, modified_date TEXT, info TEXT);
+CREATE INDEX IF NOT EXISTS articles_project_title ON articles (project_id, title);
+CREATE INDEX IF NOT EXISTS articles_title ON articles (title);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, article_id INTEGER, name TEXT, size INTEGER, computed_md5 TEXT, info TEXT);
+CREATE INDEX IF NOT EXISTS files_article ON files (article_id, name);
+CREATE TABLE IF NOT EXISTS custom_fields (
+    article_id INTEGER, name TEXT, value TEXT, value_num REAL);
+CREATE INDEX IF NOT EXISTS custom_fields_num ON custom_fields (name, value_num);
+CREATE INDEX IF NOT EXISTS custom_fields_text ON custom_fields (name, value);
+CREATE INDEX IF NOT EXISTS custom_fields_article ON custom_fields (article_id);
+CREATE TABLE IF NOT EXISTS collections (
+    id INTEGER PRIMARY KEY, title TEXT, modified_date TEXT, info TEXT);
+CREATE TABLE IF NOT EXISTS collection_articles (
+    collection_id INTEGER, article_id INTEGER, PRIMARY KEY (collection_id, article_id));
+"""
+
+# Comparison operators accepted by find_by_custom_field.
+_OPERATORS = ('=', '!=', '<', '<=', '>', '>=')
+
+
+def _custom_fields(article_info):
+    """
+    Return the custom fields of an article as (name, value) pairs. figshare returns them as a list of dictionaries,
+    but the metadata structures of this package write them as a single dictionary, so accept either.
+    """
+    fields = article_info.get('custom_fields') or []
+    if isinstance(fields, dict):
+        return list(fields.items())
+    return [(field.get('name'), field.get('value')) for field in fields]
+
+
+def _number(value):
+    """The value of a custom field as a float, or None if it is not a number."""
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class MetadataIndex:
+    """
+    SQLite mirror of a figshare account's projects, articles, files and collections.
+    """
+
+    def __init__(self, token, path=None, workers=None):
+        """
+        :param token: Authentication token.
+        :param path: Path of the SQLite database. Defaults to config.metadata_index_path. ':memory:' gives an index
+                     that lasts for the life of the object.
+        :param workers: Number of articles whose details are fetched at once during a sync. Defaults to
+                        config.metadata_index_workers.
+        """
+        if path is None:
+            path = config.metadata_index_path
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        if workers is None:
+            workers = config.metadata_index_workers
+
+        self.token = token
+        self.path = path
+        self.workers = workers
+        self.projects = Projects(token)
+        self.collections = Collections(token)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    """
+    Synchronisation.
+    """
+
+    def sync(self, project_ids=None, collections=True):
+        """
+        Bring the index up to date with figshare.
+        :param project_ids: Only sync these projects. All of your projects if None.
+        :param collections: If True, also sync your collections.
+        :return: Dictionary counting the projects, articles and collections fetched and removed.
+        """
+        counts = {'projects': 0, 'articles': 0, 'articles_removed': 0, 'collections': 0, 'collections_removed': 0}
+
+        # The full listing is collected before anything is pruned, so that no project beyond the first page is taken
+        # for deleted.
+        listed_projects = list(paginate('GET', 'account/projects', self.token))
+        if project_ids is not None:
+            listed_projects = [project for project in listed_projects if project['id'] in project_ids]
+        else:
+            # Projects no longer on figshare, and so their articles, are removed.
+            listed_ids = [project['id'] for project in listed_projects]
+            for project_id in self._stale_ids('projects', listed_ids):
+                counts['articles_removed'] += self._remove_articles(project_id, [])
+                with self._lock, self._connection:
+                    self._connection.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+
+        for project in listed_projects:
+            if self._is_changed('projects', project):
+                info = self.projects.get_info(project['id'])
+                with self._lock, self._connection:
+                    self._connection.execute('INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?)',
+                                             (info['id'], info.get('title'), info.get('modified_date'),
+                                              json.dumps(info)))
+                counts['projects'] += 1
+            fetched, removed = self._sync_articles(project['id'])
+            counts['articles'] += fetched
+            counts['articles_removed'] += removed
+
+        if collections:
+            fetched, removed = self._sync_collections()
+            counts['collections'] += fetched
+            counts['collections_removed'] += removed
+
+        if config.verbose:
+            print('Metadata index synced: {projects} projects, {articles} articles and {collections} collections '
+                  'updated.'.format(**counts))
+        return counts
+
+    def _sync_articles(self, project_id):
+        """
+        Fetch the details and files of the new and modified articles of a project, and drop its deleted articles.
+        :return: Tuple of the number of articles fetched and removed.
+        """
+        listed = list(self.projects.iter_articles(project_id))
+        changed = [article for article in listed if self._is_changed('articles', article)]
+
+        def fetch(article):
+            info = self.projects.get_article(project_id, article['id'])
+            files = self.projects.list_files(article['id'])
+            return info, files
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            for info, files in executor.map(fetch, changed):
+                self._store_article(project_id, info, files)
+
+        removed = self._remove_articles(project_id, [article['id'] for article in listed])
+        return len(changed), removed
+
+    def _sync_collections(self):
+        """
+        Fetch the details and article lists of new and modified collections, and drop deleted collections.
+        :return: Tuple of the number of collections fetched and removed.
+        """
+        listed = list(paginate('GET', 'account/collections', self.token))
+        changed = [collection for collection in listed if self._is_changed('collections', collection)]
+
+        for collection in changed:
+            info = self.collections.get_info(collection['id'])
+            article_ids = [article['id'] for article in self.collections.iter_articles(collection['id'])]
+            with self._lock, self._connection:
+                self._connection.execute('INSERT OR REPLACE INTO collections VALUES (?, ?, ?, ?)',
+                                         (info['id'], info.get('title'), info.get('modified_date'), json.dumps(info)))
+                self._connection.execute('DELETE FROM collection_articles WHERE collection_id = ?', (info['id'],))
+                self._connection.executemany('INSERT OR IGNORE INTO collection_articles VALUES (?, ?)',
+                                             [(info['id'], article_id) for article_id in article_ids])
+
+        stale = self._stale_ids('collections', [collection['id'] for collection in listed])
+        with self._lock, self._connection:
+            for collection_id in stale:
+                self._connection.execute('DELETE FROM collections WHERE id = ?', (collection_id,))
+                self._connection.execute('DELETE FROM collection_articles WHERE collection_id = ?', (collection_id,))
+        return len(changed), len(stale)
+
+    def _is_changed(self, table, item):
+        """
+        True if an item from a listing is not indexed, or its modified_date differs from the indexed one. Listings
+        without a modified_date always count as changed.
+        """
+        modified_date = item.get('modified_date')
+        if modified_date is None:
+            return True
+        with self._lock:
+            row = self._connection.execute('SELECT modified_date FROM {table} WHERE id = ?'.format(table=table),
+                                           (item['id'],)).fetchone()
+        return row is None or row['modified_date'] != modified_date
+
+    def _stale_ids(self, table, listed_ids):
+        """Return the ids indexed in a table that are no longer listed."""
+        with self._lock:
+            indexed = {row['id'] for row in self._connection.execute('SELECT id FROM {table}'.format(table=table))}
+        return indexed - set(listed_ids)
+
+    def _store_article(self, project_id, info, files):
+        """Replace the indexed details, custom fields and files of an article."""
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?)',
+                                     (info['id'], project_id, info.get('title'), info.get('modified_date'),
+                                      json.dumps(info)))
+            self._connection.execute('DELETE FROM custom_fields WHERE article_id = ?', (info['id'],))
+            self._connection.executemany('INSERT INTO custom_fields VALUES (?, ?, ?, ?)',
+                                         [(info['id'], name, json.dumps(value), _number(value))
+                                          for name, value in _custom_fields(info)])
+            self._connection.execute('DELETE FROM files WHERE article_id = ?', (info['id'],))
+            self._connection.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                                         [(file['id'], info['id'], file.get('name'), file.get('size'),
+                                           file.get('computed_md5'), json.dumps(file)) for file in files])
+
+    def _remove_articles(self, project_id, keep_ids):
+        """
+        Remove the indexed articles of a project that are not in keep_ids.
+        :return: Number of articles removed.
+        """
+        keep_ids = set(keep_ids)
+        with self._lock, self._connection:
+            indexed = [row['id'] for row in self._connection.execute('SELECT id FROM articles WHERE project_id = ?',
+                                                                     (project_id,))]
+            removed = [article_id for article_id in indexed if article_id not in keep_ids]
+            for article_id in removed:
+                for table, column in [('articles', 'id'), ('files', 'article_id'), ('custom_fields', 'article_id')]:
+                    self._connection.execute('DELETE FROM {table} WHERE {column} = ?'.format(table=table,
+                                                                                           column=column),
+                                             (article_id,))
+        return len(removed)
+
+    """
+    Lookups.
+    """
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def get_project(self, project_id):
+        """
+        :param project_id: figshare project id number.
+        :return: Dictionary of project information, or None if it is not indexed.
+        """
+        rows = self._query('SELECT info FROM projects WHERE id = ?', (project_id,))
+        return json.loads(rows[0]['info']) if rows else None
+
+    def get_article(self, article_id):
+        """
+        :param article_id: figshare article id number.
+        :return: Dictionary of article information, or None if it is not indexed.
+        """
+        rows = self._query('SELECT info FROM articles WHERE id = ?', (article_id,))
+        return json.loads(rows[0]['info']) if rows else None
+
+    def list_articles(self, project_id):
+        """
+        Indexed counterpart of Projects.list_articles.
+        :param project_id: figshare project id number.
+        :return: List of dictionaries of article information.
+        """
+        rows = self._query('SELECT info FROM articles WHERE project_id = ? ORDER BY id', (project_id,))
+        return [json.loads(row['info']) for row in rows]
+
+    def article_exists(self, project_id, title):
+        """
+        :param project_id: figshare project id number.
+        :param title: Article title.
+        :return: True if the project has an article with exactly this title.
+        """
+        return bool(self._query('SELECT 1 FROM articles WHERE project_id = ? AND title = ? LIMIT 1',
+                                (project_id, title)))
+
+    def find_articles(self, title, project_id=None):
+        """
+        :param title: Article title.
+        :param project_id: Only look in this project, if given.
+        :return: List of dictionaries of information of the articles with exactly this title.
+        """
+        if project_id is None:
+            rows = self._query('SELECT info FROM articles WHERE title = ? ORDER BY id', (title,))
+        else:
+            rows = self._query('SELECT info FROM articles WHERE project_id = ? AND title = ? ORDER BY id',
+                               (project_id, title))
+        return [json.loads(row['info']) for row in rows]
+
+    def find_by_custom_field(self, name, operator, value, project_id=None):
+        """
+        Find articles by the value of a custom field, e.g. find_by_custom_field('vgap', '>', 1).
+        Numbers are compared numerically, anything else as the JSON text of the value.
+        :param name: Custom field name.
+        :param operator: One of '=', '!=', '<', '<=', '>', '>='.
+        :param value: Value to compare against.
+        :param project_id: Only look in this project, if given.
+        :return: List of dictionaries of article information.
+        """
+        if operator not in _OPERATORS:
+            raise ValueError('operator must be one of {operators}.'.format(operators=', '.join(_OPERATORS)))
+        number = _number(value)
+        if number is not None and not isinstance(value, str):
+            condition, parameter = 'c.value_num {op} ?'.format(op=operator), number
+        else:
+            condition, parameter = 'c.value {op} ?'.format(op=operator), json.dumps(value)
+
+        sql = ('SELECT DISTINCT a.info, a.id FROM custom_fields c JOIN articles a ON a.id = c.article_id '
+               'WHERE c.name = ? AND ' + condition)
+        parameters = [name, parameter]
+        if project_id is not None:
+            sql += ' AND a.project_id = ?'
+            parameters.append(project_id)
+        return [json.loads(row['info']) for row in self._query(sql + ' ORDER BY a.id', parameters)]
+
+    def list_files(self, article_id):
+        """
+        Indexed counterpart of Projects.list_files.
+        :param article_id: figshare article id number.
+        :return: List of dictionaries of file information.
+        """
+        rows = self._query('SELECT info FROM files WHERE article_id = ? ORDER BY id', (article_id,))
+        return [json.loads(row['info']) for row in rows]
+
+    def file_exists(self, article_id, name):
+        """
+        :param article_id: figshare article id number.
+        :param name: File name.
+        :return: True if the article has a file with this name.
+        """
+        return bool(self._query('SELECT 1 FROM files WHERE article_id = ? AND name = ? LIMIT 1', (article_id, name)))
+
+    def get_articles(self, collection_id):
+        """
+        Indexed counterpart of Collections.get_articles. Only articles of indexed projects are returned.
+        :param collection_id: figshare collection id number.
+        :return: List of dictionaries of article information.
+        """
+        rows = self._query('SELECT a.info FROM collection_articles c JOIN articles a ON a.id = c.article_id '
+                           'WHERE c.collection_id = ? ORDER BY a.id', (collection_id,))
+        return [json.loads(row['info']) for row in rows]
+
+    def close(self):
+        """
+        Close the database connection.
+        :return:
+        """
+        with self._lock:
+            self._connection.close()
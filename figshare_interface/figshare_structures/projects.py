@@ -2,7 +2,15 @@
 
 """
 
+import threading
+from collections import Counter
+
 from ..http_requests.figshare_requests import *
+from ..http_requests.upload_journal import UploadJournal
+from ..http_requests.response_stream import open_stream
+from ..http_requests.lazy_info import LazyInfo, location_id
+from ..http_requests.pagination import paginate
+from ..http_requests.bulk import run_bulk
 from ..metadata_structures.stm_metadata_structures.stm_topo_metadata import *
 from ..metadata_structures.stm_metadata_structures.stm_spec_metadata import *
 from .. import config
@@ -16,12 +24,91 @@ __email__ = "toby.gill.09@ucl.ac.uk"
 __status__ = "Development"
 
 
+class _TitleIndex:
+    """
+    In-memory index of the titles of a set of figshare items, e.g. the articles of one project, by item id.
+    A title can be claimed before the item carrying it is created, so concurrent creations cannot both take it.
+    """
+
+    def __init__(self, items):
+        """
+        :param items: Iterable of item dictionaries, each with an 'id' and a 'title'.
+        """
+        self.lock = threading.Lock()
+        self.titles = {item['id']: item['title'] for item in items}
+        self.counts = Counter(self.titles.values())
+        self.claimed = set()
+
+    def __contains__(self, title):
+        with self.lock:
+            return self.counts[title] > 0 or title in self.claimed
+
+    def claim(self, title):
+        """
+        Reserve a title.
+        :param title: Title.
+        :return: True if the title was free and is now reserved, False if it is in use or already reserved.
+        """
+        with self.lock:
+            if self.counts[title] > 0 or title in self.claimed:
+                return False
+            self.claimed.add(title)
+            return True
+
+    def release(self, title):
+        """Give up a reserved title, e.g. when the creation of the item failed."""
+        with self.lock:
+            self.claimed.discard(title)
+
+    def add(self, item_id, title):
+        """Record an item, taking over the reservation of its title if there is one."""
+        with self.lock:
+            self.add_locked(item_id, title)
+
+    def rename(self, item_id, title):
+        """
+        Change the title of an item, if it is indexed.
+        :param item_id: Id of the item.
+        :param title: New title.
+        :return: True if the item is indexed and has been renamed, False otherwise.
+        """
+        with self.lock:
+            if item_id not in self.titles:
+                return False
+            self.add_locked(item_id, title)
+            return True
+
+    def remove(self, item_id):
+        """Forget an item, e.g. after it has been deleted."""
+        with self.lock:
+            self.remove_locked(item_id)
+
+    def add_locked(self, item_id, title):
+        self.claimed.discard(title)
+        self.remove_locked(item_id)
+        self.titles[item_id] = title
+        self.counts[title] += 1
+
+    def remove_locked(self, item_id):
+        title = self.titles.pop(item_id, None)
+        if title is not None:
+            self.counts[title] -= 1
+
+
 class Projects:
 
     def __init__(self, token):
 
         self.token = token  # OAuth token for access to figshare API.
 
+        # Title indexes of your projects and of the articles of each project, seeded by the first duplicate check.
+        self._project_titles = None
+        self._article_titles = {}
+        self._titles_lock = threading.Lock()
+        # Files of each article uploaded to, by name, seeded by the first upload. See file_manifest.
+        self._file_manifests = {}
+        self._manifests_lock = threading.Lock()
+
     def get_list(self):
         """
         Used to get a list of private projects
@@ -60,24 +147,51 @@ class Projects:
 
     def check_if_exists(self, search):
         """
-        Use to search your figshare projects for existing projects with the exact same title as input.
-        :param search: string containing the title name to search for. See 'https://docs.figshare.com/Search/search/'.
+        Use to check your figshare projects for existing projects with the exact same title as input.
+        The titles are listed from figshare once, then kept up to date as projects are created, renamed and deleted
+        through this object. Call forget_titles() if they have been changed elsewhere.
+        :param search: string containing the title name to search for.
         :return: True, if title already exists. False, if it does not.
         """
+        return search in self.project_titles()
 
-        # Ideally this will either be a single project if the title is already in use.
-        result = self.search(search)
+    def project_titles(self):
+        """
+        Return the title index of your projects, listing them from figshare if it is not seeded yet.
+        :return: _TitleIndex of project titles.
+        """
+        with self._titles_lock:
+            if self._project_titles is None:
+                self._project_titles = _TitleIndex(paginate('GET', 'account/projects', self.token))
+            return self._project_titles
 
-        # Check to see that returned result has the same title as that searched for.
-        for project in range(len(result)):
-            # If project title already exists return True
-            if result[project]['title'] == search:
-                return True
-            # If no project exists with the same title return False.
+    def article_titles(self, project_id):
+        """
+        Return the title index of the articles of a project, listing them from figshare if it is not seeded yet.
+        Articles created and deleted through this object are recorded in it, as are renames by bulk_update_articles.
+        The static update_article cannot see the index, so call forget_titles() after renaming an article with it.
+        :param project_id: int. figshare project id number.
+        :return: _TitleIndex of article titles.
+        """
+        with self._titles_lock:
+            if project_id not in self._article_titles:
+                self._article_titles[project_id] = _TitleIndex(self.iter_articles(project_id))
+            return self._article_titles[project_id]
+
+    def forget_titles(self, project_id=None):
+        """
+        Drop title indexes, so that the next duplicate check lists the titles from figshare again.
+        :param project_id: int. Drop the index of this project's articles. If None, drop every index.
+        :return:
+        """
+        with self._titles_lock:
+            if project_id is None:
+                self._project_titles = None
+                self._article_titles.clear()
             else:
-                return False
+                self._article_titles.pop(project_id, None)
 
-    def create(self, title, description, funding, group_id):
+    def create(self, title, description, funding, group_id, lean=None):
         """
         Create a figshare project.
 
@@ -88,6 +202,8 @@ class Projects:
         :param funding: String containing acknowledgements to funding.
                           - String length should be no more than 2000 characters.
         :param group_id: Integer of figshare group id.
+        :param lean: If True, return a LazyInfo that only fetches the project information when a key other than the
+                     id, location or the fields above is read. Defaults to config.lean.
         :return: Dictionary containing the newly created figshare project information.
         """
 
@@ -95,44 +211,27 @@ class Projects:
         if self.check_if_exists(title):
             raise ValueError('Project already exists with title: {title}'.format(title=title))
 
-        # Check the structure of input parameters to see if they meet requirements for figshare inputs.
-        # Title Checks.
-        if not type(title) == str:  # Checks to see if title is a string.
-            raise TypeError('title is not a string')
-        if not len(title) > 3 & len(title) < 501:  # Checks to see if the length of title is between 3 and 500 chars.
-            raise ValueError('Title is not between 3 and 500 characters long.')
-
-        if not type(description) == str:  # Checks to see if description is a string.
-            raise TypeError('description is not a string.')
-
-        if not type(funding) == str:  # Checks to see if funding is a string.
-            raise TypeError('funding is not a string')
-        if not len(funding) < 2001:  # Checks to see if the funding string is under 2000 characters long.
-            raise ValueError('funding string is longer than 2000 characters.')
-
-        if not type(group_id) == int:  # Checks to see id group_id is an integer.
-            raise TypeError('group_id is not an integer.')
-
-        # Construct data dictionary to pass to HTTP request.
-        data = {
-            'title': title,
-            'description': description,
-            'funding': funding,
-            'group_id': group_id
-        }
+        # Check the input parameters and construct the data dictionary to pass to HTTP request.
+        data = self._project_data(title, description, funding, group_id)
 
         # Issue HTTP request. Returns dictionary of newly created project information.
         result = issue_request(method='POST', endpoint='account/projects', data=data, token=self.token)
         if config.verbose:
             print('Created project: ', result['location'], '\n')
 
-        # Use the returned location url to check that information can be collected from figshare.
-        project_info = raw_issue_request(method='GET', url=result['location'], token=self.token)
+        if lean if lean is not None else config.lean:
+            location = result['location']
+            project_info = LazyInfo(lambda: raw_issue_request(method='GET', url=location, token=self.token),
+                                    dict(data, id=location_id(location), location=location))
+        else:
+            # Use the returned location url to check that information can be collected from figshare.
+            project_info = raw_issue_request(method='GET', url=result['location'], token=self.token)
+        self.project_titles().add(project_info['id'], title)
 
         # Return new project information.
         return project_info
 
-    def update(self, project_id, title=None, description=None, funding=None, group_id=None):
+    def update(self, project_id, title=None, description=None, funding=None, group_id=None, lean=None):
         """
         Update project information of an existing figshare project.
 
@@ -147,46 +246,16 @@ class Projects:
         :param funding: String containing updated project funding.
                           - String length should be no more than 2000 characters long.
         :param group_id: Integer of updated fighsare group id.
+        :param lean: If True, return a LazyInfo that only fetches the project information when a key other than the
+                     id or the updated fields is read. Defaults to config.lean.
         :return: Dictionary of updated figshare project information.
         """
 
-        # Construct data dictionary to pass to HTTP request.
-        data = {}  # Empty dictionary to add updated information.
-
-        # Check the structure of input parameters to see if they meet requirements for figshare inputs.
-        # Title Checks.
-        if title is not None:  # If an updated title is provided
-            if not type(title) == str:  # Checks to see if title is a string.
-                raise TypeError('title is not a string')
-            # Checks to see if the length of title is between 3 and 500 chars.
-            elif not len(title) > 3 & len(title) < 501:
-                raise ValueError('Title is not between 3 and 500 characters long.')
-            # Check to see if project title already exists.
-            if self.check_if_exists(title):
-                raise ValueError('Project already exists with title: {title}'.format(title=title))
-            # If all ok then add updated title to data dictionary.
-            else:
-                data['title'] = title
-
-        if description is not None:
-            if not type(description) == str:  # Checks to see if description is a string.
-                raise TypeError('description is not a string.')
-            else:
-                data['description'] = description
-
-        if funding is not None:
-            if not type(funding) == str:  # Checks to see if funding is a string.
-                raise TypeError('funding is not a string')
-            elif not len(funding) < 2001:  # Checks to see if the funding string is under 2000 characters long.
-                raise ValueError('funding string is longer than 2000 characters.')
-            else:
-                data['funding'] = funding
-
-        if group_id is not None:
-            if not type(group_id) == int:  # Checks to see id group_id is an integer.
-                raise TypeError('group_id is not an integer.')
-            else:
-                data['group_id'] = group_id
+        # Check the input parameters and construct the data dictionary of the updated information.
+        data = self._project_update_data(title, description, funding, group_id)
+        # Check to see if project title already exists.
+        if title is not None and self.check_if_exists(title):
+            raise ValueError('Project already exists with title: {title}'.format(title=title))
 
         if data != {}:
             # Construct an endpoint from the project_id given.
@@ -195,38 +264,26 @@ class Projects:
             issue_request(method='PUT', endpoint=endpoint, data=data, token=self.token)
             if config.verbose:
                 print('Project: {project_id} updated'.format(project_id=project_id))
+            if title is not None:
+                self.project_titles().add(project_id, title)
 
+            if lean if lean is not None else config.lean:
+                return LazyInfo(lambda: self.get_info(project_id=project_id), dict(data, id=project_id))
             project_info = self.get_info(project_id=project_id)
 
             return project_info
 
-    def invite(self, project_id, collaborator):
+    def invite(self, project_id, collaborator, lean=None):
         """
 
         :param project_id:
         :param collaborator:
+        :param lean: If True, return a LazyInfo that only fetches the project information when a key other than the
+                     id is read. Defaults to config.lean.
         :return:
         """
         if collaborator is not None:
-            if type(collaborator) != dict:
-                raise TypeError('Collaborators are not dict')
-            for key, value in collaborator.items():
-                print(key, ':', value)
-                if key == 'email':
-                    print('test')
-                if key not in ['user_id', 'role_name', 'email']:
-                    raise ValueError('Collaborator dictionary has unknown key: {}'.format(key))
-                elif key == 'user_id':
-                    if type(value) != int:
-                        print(3)
-                        raise TypeError('Collaborator id not an integer')
-                elif key == 'email':
-                    if type(value) != str:
-                        print(4)
-                        raise TypeError('Collaborator name is not a string')
-                elif key == 'role':
-                    if value not in ['owner', 'collaborator', 'viewer']:
-                        raise ValueError('Collaborator role is not either: owner, collaborator or viewer')
+            self._check_collaborator(collaborator)
 
             data = collaborator
 
@@ -238,6 +295,8 @@ class Projects:
             if config.verbose:
                 print('Collaborators invited to Project: {project_id}'.format(project_id=project_id))
 
+            if lean if lean is not None else config.lean:
+                return LazyInfo(lambda: self.get_info(project_id=project_id), {'id': project_id})
             project_info = self.get_info(project_id=project_id)
             print('invited')
             return project_info
@@ -257,9 +316,118 @@ class Projects:
         # Get the information of the given project.
         project_info = self.get_info(project_id)
 
+        if self._confirm_delete(project_id, project_info['title'], safe):
+            # If the delete is confirmed then proceed.
+            # Construct an endpoint from the given project_id.
+            endpoint = 'account/projects/{id}'.format(id=project_id)
+
+            # Issue deletion request.
+            issue_request(method='DELETE', endpoint=endpoint, token=self.token)
+            if self._project_titles is not None:
+                self._project_titles.remove(project_id)
+            self.forget_titles(project_id)
+            if config.verbose:
+                print('Deleted Project: ', project_id, '.')
+
+    @staticmethod
+    def _project_data(title, description, funding, group_id):
+        """
+        Check the arguments of a new project meet the requirements for figshare inputs. See create.
+        :return: Dictionary of project information to send to figshare.
+        """
+        # Title Checks.
+        if not type(title) == str:  # Checks to see if title is a string.
+            raise TypeError('title is not a string')
+        if not len(title) > 3 & len(title) < 501:  # Checks to see if the length of title is between 3 and 500 chars.
+            raise ValueError('Title is not between 3 and 500 characters long.')
+
+        if not type(description) == str:  # Checks to see if description is a string.
+            raise TypeError('description is not a string.')
+
+        if not type(funding) == str:  # Checks to see if funding is a string.
+            raise TypeError('funding is not a string')
+        if not len(funding) < 2001:  # Checks to see if the funding string is under 2000 characters long.
+            raise ValueError('funding string is longer than 2000 characters.')
+
+        if not type(group_id) == int:  # Checks to see id group_id is an integer.
+            raise TypeError('group_id is not an integer.')
+
+        return {
+            'title': title,
+            'description': description,
+            'funding': funding,
+            'group_id': group_id
+        }
+
+    @staticmethod
+    def _project_update_data(title=None, description=None, funding=None, group_id=None):
+        """
+        Check the updated information of a project meets the requirements for figshare inputs. See update.
+        :return: Dictionary of the updated information to send to figshare, empty if there is none.
+        """
+        data = {}  # Empty dictionary to add updated information.
+
+        # Title Checks.
+        if title is not None:  # If an updated title is provided
+            if not type(title) == str:  # Checks to see if title is a string.
+                raise TypeError('title is not a string')
+            # Checks to see if the length of title is between 3 and 500 chars.
+            elif not len(title) > 3 & len(title) < 501:
+                raise ValueError('Title is not between 3 and 500 characters long.')
+            else:
+                data['title'] = title
+
+        if description is not None:
+            if not type(description) == str:  # Checks to see if description is a string.
+                raise TypeError('description is not a string.')
+            else:
+                data['description'] = description
+
+        if funding is not None:
+            if not type(funding) == str:  # Checks to see if funding is a string.
+                raise TypeError('funding is not a string')
+            elif not len(funding) < 2001:  # Checks to see if the funding string is under 2000 characters long.
+                raise ValueError('funding string is longer than 2000 characters.')
+            else:
+                data['funding'] = funding
+
+        if group_id is not None:
+            if not type(group_id) == int:  # Checks to see id group_id is an integer.
+                raise TypeError('group_id is not an integer.')
+            else:
+                data['group_id'] = group_id
+
+        return data
+
+    @staticmethod
+    def _check_collaborator(collaborator):
+        """
+        Check a collaborator dictionary only has the keys user_id, role_name and email, with values of the right type.
+        """
+        if type(collaborator) != dict:
+            raise TypeError('Collaborators are not dict')
+        for key, value in collaborator.items():
+            if key not in ['user_id', 'role_name', 'email']:
+                raise ValueError('Collaborator dictionary has unknown key: {}'.format(key))
+            elif key == 'user_id':
+                if type(value) != int:
+                    raise TypeError('Collaborator id not an integer')
+            elif key == 'email':
+                if type(value) != str:
+                    raise TypeError('Collaborator name is not a string')
+
+    @staticmethod
+    def _confirm_delete(project_id, title, safe=True):
+        """
+        Ask the user to confirm the deletion of a project. This blocks on input, so it must not be called on an event
+        loop.
+        :param project_id: Integer of a Figshare project id.
+        :param title: Title of the project.
+        :param safe: If False, do not ask and confirm straight away.
+        :return: True if the deletion is confirmed.
+        """
         # Format a string for input confirmation.
-        confirmation_str = 'Are you sure you want to delete project: {id}.\n{title}'.format(id=project_id,
-                                                                                            title=project_info['title'])
+        confirmation_str = 'Are you sure you want to delete project: {id}.\n{title}'.format(id=project_id, title=title)
         confirmation_resp = ''
         if safe:
             # If in default safe mode ask for confirmation.
@@ -274,74 +442,54 @@ class Projects:
         confirmation_no = ['n', 'N', 'no', 'No', 'NO']
 
         if confirmation_resp in confirmation_yes:
-            # If the delete is confirmed then proceed.
-            # Construct an endpoint from the given project_id.
-            endpoint = 'account/projects/{id}'.format(id=project_id)
-
-            # Issue deletion request.
-            issue_request(method='DELETE', endpoint=endpoint, token=self.token)
-            if config.verbose:
-                print('Deleted Project: ', project_id, '.')
+            return True
         elif confirmation_resp in confirmation_no:
             # If deletion is canceled.
-            print('Project: {id}. deletion canceled.')
+            print('Project: {id}. deletion canceled.'.format(id=project_id))
         else:
             # If input response is unknown.
             print('Unknown response: {resp}. Project not deleted.'.format(resp=confirmation_resp))
+        return False
+
+    def list_articles(self, project_id, page_size=None, page=1, offset=None, total=None):
 
-    def list_articles(self, project_id, page_size=100, page=1):
+        # Collect every page of the project's figshare_articles.
+        return list(self.iter_articles(project_id, page_size=page_size, page=page, offset=offset, total=total))
 
+    def iter_articles(self, project_id, page_size=None, page=1, offset=None, total=None, prefetch=True):
+        """
+        Iterate over the figshare_articles in a project, fetching the pages as they are needed.
+        :param project_id: int. figshare project id number.
+        :param page_size: int. Number of figshare_articles requested per page. Defaults to config.page_size.
+        :param page: int. First page to request.
+        :param offset: int. If given, start from this article and page by offset/limit instead of page number.
+        :param total: int. Number of figshare_articles in the project, if known. The pages are then fetched
+                      concurrently.
+        :param prefetch: bool. Fetch the next page in the background while the current one is consumed.
+        :return: Generator of article dictionaries.
+        """
         # Construct an endpoint from the given project_id.
         endpoint = 'account/projects/{id}/articles'.format(id=project_id)
-        data = {"page_size": page_size,
-                "page": page}
-        all_results = []
-
-        result = issue_request(method='GET', endpoint=endpoint, data=data, token=self.token)
-        for r in result:
-            all_results.append(r)
-        num_results = len(result)
-        page += 1
-
-        while num_results >= page_size:
-            data = {"page_size": page_size,
-                    "page": page}
-            # Get a list of figshare_articles under project.
-            result = issue_request(method='GET', endpoint=endpoint, data=data, token=self.token)
-            page += 1
-            for r in result:
-                all_results.append(r)
-            num_results = len(result)
-        # Return result list.
-        return all_results
-
-    def search_articles(self, search, page_size=100, page=1):
+        return paginate('GET', endpoint, self.token, page_size=page_size, page=page, offset=offset, total=total,
+                        prefetch=prefetch)
 
-        endpoint = 'account/articles/search'
+    def search_articles(self, search, page_size=None, page=1, offset=None, total=None):
 
-        data = {"search_for": search,
-                "page_size": page_size,
-                "page": page}
+        return list(self.iter_search_articles(search, page_size=page_size, page=page, offset=offset, total=total))
 
-        all_results = []
-
-        result = issue_request(method='POST', endpoint=endpoint, data=data, token=self.token)
-
-        for r in result:
-            all_results.append(r)
-        num_results = len(result)
-        page += 1
-
-        while num_results >= page_size:
-            data = {"search_for": search,
-                    "page_size": page_size,
-                    "page": page}
-            result = issue_request(method='POST', endpoint=endpoint, data=data, token=self.token)
-            page += 1
-            for r in result:
-                all_results.append(r)
-            num_results = len(result)
-        return all_results
+    def iter_search_articles(self, search, page_size=None, page=1, offset=None, total=None, prefetch=True):
+        """
+        Iterate over the results of a search of your figshare_articles, fetching the pages as they are needed.
+        :param search: string. figshare search query.
+        :param page_size: int. Number of results requested per page. Defaults to config.page_size.
+        :param page: int. First page to request.
+        :param offset: int. If given, start from this result and page by offset/limit instead of page number.
+        :param total: int. Number of results, if known. The pages are then fetched concurrently.
+        :param prefetch: bool. Fetch the next page in the background while the current one is consumed.
+        :return: Generator of article dictionaries.
+        """
+        return paginate('POST', 'account/articles/search', self.token, data={"search_for": search},
+                        page_size=page_size, page=page, offset=offset, total=total, prefetch=prefetch)
 
     def get_article(self, project_id, article_id):
 
@@ -354,7 +502,34 @@ class Projects:
         # Return result
         return result
 
-    def create_article(self, project_id, article_data):
+    def create_article(self, project_id, article_data, lean=None):
+
+        article_data = self._prepare_article_data(article_data)
+
+        # Check to see if article already exists in project, reserving the title if it does not.
+        titles = self.article_titles(project_id)
+        if not titles.claim(article_data['title']):
+            raise FileExistsError('Article with title: {title} already exists in project: {project_id}'.format(
+                title=article_data['title'], project_id=project_id))
+        try:
+            article_id = self._post_article(project_id, article_data, lean=lean)
+        except Exception:
+            # The title was not taken after all.
+            titles.release(article_data['title'])
+            raise
+        titles.add(article_id, article_data['title'])
+        # A new article has no files, so uploading to it needs no listing.
+        with self._manifests_lock:
+            self._file_manifests[article_id] = {}
+        return article_id
+
+    @staticmethod
+    def _prepare_article_data(article_data):
+        """
+        Tidy the metadata of a new article, and convert STM metadata to figshare metadata.
+        :param article_data: Dictionary of article metadata.
+        :return: Dictionary of article metadata to send to figshare.
+        """
 
         # Remove references key if no entry.
         if 'references' in article_data:
@@ -376,31 +551,15 @@ class Projects:
             elif article_data['type'] == 'izcurve':
                 raise ValueError('File type: {type} is not yet supported'.format(type=article_data['type']))
 
-        # Check to see if article already exists in project.
-        article_list = self.list_articles(project_id)  # Get list of figshare_articles associated with project.
-        article_list_titles = []
-        for article in article_list:
-            article_list_titles.append(article['title'])
-        if article_data['title'] in article_list_titles:  # Is new article title in the project already?
-            raise FileExistsError('Article with title: {title} already exists in project: {project_id}'.format(
-                title=article_data['title'], project_id=project_id))
-        else:
-
-            endpoint = 'account/projects/{project_id}/articles'.format(project_id=project_id)  # construct endpoint.
-            # Issue HTTP request to create article. get back the new figshare article info.
-            result = issue_request(method='POST', endpoint=endpoint, data=article_data, token=self.token)
-            if config.verbose:  # If not in quite mode.
-                print('Article created: ', result['location'], '\n')  # Notify article has been created.
-
-            # get the new article information from the returned url.
-            result = raw_issue_request(method='GET', url=result['location'], token=self.token)
-
-            return result['id']
+        return article_data
 
     @staticmethod
-    def update_article(token, article_id, article_data):
-
-        # Check the structure of input parameters to see if they meet requirements for figshare inputs.
+    def _check_article_update(article_data):
+        """
+        Check the updated metadata of an article meets the requirements for figshare inputs, and drop empty references.
+        :param article_data: Dictionary of metadata fields to be updated.
+        :return: Dictionary of metadata to send to figshare.
+        """
         # Title Checks.
         if 'title' in article_data:  # If an updated title is provided
             if not type(article_data['title']) == str:  # Checks to see if title is a string.
@@ -423,6 +582,37 @@ class Projects:
             elif article_data['references'] is []:
                 del article_data['references']
 
+        return article_data
+
+    def _post_article(self, project_id, article_data, lean=None):
+        """
+        Create an article in a project, without checking its title is unused.
+        :param project_id: int. figshare project id number.
+        :param article_data: Dictionary of article metadata, from _prepare_article_data.
+        :param lean: bool. If True, take the id from the returned location rather than fetching the new article.
+                     Defaults to config.lean.
+        :return: int. id number of the new article.
+        """
+
+        endpoint = 'account/projects/{project_id}/articles'.format(project_id=project_id)  # construct endpoint.
+        # Issue HTTP request to create article. get back the new figshare article info.
+        result = issue_request(method='POST', endpoint=endpoint, data=article_data, token=self.token)
+        if config.verbose:  # If not in quite mode.
+            print('Article created: ', result['location'], '\n')  # Notify article has been created.
+
+        if lean if lean is not None else config.lean:
+            return location_id(result['location'])
+
+        # get the new article information from the returned url.
+        result = raw_issue_request(method='GET', url=result['location'], token=self.token)
+
+        return result['id']
+
+    @staticmethod
+    def update_article(token, article_id, article_data):
+
+        article_data = Projects._check_article_update(article_data)
+
         endpoint = 'account/articles/{id}'.format(id=article_id)
 
         issue_request(method='PUT', endpoint=endpoint, data=article_data, token=token)
@@ -447,40 +637,138 @@ class Projects:
         # Return result list.
         return result
 
-    def upload_file(self, article_id, file_name):
-
-        files_list = self.list_files(article_id)
-        for file in files_list:
-            if file['name'] == file_name.split('/')[-1]:
-                raise FileExistsError('File already exists in article: {article_id}, with name: {name}'.format(
-                    article_id=article_id, name=file['name']))
+    def file_manifest(self, article_id):
+        """
+        Return the files of an article by name, listing them from figshare if they are not cached yet. The manifest
+        is updated locally as upload_file completes uploads, and dropped if an upload fails.
+        :param article_id: Integer of a Figshare article id.
+        :return: Dictionary of file information dictionaries, keyed by file name.
+        """
+        with self._manifests_lock:
+            manifest = self._file_manifests.get(article_id)
+        if manifest is None:
+            manifest = {file['name']: file for file in self.list_files(article_id)}
+            with self._manifests_lock:
+                manifest = self._file_manifests.setdefault(article_id, manifest)
+        return manifest
+
+    def forget_file_manifest(self, article_id=None):
+        """
+        Drop cached file manifests, so that the next upload lists the article's files from figshare again.
+        :param article_id: Integer of a Figshare article id. If None, drop every manifest.
+        :return:
+        """
+        with self._manifests_lock:
+            if article_id is None:
+                self._file_manifests.clear()
+            else:
+                self._file_manifests.pop(article_id, None)
+
+    def _record_upload(self, article_id, name, file_info):
+        """Add a completed upload to the manifest of its article, if the manifest is cached."""
+        with self._manifests_lock:
+            manifest = self._file_manifests.get(article_id)
+            if manifest is not None:
+                manifest[name] = file_info
+
+    def _discard_upload(self, article_id, name, file_info):
+        """Delete a file whose upload can not be completed, and remove it from the manifest of its article."""
+        endpoint = 'account/articles/{article_id}/files/{file_id}'.format(article_id=article_id,
+                                                                         file_id=file_info['id'])
+        try:
+            issue_request(method='DELETE', endpoint=endpoint, token=self.token)
+        except HTTPError as err:
+            # Already gone.
+            if err.response is None or err.response.status_code != 404:
+                raise
+        with self._manifests_lock:
+            manifest = self._file_manifests.get(article_id)
+            if manifest is not None:
+                manifest.pop(name, None)
+
+    def upload_file(self, article_id, file_name, resume=True):
+        """
+        Upload a local file to an article. Progress is journalled on local disk, so if a previous call for the same
+        file and article was interrupted, the upload is resumed and only the missing parts are sent.
+        :param article_id: Integer of a Figshare article id.
+        :param file_name: Local path to the file.
+        :param resume: If False, the journal of any previous attempt is discarded and the upload starts afresh.
+        :return:
+        """
 
-        file_info = initiate_new_upload(article_id=article_id, file_name=file_name, token=self.token)
-        upload_parts(file_name=file_name, file_info=file_info, token=self.token)
-        complete_upload(article_id=article_id, file_id=file_info['id'], token=self.token)
+        try:
+            return self._upload_file(article_id, file_name, resume)
+        except FileExistsError:
+            raise
+        except Exception:
+            # The article's files on figshare may no longer match the cached manifest.
+            self.forget_file_manifest(article_id)
+            raise
+
+    def _upload_file(self, article_id, file_name, resume):
+
+        journal = UploadJournal.for_file(article_id, file_name)
+        entry = journal.load(file_name) if resume else None
+
+        if entry is not None:
+            # The file was already initiated by an earlier attempt, and so appears in the article's file list.
+            file_info = entry['file_info']
+            if config.verbose:
+                print('Resuming upload of file: {id}'.format(id=file_info['id']))
+            try:
+                upload_parts(file_name=file_name, file_info=file_info, token=self.token, journal=journal)
+            except HTTPError as err:
+                # If figshare no longer knows the upload, start again from the beginning. The file the earlier attempt
+                # initiated is deleted first, as it would otherwise be taken for a duplicate of the new upload.
+                if err.response is None or err.response.status_code not in [404, 410]:
+                    raise
+                self._discard_upload(article_id, file_name.split('/')[-1], file_info)
+                journal.delete()
+                return self._upload_file(article_id, file_name, resume=False)
+            complete_upload(article_id=article_id, file_id=file_info['id'], token=self.token, journal=journal)
+            self._record_upload(article_id, file_name.split('/')[-1], file_info)
+            return
+
+        name = file_name.split('/')[-1]
+        if name in self.file_manifest(article_id):
+            raise FileExistsError('File already exists in article: {article_id}, with name: {name}'.format(
+                article_id=article_id, name=name))
+
+        file_info = initiate_new_upload(article_id=article_id, file_name=file_name, token=self.token, journal=journal)
+        upload_parts(file_name=file_name, file_info=file_info, token=self.token, journal=journal)
+        complete_upload(article_id=article_id, file_id=file_info['id'], token=self.token, journal=journal)
+        self._record_upload(article_id, file_name.split('/')[-1], file_info)
 
     @staticmethod
     def download_file(url, local_filename, token):
 
-        header = {'Authorization': 'token ' + token}
-        r = requests.get(url=url, stream=True, headers=header)
-        if r.status_code == 200:
-            with open(local_filename, 'wb') as f:
-                for chunk in r.iter_content(1048576):
-                    f.write(chunk)
+        # Delegate to the request layer so the download shares the pooled session.
+        return download_file(url=url, local_filename=local_filename, token=token)
 
     @staticmethod
-    def stream_file(url, token):
+    def stream_file(url, token, lazy=False):
+        """
+        Download a file into memory, or open it as a lazy stream.
+        :param url: Download url of the file.
+        :param token: Authentication token.
+        :param lazy: If True, return a readable, seekable binary stream that reads from the download as it is consumed
+                     instead of loading the whole file. Close it when done.
+        :return: bytes of the file (or a stream if lazy), None if the download was unsuccessful.
+        """
+        if lazy:
+            return open_stream(url, token)
 
         header = {'Authorization': 'token ' + token}
-        r = requests.get(url=url, stream=True, headers=header)
-        if r.status_code == 200:
-            return r.content
+        with get_session().get(url=url, stream=True, headers=header) as r:
+            if r.status_code == 200:
+                return r.content
 
-    def stream_article(self, article_id, article_file=0):
+    def stream_article(self, article_id, article_file=0, lazy=False):
         """
         Download a file associated with an figshare article, but hold it in memory in the form of a IO byte stream.
         :param article_id: int. figshare article id
+        :param article_file: int. index of the file within the article.
+        :param lazy: bool. If True the file is returned as a lazy, seekable stream, see stream_file.
         :return: tuple. (string, bytes) -> (file name, byte stream of file)
         """
 
@@ -488,7 +776,7 @@ class Projects:
         file_name = files[article_file]['name']
         download_url = files[article_file]['download_url']
 
-        file_stream = self.stream_file(download_url, self.token)
+        file_stream = self.stream_file(download_url, self.token, lazy=lazy)
 
         return file_name, file_stream
 
@@ -512,6 +800,8 @@ class Projects:
                                                                                 article_id=article_id)
         try:
             issue_request(method='DELETE', endpoint=endpoint, token=self.token)
+            self._forget_article(project_id, article_id)
+            self.forget_file_manifest(article_id)
             return ''
         except HTTPError as err:
             err_resp = err.response
@@ -519,3 +809,81 @@ class Projects:
             err_msg = err_resp.text
             return err_msg
 
+    def _forget_article(self, project_id, article_id):
+        """
+        Remove a deleted article from the title index of its project, if the index is seeded.
+        """
+        titles = self._article_titles.get(project_id)
+        if titles is not None:
+            titles.remove(article_id)
+
+    def bulk_create_articles(self, project_id, articles_data, workers=None, rate=None):
+        """
+        Create many articles in a project concurrently, as create_article.
+        The titles are checked against the project's title index, so a title is also refused if an earlier article
+        of the same batch already took it.
+        :param project_id: int. figshare project id number.
+        :param articles_data: list of dictionaries of article metadata.
+        :param workers: int. Maximum number of articles created at once. Defaults to config.bulk_workers.
+        :param rate: float. Maximum requests per second across the batch. Defaults to config.bulk_rate.
+        :return: list of dictionaries with keys 'item', 'result' (the new article id) and 'error', see run_bulk.
+        """
+        # Seed the index before the workers start, rather than in whichever of them gets there first.
+        self.article_titles(project_id)
+
+        def create(article_data):
+            return self.create_article(project_id, article_data)
+
+        return run_bulk(create, articles_data, workers=workers, rate=rate)
+
+    def bulk_update_articles(self, updates, workers=None, rate=None):
+        """
+        Update the metadata of many articles concurrently, as update_article.
+        :param updates: list of (article_id, article_data) tuples.
+        :param workers: int. Maximum number of articles updated at once. Defaults to config.bulk_workers.
+        :param rate: float. Maximum requests per second across the batch. Defaults to config.bulk_rate.
+        :return: list of dictionaries with keys 'item', 'result' and 'error', see run_bulk.
+        """
+        def update(item):
+            article_id, article_data = item
+            result = self.update_article(self.token, article_id, article_data)
+            if 'title' in article_data:
+                # Keep any title index holding the article up to date with its new title.
+                for titles in list(self._article_titles.values()):
+                    titles.rename(article_id, article_data['title'])
+            return result
+
+        return run_bulk(update, updates, workers=workers, rate=rate)
+
+    def bulk_publish_articles(self, article_ids, workers=None, rate=None):
+        """
+        Publish many articles concurrently, as publish_article.
+        :param article_ids: list of figshare article id numbers.
+        :param workers: int. Maximum number of articles published at once. Defaults to config.bulk_workers.
+        :param rate: float. Maximum requests per second across the batch. Defaults to config.bulk_rate.
+        :return: list of dictionaries with keys 'item', 'result' and 'error', see run_bulk.
+        """
+        def publish(article_id):
+            return self.publish_article(self.token, article_id)
+
+        return run_bulk(publish, article_ids, workers=workers, rate=rate)
+
+    def bulk_delete_articles(self, project_id, article_ids, workers=None, rate=None):
+        """
+        Delete many articles from a project concurrently, as article_delete. Unlike article_delete, a failed deletion
+        is reported as the HTTPError it raised.
+        :param project_id: int. figshare project id number.
+        :param article_ids: list of figshare article id numbers.
+        :param workers: int. Maximum number of articles deleted at once. Defaults to config.bulk_workers.
+        :param rate: float. Maximum requests per second across the batch. Defaults to config.bulk_rate.
+        :return: list of dictionaries with keys 'item', 'result' and 'error', see run_bulk.
+        """
+        def delete(article_id):
+            endpoint = 'account/projects/{project_id}/articles/{article_id}'.format(project_id=project_id,
+                                                                                    article_id=article_id)
+            result = issue_request(method='DELETE', endpoint=endpoint, token=self.token)
+            self._forget_article(project_id, article_id)
+            self.forget_file_manifest(article_id)
+            return result
+
+        return run_bulk(delete, article_ids, workers=workers, rate=rate)
@@ -53,14 +53,19 @@
 """
 
 from __future__ import division
-from struct import unpack
+from struct import unpack_from, calcsize
+from functools import partial
 import datetime
 from pylab import *
+import mmap
 import os.path
 import numpy as np
 
 DEBUG = False
 
+# Data type of the raw data block: little-endian 32 bits integers
+RAW_DTYPE = np.dtype('<i4')
+
 
 class Error(Exception):
     """Base class for exceptions in this module. """
@@ -99,19 +104,86 @@ class DataArray:
        Info is a python dictionary to store physical information on the data.
     """
     def __init__(self, data, info):
-        self.data = data # is a numpy matrix
+        self.data = data # is a numpy matrix, or a function computing it
         self.info = info.copy() # a simple dictionary
 
+    @property
+    def data(self):
+        """The data, computed on first access if it was given as a function."""
+        if callable(self._data):
+            self._data = self._data()
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
+
+class PhysicalView:
+    """Raw data of a flat file, left in place in the file's buffer and
+       converted to physical units only where it is read. Indexing returns
+       the physical values of the selected elements, and numpy.asarray()
+       those of the whole view.
+    """
+    def __init__(self, raw, transferFunction):
+        self.raw = raw # a numpy view of the raw integers
+        self.transferFunction = transferFunction
+
+    @property
+    def shape(self):
+        return self.raw.shape
+
+    @property
+    def ndim(self):
+        return self.raw.ndim
+
+    @property
+    def size(self):
+        return self.raw.size
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __getitem__(self, key):
+        return self.transferFunction(self.raw[key])
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.transferFunction(self.raw)
+        return data if dtype is None else data.astype(dtype)
+
 
 class FlatFile():
     """ The FlatFile class is able to parse the
         Omicron Flat File Format.
     """
 
-    def __init__(self, filename):
-        """ \arg filename should be a valid path to a omicron flat file."""
+    def __init__(self, filename, memmap=False, lazy=False, headerOnly=False, name=None):
+        """ \arg filename should be a valid path to a omicron flat file, or
+            its content: bytes, bytearray, memoryview, mmap or any object
+            supporting the buffer protocol, or a readable binary stream.
+            Paths and open files are memory-mapped, and the file is parsed
+            through a memoryview of it, so the input is never copied.
+            \arg memmap if True, the raw data is left in the file's buffer,
+            and every DataArray holds a PhysicalView of it. Nothing is
+            copied, so files larger than the memory can be opened.
+            \arg lazy if True, the raw data is left in the buffer too, but the
+            data of each DataArray is read and converted in full the first
+            time it is accessed. Until then only the header has been read.
+            In memmap and lazy mode the input stays open until close() is
+            called, or the with block using the FlatFile is left.
+            \arg headerOnly if True, the data block is skipped and only the
+            info is built. No DataArray is created.
+            \arg name of the file given in the info. Defaults to filename
+            if it is a path.
+        """
 
-        self.filename = filename
+        self.source = filename
+        if name is None and isinstance(filename, (str, os.PathLike)):
+            name = filename
+        self.filename = name
+        self.memmap = memmap
+        self.lazy = lazy
+        self.headerOnly = headerOnly
         self.data = []  # List containing data of DataArray type
 
         # Define the keys in dictionary since they are version dependant
@@ -144,19 +216,49 @@ class FlatFile():
             based on the file structure.
         """
 
-        # Open and read with binary flag
-        self.file = open(os.path.normpath(self.filename), 'rb')
+        self._openInput()
+        try:
+            self._readFile()
+        except BaseException:
+            self.rawData = None
+            self._closeInput()
+            raise
+        # Data left raw in memmap or lazy mode keeps the input open until
+        # close() is called
+        if self.headerOnly or not (self.memmap or self.lazy):
+            self._closeInput()
+
+        # The info shared by all of the DataArrays of the file.
+        self.info = self._buildInfo()
+        if self.headerOnly:
+            return
+
+        # Deal with the real stuff, try to reconstruct the real data shape from
+        # the raw data.
+        self._reshapeData()
+
+        # Data still in raw integers is only converted when it is read.
+        for dataArray in self.data:
+            if dataArray.data.dtype == RAW_DTYPE:
+                if self.memmap:
+                    dataArray.data = PhysicalView(dataArray.data, self.transferFunction)
+                else:
+                    dataArray.data = partial(self.transferFunction, dataArray.data)
+
+
+    def _readFile(self):
+        """ Read the header, data block and trailer of the open input. """
 
         #
         # Check Magic word and version
         #
 
         # Looking for magic word.
-        self.magic_word = unpack('<4s', self.file.read(4))[0]
+        self.magic_word = self._unpack('<4s')[0]
         if b'FLAT' != self.magic_word:
             raise UnhandledFileError('Magic word: %s is not FLAT'.format(self.magic_word))
         # Looking for file version.
-        self.version = unpack('<4s', self.file.read(4))[0]
+        self.version = self._unpack('<4s')[0]
         if b'0100' != self.version:
             raise UnhandledDataType('Vernissage version: %s is not 0100'.format(self.version))
 
@@ -256,6 +358,7 @@ class FlatFile():
             paramerterName = self._readString()
             parameters[paramerterName] = self._readDouble()
 
+        # The transfer functions are applied to the whole raw data array at once.
         if 'TFF_Linear1D' == transferFunctionName :
             transferFunction = lambda z: ( z - parameters['Offset'] ) / parameters['Factor']
         elif 'TFF_MultiLinear1D' == transferFunctionName :
@@ -284,7 +387,7 @@ class FlatFile():
         #
         self.creationInformation = {}
 
-        self.creationInformation['timestamp'] = unpack( '<q', self.file.read(8) )[0]
+        self.creationInformation['timestamp'] = self._unpack( '<q' )[0]
         self.creationInformation['date'] = datetime.datetime.fromtimestamp( float(self.creationInformation['timestamp']) ).isoformat(' ')
         self.creationInformation['comment'] = self._readString() ## Added by TGG
 
@@ -299,14 +402,20 @@ class FlatFile():
         # Actual number of data elements measured
         self.dataItemSize = self._readInt()
 
-        # Raw data array
-        self.rawData = []
-
-        for i in range(self.dataItemSize) :
-            self.rawData.append( transferFunction(self._readInt()) )
+        # Raw data array of little-endian 32 bits integers, a view of the
+        # buffer, decoded in bulk unless it is to stay raw
+        self.transferFunction = transferFunction
+        if self.headerOnly:
+            # Jump over the data block to the trailer
+            self.rawData = None
+            self._skip(4 * self.dataItemSize)
+        else:
+            dataOffset = self._advance(4 * self.dataItemSize)
+            self.rawData = np.frombuffer(self.buffer, dtype=RAW_DTYPE, count=self.dataItemSize, offset=dataOffset)
+            if not (self.memmap or self.lazy):
+                self.rawData = transferFunction(self.rawData)
         # The void pixels will be automatically filled with 0
-        # when using array.resize() with a bigger size than its actual size
-        # This is done in self.reshapeData()
+        # by self._rawBlock() when the data is reshaped
 
         #
         # Sample position information
@@ -414,41 +523,163 @@ class FlatFile():
 
                  self.experimentDeployement[instanceName][self._readString()] = self._readString()
 
-        assert self.file.read() == b'', 'There are still some unknown information at the end of the file %s '.format(self.filename)
+        if self.stream is None:
+            atEnd = self.position == len(self.buffer)
+        else:
+            atEnd = self.stream.read(1) == b''
+        assert atEnd, 'There are still some unknown information at the end of the file {name}'.format(name=self.filename)
 
-        self.file.close()
-        self.file = None # Explicitly delete the file object
 
-        # Deal with the real stuff, try to reconstruct the real data shape from
-        # the raw data.
-        self._reshapeData()
+    def close(self):
+        """ Release the input of a file opened in memmap or lazy mode. The
+            data of the DataArrays still left raw in the input is dropped, as
+            it can not be read any more.
+        """
+
+        if self.memmap or self.lazy:
+            for dataArray in self.data:
+                if isinstance(dataArray._data, (PhysicalView, partial)):
+                    dataArray.data = None
+            self.rawData = None
+        self._closeInput()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+    def _openInput(self):
+        """ Open the input for reading. Every value is read through a cursor
+            over a memoryview of the whole file, without copying it. Paths
+            and files read from their start are memory-mapped, other streams
+            are read once. A header-only scan of a path or stream reads the
+            header and trailer straight from the file instead, and skips over
+            the data block without keeping it.
+        """
+
+        source = self.source
+        self.buffer = None
+        self.position = 0
+        self.stream = None
+        self._ownStream = False
+        self._mapping = None
+
+        if isinstance(source, (str, os.PathLike)):
+            fin = open(os.path.normpath(source), 'rb')
+            if self.headerOnly:
+                self.stream = fin
+                self._ownStream = True
+                return
+            with fin:
+                self._mapFile(fin)
+        elif hasattr(source, 'read'):
+            if self.headerOnly:
+                self.stream = source
+            else:
+                self._mapFile(source)
+        else:
+            self.buffer = memoryview(source).cast('B')
+
+    def _mapFile(self, fin):
+        """ Map an open file in memory, or read it if it can not be mapped. """
+
+        try:
+            if fin.seekable() and fin.tell() == 0:
+                self._mapping = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # Not a real file, or an empty one
+            pass
+        if self._mapping is None:
+            self.buffer = memoryview(fin.read())
+        else:
+            self.buffer = memoryview(self._mapping)
+
+    def _closeInput(self):
+        """ Release the memoryview of the input, and close the mapping and
+            the file opened by the parser. The input given by the caller is
+            left open.
+        """
+
+        if isinstance(self.buffer, memoryview):
+            self.buffer.release()
+        self.buffer = None
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+        if self._ownStream:
+            self.stream.close()
+            self._ownStream = False
+        self.stream = None
+
+
+    def _advance( self, size ) :
+        """Move the cursor over the next size bytes and return their offset """
+
+        if self.stream is not None:
+            # Only the next value is held when reading from a stream
+            self.buffer = self.stream.read(size)
+            if len(self.buffer) < size:
+                raise UnhandledFileError('The file {name} is truncated.'.format(name=self.filename or '<buffer>'))
+            return 0
+
+        offset = self.position
+        if offset + size > len(self.buffer):
+            raise UnhandledFileError('The file {name} is truncated.'.format(name=self.filename or '<buffer>'))
+        self.position = offset + size
+        return offset
+
+
+    def _skip( self, size ) :
+        """Move the cursor over the next size bytes without reading them """
+
+        if self.stream is None:
+            self._advance(size)
+        elif self.stream.seekable():
+            self.stream.seek(size, os.SEEK_CUR)
+        else:
+            # Read and drop the bytes a chunk at a time
+            while size > 0:
+                chunk = self.stream.read(min(size, 65536))
+                if not chunk:
+                    raise UnhandledFileError('The file {name} is truncated.'.format(name=self.filename or '<buffer>'))
+                size -= len(chunk)
+
+
+    def _unpack( self, fmt ) :
+        """Unpack the next values of the given struct format """
+
+        offset = self._advance(calcsize(fmt))
+        return unpack_from(fmt, self.buffer, offset)
 
 
     def _readString( self ) :
         """Read a Omicron string in the open file. The string are stored as UTF-16 characters preceded with an integer corresponding to the length of the string """
 
-        length = unpack( '<i', self.file.read(4) )[0]
+        length = self._readInt()
         if length:
-            return str(self.file.read(2 * length), encoding='utf16', errors='replace') # 16 bits unicode character
+            offset = self._advance(2 * length)
+            return str(self.buffer[offset:offset + 2 * length], encoding='utf16', errors='replace') # 16 bits unicode character
         else:
             return None
 
 
     def _readInt( self ) :
-        """Unpack an integer from the bytestream """
+        """Unpack an integer from the buffer """
 
-        return unpack( '<i', self.file.read(4) )[0]
+        return self._unpack( '<i' )[0]
 
 
     def _readDouble( self ) :
-        """Unpack a double from the bytestream """
+        """Unpack a double from the buffer """
 
-        return unpack( '<d', self.file.read(8) )[0]
-
-    def _reshapeData(self):
-        """Create a data dictionary from the rawData according to the file parameters """
+        return self._unpack( '<d' )[0]
 
-        self.rawData = np.array(self.rawData) # Convert data list to a numpy array
+    def _buildInfo(self):
+        """Create the info dictionary of the file from its header. It is the
+           info of every DataArray, apart from the direction.
+        """
 
         # common info for all type of files
         info = {'filename' : self.filename,
@@ -481,7 +712,81 @@ class FlatFile():
                 'unitxy' : 'nm',
                 })
 
-            self.rawData.resize( sizeY*(self.axis[self.axis_keys['Y']]['mirrored']+1), sizeX*(self.axis[self.axis_keys['X']]['mirrored']+1) )
+        elif self.isVPointSpectroscopy():
+
+            sizeV = self.axis[self.axis_keys['V']]['clockCount']/(self.axis[self.axis_keys['V']]['mirrored']+1)
+
+            info.update({
+                'type' : 'ivcurve',
+                'vres' : sizeV,
+                'vstart' : self.axis[self.axis_keys['V']]['startValuePhysical'],
+                'vinc' : self.axis[self.axis_keys['V']]['incrementPhysical'],
+                'vreal' : sizeV * self.axis[self.axis_keys['V']]['incrementPhysical'],
+                'unitv' : self.axis[self.axis_keys['V']]['unit'],
+                })
+
+        elif self.isZPointSpectroscopy():
+            # FIXME Implement izcurve
+            pass
+
+        elif self.isGridSpectroscopy():
+
+            infoX = self.axis[self.axis_keys['V']]['tableSets'][self.axis_keys['X']][0]
+            infoY = self.axis[self.axis_keys['V']]['tableSets'][self.axis_keys['Y']][0]
+
+            # this are already the sizes of the sub-images
+            # i.e we do not need to divide them for mirrored images
+            sizeX = (infoX['stop']-infoX['start'])//infoX['step']+1
+            sizeY = (infoY['stop']-infoY['start'])//infoY['step']+1
+
+            mirroredV = self.axis[self.axis_keys['V']]['mirrored']
+            sizeV = self.axis[self.axis_keys['V']]['clockCount']/(mirroredV+1)
+
+            # Find out if I(V) are measured on bwd and fwd scan (==mirrored)
+            mirroredX = len(self.axis[self.axis_keys['V']]['tableSets'][self.axis_keys['X']])==2
+            mirroredY = len(self.axis[self.axis_keys['V']]['tableSets'][self.axis_keys['Y']])==2
+
+            # If I(V) are measured on bwd and fwd, the axis should be mirrored
+            if ( mirroredX and not self.axis[self.axis_keys['X']]['mirrored'] ) or ( mirroredY and not self.axis[self.axis_keys['Y']]['mirrored']):
+                raise UnhandledDataType("The file %s has an unknown structure".format(self.filename))
+
+            info.update({
+                'type' : 'ivmap',
+                'xres' : sizeX,
+                'yres' : sizeY,
+                'xinc' : self.axis[self.axis_keys['X']]['incrementPhysical'] * 1e9,
+                'yinc' : self.axis[self.axis_keys['Y']]['incrementPhysical'] * 1e9,
+                'xreal' : self.axis[self.axis_keys['X']]['incrementPhysical'] * sizeX * 1e9,
+                'yreal' : self.axis[self.axis_keys['Y']]['incrementPhysical'] * sizeY * 1e9,
+                'unitxy' : 'nm',
+                'vres' : sizeV,
+                'vstart' : self.axis[self.axis_keys['V']]['startValuePhysical'],
+                'vinc' : self.axis[self.axis_keys['V']]['incrementPhysical'],
+                'vreal' : sizeV * self.axis[self.axis_keys['V']]['incrementPhysical'],
+                'unitv' : self.axis[self.axis_keys['V']]['unit'],
+            })
+        else :
+            if DEBUG:
+                print(self.axis)
+            raise UnhandledDataType("The data file %s has an unhandled type.",format(self.filename))
+
+        return info
+
+    def _reshapeData(self):
+        """Create a data dictionary from the rawData according to the file parameters """
+
+        self.rawData = np.asanyarray(self.rawData) # Already a numpy array, so no copy is made
+
+        info = self.info.copy()
+
+        if self.isTopography():
+
+            sizeX = info['xres']
+            sizeY = info['yres']
+
+            rows = sizeY*(self.axis[self.axis_keys['Y']]['mirrored']+1)
+            cols = sizeX*(self.axis[self.axis_keys['X']]['mirrored']+1)
+            self.rawData = self._rawBlock(rows*cols).reshape(rows, cols)
 
             # Both axis are mirrored
             # 4 images : up-fwd, up-bwd, down-fwd, down-bwd
@@ -520,16 +825,7 @@ class FlatFile():
 
         elif self.isVPointSpectroscopy():
 
-            sizeV = self.axis[self.axis_keys['V']]['clockCount']/(self.axis[self.axis_keys['V']]['mirrored']+1)
-
-            info.update({
-                'type' : 'ivcurve',
-                'vres' : sizeV,
-                'vstart' : self.axis[self.axis_keys['V']]['startValuePhysical'],
-                'vinc' : self.axis[self.axis_keys['V']]['incrementPhysical'],
-                'vreal' : sizeV * self.axis[self.axis_keys['V']]['incrementPhysical'],
-                'unitv' : self.axis[self.axis_keys['V']]['unit'],
-                })
+            sizeV = info['vres']
 
             info['direction'] = 'fwd'
             self.data.append(DataArray(self.rawData[:int(sizeV)], info))
@@ -546,57 +842,33 @@ class FlatFile():
 
         elif self.isGridSpectroscopy():
 
-            infoX = self.axis[self.axis_keys['V']]['tableSets'][self.axis_keys['X']][0]
-            infoY = self.axis[self.axis_keys['V']]['tableSets'][self.axis_keys['Y']][0]
-
-            # this are already the sizes of the sub-images
-            # i.e we do not need to divide them for mirrored images
-            sizeX = (infoX['stop']-infoX['start'])//infoX['step']+1
-            sizeY = (infoY['stop']-infoY['start'])//infoY['step']+1
+            sizeX = info['xres']
+            sizeY = info['yres']
+            sizeV = info['vres']
 
             mirroredV = self.axis[self.axis_keys['V']]['mirrored']
-            sizeV = self.axis[self.axis_keys['V']]['clockCount']/(mirroredV+1)
-
-            # Find out if I(V) are measured on bwd and fwd scan (==mirrored)
             mirroredX = len(self.axis[self.axis_keys['V']]['tableSets'][self.axis_keys['X']])==2
             mirroredY = len(self.axis[self.axis_keys['V']]['tableSets'][self.axis_keys['Y']])==2
 
-            # If I(V) are measured on bwd and fwd, the axis should be mirrored
-            if ( mirroredX and not self.axis[self.axis_keys['X']]['mirrored'] ) or ( mirroredY and not self.axis[self.axis_keys['Y']]['mirrored']):
-                raise UnhandledDataType("The file %s has an unknown structure".format(self.filename))
-
-            info.update({
-                'type' : 'ivmap',
-                'xres' : sizeX,
-                'yres' : sizeY,
-                'xinc' : self.axis[self.axis_keys['X']]['incrementPhysical'] * 1e9,
-                'yinc' : self.axis[self.axis_keys['Y']]['incrementPhysical'] * 1e9,
-                'xreal' : self.axis[self.axis_keys['X']]['incrementPhysical'] * sizeX * 1e9,
-                'yreal' : self.axis[self.axis_keys['Y']]['incrementPhysical'] * sizeY * 1e9,
-                'unitxy' : 'nm',
-                'vres' : sizeV,
-                'vstart' : self.axis[self.axis_keys['V']]['startValuePhysical'],
-                'vinc' : self.axis[self.axis_keys['V']]['incrementPhysical'],
-                'vreal' : sizeV * self.axis[self.axis_keys['V']]['incrementPhysical'],
-                'unitv' : self.axis[self.axis_keys['V']]['unit'],
-            })
-            dataTemp = np.copy(self.rawData) # FIXME copy() .... this has huge memory impact
-            dataTemp.resize( sizeX*(mirroredX+1)*sizeY*(mirroredY+1),
-                             sizeV*(mirroredV+1) ) # each line is a spect. curve
+            # Every curve, and every direction below, is a view of the raw data. No copy is made.
+            nV = int(sizeV)
+            dataTemp = self._rawBlock(sizeX*(mirroredX+1)*sizeY*(mirroredY+1)*nV*(mirroredV+1))
+            dataTemp = dataTemp.reshape(sizeX*(mirroredX+1)*sizeY*(mirroredY+1),
+                                        nV*(mirroredV+1)) # each line is a spect. curve
             dataTemp = np.transpose(dataTemp) # each column is a spectroscopy curve
 
             # Cut Matrix in two if data are mirrored
             if mirroredV:
-                dataTempMirrored = np.copy(dataTemp[:sizeV-1:-1,:]) # Reverse order of mirrored data
-                dataTemp = np.copy(dataTemp[:sizeV,:])
+                dataTempMirrored = dataTemp[:nV-1:-1,:] # Reverse order of mirrored data
+                dataTemp = dataTemp[:nV,:]
 
-            dataTemp = np.resize(dataTemp, (sizeV,
-                             sizeY*(mirroredY+1),
-                             sizeX*(mirroredX+1))) # slices,cols,rows : 3D view
-            if mirroredV:
-                dataTempMirrored.resize(sizeV,
+            dataTemp = dataTemp.reshape(nV,
                                         sizeY*(mirroredY+1),
-                                        sizeX*(mirroredX+1))     # slices,cols,rows : 3D view
+                                        sizeX*(mirroredX+1)) # slices,cols,rows : 3D view
+            if mirroredV:
+                dataTempMirrored = dataTempMirrored.reshape(nV,
+                                                            sizeY*(mirroredY+1),
+                                                            sizeX*(mirroredX+1))     # slices,cols,rows : 3D view
 
             self.data = []
 
@@ -668,10 +940,22 @@ class FlatFile():
                     info['direction'] = 'up-fwd mirrored'
                     self.data.append(DataArray(dataTempMirrored, info))
 
-        else :
-            if DEBUG:
-                print(self.axis)
-            raise UnhandledDataType("The data file %s has an unhandled type.",format(self.filename))
+    def _rawBlock(self, size):
+        """Return the first size elements of the raw data. If the measurement
+           was interrupted, the void pixels are filled with 0.
+        """
+
+        if self.rawData.size >= size:
+            return self.rawData[:size]
+        if self.rawData.flags.owndata:
+            self.rawData.resize(size) # Grows in place, filling with 0
+            return self.rawData
+        # Raw data that is not held in memory, or not yet converted, can not
+        # grow, so an incomplete one is converted to physical units and
+        # padded in memory instead.
+        padded = np.zeros(size)
+        padded[:self.rawData.size] = self.transferFunction(self.rawData)
+        return padded
 
     def isTopography(self):
         """ Return True if the file represents a topography image with X and Y axes. """
@@ -712,12 +996,20 @@ class FlatFile():
 
         return self.data
 
-def load(filename):
+def load(filename, memmap=False, lazy=False, name=None):
     """Loader function for further data processing
     Return a list of DataArray object"""
 
-    ff = FlatFile(filename)
+    ff = FlatFile(filename, memmap=memmap, lazy=lazy, name=name)
     return ff.getData()
 
+def scan(filename, name=None):
+    """Read only the header and trailer of a flat file, skipping its data
+    Return the info dictionary, as the DataArray objects of load() have,
+    without the direction"""
+
+    ff = FlatFile(filename, headerOnly=True, name=name)
+    return ff.info
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -0,0 +1,338 @@
+"""
+Asyncio Figshare API Requests.
+
+Non-blocking counterparts of the helpers in figshare_requests, built on aiohttp. Every coroutine on an event loop
+shares one pooled aiohttp.ClientSession, so many calls can be multiplexed over a small set of kept-alive connections.
+Requests are built, and their responses decoded and cached, by the same helpers as the blocking requests, so only the
+I/O is done here and a failed request raises the same requests.exceptions.HTTPError.
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from collections import deque
+import aiohttp
+
+from .. import config
+from .figshare_requests import build_response, finish_request, get_file_check_data, prepare_request, request_url
+from .pagination import Pages
+from .retry import default_retry_policy
+from .metrics import body_size, default_metrics
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+# aiohttp sessions are bound to the loop they were created on, so keep one per running loop.
+_client_sessions = weakref.WeakKeyDictionary()
+
+
+def get_client_session():
+    """
+    Return the shared aiohttp session for the running event loop, creating it on first use.
+    Connection limits follow the [http] config section: config.pool_maxsize connections per host and
+    config.pool_connections * config.pool_maxsize in total.
+    :return: aiohttp.ClientSession.
+    """
+    loop = asyncio.get_running_loop()
+    session = _client_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=config.pool_connections * config.pool_maxsize,
+                                         limit_per_host=config.pool_maxsize)
+        session = aiohttp.ClientSession(connector=connector)
+        _client_sessions[loop] = session
+    return session
+
+
+async def close_client_session():
+    """
+    Close the shared aiohttp session of the running event loop. Call before the loop is shut down.
+    :return:
+    """
+    session = _client_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+"""
+HTTP Requests to Figshare API.
+"""
+
+
+async def raw_issue_request(method, url, data=None, token=None, retry=None, cache=None, params=None):
+    """
+    Construct a HTTP request.
+    :param method: API method, i.e. PUT or GET.
+    :param url: url to API endpoint.
+    :param data: Additional data to be passed to the endpoint.
+    :param token: OAuth token.
+    :param retry: RetryPolicy for transient failures. Defaults to the policy from the config file, False disables it.
+    :param cache: ResponseCache for GET responses. Defaults to the cache from the config file, False disables it.
+    :param params: Dictionary of query string parameters.
+    :return: Response from API.
+    """
+    url, data = request_url(method, url, data, token, params)
+
+    request = prepare_request(method, url, data, token, cache)
+    if 'result' in request:
+        return request['result']
+    headers, data = request['headers'], request['data']
+
+    if retry is None:
+        retry = default_retry_policy()
+
+    metrics = default_metrics()
+
+    attempt = 0
+    while True:
+        if metrics is not None:
+            started = time.perf_counter()
+        # Raise request to API over the shared session.
+        try:
+            async with get_client_session().request(method=method, url=url, headers=headers, data=data) as r:
+                response = build_response(url, r.status, r.reason, r.headers, await r.read())
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+            if metrics is not None:
+                metrics.observe(method, url, None, time.perf_counter() - started, bytes_sent=body_size(data),
+                                retry=attempt > 0)
+            # No response was received. Retry if the method is safe to repeat, otherwise re-raise.
+            if not retry or not retry.should_retry(method, attempt):
+                raise
+            failure, retry_headers = type(error).__name__, None
+        else:
+            if metrics is not None:
+                metrics.observe(method, url, response.status_code, time.perf_counter() - started,
+                                bytes_sent=body_size(data), bytes_received=len(response.content), retry=attempt > 0)
+            if response.ok or not retry or not retry.should_retry(method, attempt, status=response.status_code,
+                                                                  headers=response.headers):
+                break
+            failure, retry_headers = response.status_code, response.headers
+
+        if config.verbose:
+            print('Caught {failure}, retrying {method} {url}'.format(failure=failure, method=method, url=url))
+        await asyncio.sleep(retry.backoff(attempt, headers=retry_headers))
+        attempt += 1
+
+    # Failures raise the same HTTPError as the blocking request layer.
+    return finish_request(method, url, request, response)
+
+
+async def issue_request(method, endpoint, *args, **kwargs):
+    """
+    Used to contruct raw issue requests from a base url and target endpoint.
+    :param method: API request method.
+    :param endpoint: target of the API request.
+    :param args: Additional un-named arguments.
+    :param kwargs: Additional named arguments.
+    :return: Decoded data from a successful request.
+    """
+    return await raw_issue_request(method, config.base_url.format(endpoint=endpoint), *args, **kwargs)
+
+
+async def paginate(method, endpoint, token, data=None, page_size=None, page=1, page_max=None, offset=None,
+                   total=None, workers=None, retry=None, prefetch=True):
+    """
+    Iterate over the items of a paged endpoint, as pagination.paginate, with the pages fetched as tasks on the event
+    loop. Closing the generator early, e.g. breaking out of an async for loop, cancels the pages still in flight.
+    See pagination.paginate for the arguments.
+    :return: Asynchronous generator of the items.
+    """
+    pages = Pages(method, data=data, page_size=page_size, page=page, page_max=page_max, offset=offset, total=total)
+    if workers is None:
+        workers = config.pagination_workers
+    if retry is None:
+        retry = default_retry_policy().for_batch()
+
+    def get_page(index):
+        return asyncio.ensure_future(issue_request(method, endpoint, token=token, retry=retry,
+                                                   **pages.request(index)))
+
+    ahead = workers if pages.known else int(bool(prefetch))
+    pending = deque()
+    next_index = 0
+
+    try:
+        index = 0
+        while pages.allowed(index):
+            # Keep up to `ahead` of the known pages in flight.
+            while len(pending) < ahead and next_index < pages.known and pages.allowed(next_index):
+                pending.append(get_page(next_index))
+                next_index += 1
+
+            if pending:
+                result = await pending.popleft()
+            else:
+                result = await get_page(index)
+                next_index = index + 1
+
+            more = pages.more(result, index)
+            if more and ahead and not pending and next_index == index + 1:
+                # Past the known pages only a full page shows there may be another, so fetch just the next one.
+                pending.append(get_page(next_index))
+                next_index += 1
+
+            for item in result:
+                yield item
+
+            if not more:
+                return
+            index += 1
+    finally:
+        # Reached on exhaustion, error, or the caller closing the generator early.
+        for task in pending:
+            task.cancel()
+
+
+async def initiate_new_upload(article_id, file_name, token):
+    """
+    Use to begin a new file upload to figshare API.
+    :param article_id: id number of figshare article file is to be uploaded to.
+    :param file_name: name of file to be stored on figshare.
+    :param token: figshare authentication token.
+    :return: figshare file_info.
+    """
+    endpoint = 'account/articles/{article_id}/files'.format(article_id=article_id)
+
+    # Hashing reads the whole file, so keep it off the event loop.
+    md5, size = await asyncio.get_running_loop().run_in_executor(None, get_file_check_data, file_name)
+
+    # Define data for HTTP request.
+    data = {'name': os.path.basename(file_name),  # Local file path.
+            'md5': md5,  # File md5 encoding.
+            'size': size}  # File size.
+
+    # Issue HTTP request.
+    result = await issue_request('POST', endpoint, data=data, token=token)
+    print('Initiated file upload:', result['location'], '\n')
+
+    # Use returned complete url to get the figshare file_info from API.
+    return await raw_issue_request('GET', result['location'], token=token)
+
+
+async def upload_parts(file_name, file_info, token, workers=None, part_retries=None, retry=None):
+    """
+    Use to upload the parts of the file to the endpoint from the file_info returned by initiate_new_upload().
+    :param file_name: Local path to file to be uploaded.
+    :param file_info: file_info returned from fighsare.
+    :param token: Authentication token.
+    :param workers: Maximum number of parts in flight at once. Defaults to config.upload_workers.
+    :param part_retries: Number of times a failed part is re-sent on its own. Defaults to config.upload_part_retries.
+    :param retry: RetryPolicy used for every part. Defaults to the policy from the config file, False disables it.
+    :return: Dictionary summarising the upload: number of parts, bytes sent, seconds taken and MB/s.
+    """
+    if workers is None:
+        workers = config.upload_workers
+    if part_retries is None:
+        part_retries = config.upload_part_retries
+    if retry is None:
+        retry = default_retry_policy()
+    # Each part may be re-sent part_retries times, with all parts drawing from one budget for the whole file.
+    part_retry = retry.copy(max_retries=part_retries).for_batch() if retry else False
+
+    # Get the figshare file information from the upload url.
+    result = await raw_issue_request('GET', '{upload_url}'.format(**file_info), token=token)
+    parts = result['parts']
+
+    if config.verbose:
+        print('Uploading parts:')
+
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def send(part):
+        async with semaphore:
+            await upload_part(file_name=file_name, file_info=file_info, part=part, token=token, retry=part_retry)
+            return part['endOffset'] - part['startOffset'] + 1
+
+    start_time = time.perf_counter()
+    results = await asyncio.gather(*[send(part) for part in parts], return_exceptions=True)
+    elapsed = time.perf_counter() - start_time
+
+    failed_parts = [(part['partNo'], r) for part, r in zip(parts, results) if isinstance(r, BaseException)]
+    if failed_parts:
+        print('Failed to upload parts: {parts}'.format(parts=[part_no for part_no, _ in failed_parts]))
+        raise failed_parts[0][1]
+
+    total_bytes = sum(results)
+    rate = total_bytes / elapsed / 1e6 if elapsed > 0 else 0.0
+    if config.verbose:
+        print('Uploaded {n} parts, {mb:.1f} MB in {s:.1f} s ({rate:.2f} MB/s)\n'.format(
+            n=len(parts), mb=total_bytes / 1e6, s=elapsed, rate=rate))
+
+    return {'parts': len(parts), 'bytes': total_bytes, 'seconds': elapsed, 'mb_per_s': rate}
+
+
+def _read_part(file_name, part):
+    """Read the byte range of a single part from the local file."""
+    with open(file_name, 'rb') as fin:
+        fin.seek(part['startOffset'])
+        return fin.read(part['endOffset'] - part['startOffset'] + 1)
+
+
+async def upload_part(file_name, file_info, part, token, retry=None):
+    """
+    Upload a single part of a file.
+    :param file_name: Local path to file to be uploaded.
+    :param file_info: figshare file_info.
+    :param part: part dictionary from the upload service.
+    :param token: Authentication token.
+    :param retry: RetryPolicy for the PUT of this part. Defaults to the policy from the config file.
+    :return:
+    """
+    # Copy file info.
+    udata = file_info.copy()
+    udata.update(part)
+    url = '{upload_url}/{partNo}'.format(**udata)
+
+    data = await asyncio.get_running_loop().run_in_executor(None, _read_part, file_name, part)
+
+    await raw_issue_request('PUT', url, data=data, token=token, retry=retry)
+    if config.verbose:
+        print('Upload part {partNo} from {startOffset} to {endOffset}'.format(**part))
+
+
+async def complete_upload(article_id, file_id, token):
+    """
+    Complete upload by posting the relavent information.
+    :param article_id: id number given to article, within project.
+    :param file_id: id number of file, within article.
+    :param token: Authentication token.
+    :return:
+    """
+    endpoint = 'account/articles/{article_id}/files/{file_id}'.format(article_id=article_id, file_id=file_id)
+    await issue_request('POST', endpoint, token=token)
+
+
+async def download_file(url, local_filename, token):
+    """
+    Download a file to disk without blocking the event loop on the network.
+    :param url: Download url of the file.
+    :param local_filename: Local path to write the file to.
+    :param token: Authentication token.
+    :return: HTTP status code of the download.
+    """
+    header = {'Authorization': 'token ' + token}
+    async with get_client_session().get(url, headers=header) as r:
+        if r.status == 200:
+            with open(local_filename, 'wb') as f:
+                async for chunk in r.content.iter_chunked(1048576):
+                    f.write(chunk)
+
+    return r.status
+
+
+async def stream_file(url, token):
+    """
+    Download a file into memory.
+    :param url: Download url of the file.
+    :param token: Authentication token.
+    :return: bytes of the file, or None if the download was unsuccessful.
+    """
+    header = {'Authorization': 'token ' + token}
+    async with get_client_session().get(url, headers=header) as r:
+        if r.status == 200:
+            return await r.read()
@@ -0,0 +1,57 @@
+"""
+Bulk Operations.
+
+Applies one operation to many items, e.g. creating a list of articles, on a bounded pool of threads. All of the
+threads draw their requests from one shared rate limiter. A failing item does not stop the others: the outcome of every
+item is collected into a report instead.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .. import config
+from .rate_limit import RateLimiter, use_rate_limiter
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def run_bulk(function, items, workers=None, rate=None, burst=None):
+    """
+    Call function(item) for every item concurrently.
+    :param function: Operation applied to each item.
+    :param items: Iterable of items.
+    :param workers: Maximum number of items in progress at once. Defaults to config.bulk_workers.
+    :param rate: Maximum requests per second across all workers. Defaults to config.bulk_rate, 0 for no limit.
+    :param burst: Requests that may be sent at once. Defaults to config.bulk_burst.
+    :return: List with one dictionary per item, in the order of the items, with keys 'item', 'result' and 'error'.
+             'error' is the exception the item failed with, or None if it succeeded.
+    """
+    if workers is None:
+        workers = config.bulk_workers
+    if rate is None:
+        rate = config.bulk_rate
+    if burst is None:
+        burst = config.bulk_burst
+
+    limiter = RateLimiter(rate, burst) if rate else None
+
+    def run(item):
+        with use_rate_limiter(limiter):
+            try:
+                return {'item': item, 'result': function(item), 'error': None}
+            except Exception as error:
+                return {'item': item, 'result': None, 'error': error}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        report = list(executor.map(run, items))
+
+    if config.verbose:
+        failed = sum(1 for entry in report if entry['error'] is not None)
+        print('Bulk {name}: {ok} succeeded, {failed} failed.'.format(name=getattr(function, '__name__', 'operation'),
+                                                                     ok=len(report) - failed, failed=failed))
+    return report
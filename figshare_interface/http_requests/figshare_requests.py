@@ -6,11 +6,22 @@ Figshare API Requests.
 
 import hashlib
 import json
+import mmap
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-from requests.exceptions import HTTPError
+from requests.exceptions import HTTPError, RequestException, Timeout
 
 from .. import config
+from .transport import get_session
+from .retry import default_retry_policy
+from .hash_cache import default_hash_cache
+from .response_cache import default_response_cache
+from .single_flight import SingleFlight
+from .metrics import body_size, default_metrics
+from .rate_limit import current_rate_limiter
 
 __author__ = "Tobias Gill"
 __credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
@@ -24,30 +35,154 @@ __status__ = "Development"
 HTTP Requests to Figshare API.
 """
 
+# Identical GETs made at the same time from different threads share one round trip.
+_in_flight = SingleFlight()
 
-def raw_issue_request(method, url, data=None, token=None):
+
+def raw_issue_request(method, url, data=None, token=None, retry=None, cache=None, coalesce=None, params=None):
     """
     Construct a HTTP request.
     :param method: API method, i.e. PUT or GET.
     :param url: url to API endpoiint.
     :param data: Additional data to be passed to the endpoint.
     :param token: OAuth token.
+    :param retry: RetryPolicy for transient failures. Defaults to the policy from the config file, False disables it.
+    :param cache: ResponseCache for GET responses. Defaults to the cache from the config file, False disables it.
+    :param coalesce: If True, a GET identical to one already in flight waits for and shares its result. Defaults to
+                     config.coalesce_requests.
+    :param params: Dictionary of query string parameters.
     :return: Response from API.
     """
+    url, data = request_url(method, url, data, token, params)
+
+    if coalesce is None:
+        coalesce = config.coalesce_requests
+    if coalesce and method in ('GET', 'HEAD'):
+        return _in_flight.do(SingleFlight.key(method, url, data, token), raw_issue_request, method, url, data=data,
+                             token=token, retry=retry, cache=cache, coalesce=False)
+
+    request = prepare_request(method, url, data, token, cache)
+    if 'result' in request:
+        return request['result']
+    headers, data = request['headers'], request['data']
+
+    if retry is None:
+        retry = default_retry_policy()
+
+    metrics = default_metrics()
+    limiter = current_rate_limiter()
+
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        if metrics is not None:
+            started = time.perf_counter()
+        # Raise request to API over the shared, kept-alive session.
+        try:
+            response = get_session().request(method=method, url=url, headers=headers, data=data)
+        except (requests.exceptions.ConnectionError, Timeout) as error:
+            if metrics is not None:
+                metrics.observe(method, url, None, time.perf_counter() - started, bytes_sent=body_size(data),
+                                retry=attempt > 0)
+            # No response was received. Retry if the method is safe to repeat, otherwise re-raise.
+            if not retry or not retry.should_retry(method, attempt):
+                raise
+            failure, retry_headers = type(error).__name__, None
+        else:
+            if metrics is not None:
+                metrics.observe(method, url, response.status_code, time.perf_counter() - started,
+                                bytes_sent=body_size(data), bytes_received=len(response.content), retry=attempt > 0)
+            if response.ok or not retry or not retry.should_retry(method, attempt, status=response.status_code,
+                                                                  headers=response.headers):
+                break
+            failure, retry_headers = response.status_code, response.headers
+
+        if config.verbose:
+            print('Caught {failure}, retrying {method} {url}'.format(failure=failure, method=method, url=url))
+        retry.sleep(attempt, headers=retry_headers)
+        attempt += 1
+
+    return finish_request(method, url, request, response)
+
+
+def request_url(method, url, data=None, token=None, params=None):
+    """
+    Check a request can be sent, and build its url.
+    :param method: API request method.
+    :param url: url to API endpoint.
+    :param data: Data to be passed with the request.
+    :param token: OAuth token.
+    :param params: Dictionary of query string parameters.
+    :return: Tuple of the url and the data left to send in the body, as query_url.
+    """
     # Check to see if a token has been given.
     if token is None:
         raise ValueError('No authentication token has been provided.')
 
+    # A GET has no body, so any data given as a dictionary is sent as query string parameters instead.
+    return query_url(method, url, data, params)
+
+
+def prepare_request(method, url, data=None, token=None, cache=None):
+    """
+    Build the headers and body of a request, and look it up in the response cache. The asyncio request layer shares
+    this, and finish_request, with raw_issue_request, so the two only differ in how the request is sent.
+    :param method: API request method.
+    :param url: url to API endpoint, from request_url.
+    :param data: Data to be passed with the request, from request_url.
+    :param token: OAuth token.
+    :param cache: ResponseCache for GET responses. Defaults to the cache from the config file, False disables it.
+    :return: Dictionary of the 'headers' and 'data' to send, and the cache state for finish_request. If the cache
+             holds a fresh response it is under 'result', and nothing needs to be sent.
+    """
     # Format authentication header.
     headers = {'Authorization': 'token ' + token}
 
+    if cache is None:
+        cache = default_response_cache()
+    request = {'headers': headers, 'cache': cache, 'cache_key': None, 'cached': None}
+
+    # Answer cacheable GETs from the cache while fresh, and revalidate them with their ETag once stale.
+    if cache and method == 'GET' and cache.ttl(url) is not None:
+        request['cache_key'] = cache.key(url, data, token)
+        cached = request['cached'] = cache.lookup(request['cache_key'])
+        if cached is not None:
+            cached_data, fresh, etag = cached
+            if fresh:
+                request['result'] = cached_data
+                return request
+            if etag is not None:
+                headers['If-None-Match'] = etag
+
     # If there is data to be passed with the request convert it to json format, if it is not already bytes.
+    # Other bytes-like buffers, such as memoryview slices of a mapped file, are sent as they are without a copy.
     if data is not None:
-        if not type(data) == bytes:
+        if not isinstance(data, (bytes, bytearray, memoryview)):
             data = json.dumps(data)
+    request['data'] = data
+
+    return request
+
+
+def finish_request(method, url, request, response):
+    """
+    Turn the final response to a request into its result, keeping the response cache up to date.
+    :param method: API request method.
+    :param url: url the request was sent to.
+    :param request: Dictionary from prepare_request.
+    :param response: requests.Response.
+    :return: Decoded data from a successful request.
+    """
+    cache, cache_key, cached = request['cache'], request['cache_key'], request['cached']
+    if cache:
+        if cache_key is not None and response.status_code == 304 and cached is not None:
+            # Unchanged since it was cached.
+            cache.refresh(cache_key, url)
+            return cached[0]
+        if method in ('PUT', 'POST', 'DELETE'):
+            cache.invalidate(url)
 
-    # Raise request to API.
-    response = requests.request(method=method, url=url, headers=headers, data=data)
     try:
         # Raises stored HTTPError, if one occurred.
         response.raise_for_status()
@@ -60,6 +195,9 @@ def raw_issue_request(method, url, data=None, token=None):
             # If the response can not be decoded raise a value error, returning the response contents.
             data = response.content
 
+        if cache_key is not None:
+            cache.store(cache_key, url, data, response.headers.get('ETag'))
+
     except HTTPError as error:
         # If HTTPError occurs raise and print details from contents.
         print('Caught an HTTPError: {}'.format(error))
@@ -70,6 +208,43 @@ def raw_issue_request(method, url, data=None, token=None):
     return data
 
 
+def build_response(url, status, reason, headers, content):
+    """
+    Wrap a response received by other means than the requests session, e.g. by aiohttp, in a requests.Response, so
+    that it can be handled by finish_request and a failure raises the same HTTPError as raw_issue_request.
+    :param url: url the request was sent to.
+    :param status: HTTP status code.
+    :param reason: HTTP reason phrase.
+    :param headers: Response headers.
+    :param content: Response body, as bytes.
+    :return: requests.Response.
+    """
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.reason = reason
+    response.headers.update(headers)
+    response._content = content
+    return response
+
+
+def query_url(method, url, data=None, params=None):
+    """
+    Add query string parameters to a url. For GET and HEAD requests a dictionary of data is moved into the query string.
+    :param method: API request method.
+    :param url: url to API endpoint.
+    :param data: Data to be passed with the request.
+    :param params: Dictionary of query string parameters.
+    :return: Tuple of the url and the data left to send in the body.
+    """
+    if method in ('GET', 'HEAD') and isinstance(data, dict):
+        params = dict(data, **(params or {}))
+        data = None
+    if params:
+        url = requests.Request(method, url, params=params).prepare().url
+    return url, data
+
+
 def issue_request(method, endpoint, *args, **kwargs):
     """
     Used to contruct raw issue requests from a base url and target endpoint.
@@ -82,31 +257,51 @@ def issue_request(method, endpoint, *args, **kwargs):
     return raw_issue_request(method=method, url=config.base_url.format(endpoint=endpoint), *args, **kwargs)
 
 
-def get_file_check_data(file_name, chunk_size=1048576):
+def get_file_check_data(file_name, chunk_size=8388608, cache=None):
     """
     Reads file and uses md5 to encode for upload.
+    The MD5 of a file is remembered in the hash cache, so an unchanged file is only ever read once.
     :param file_name: path to file to be read.
-    :param chunk_size: length of characters to read per chunk of file.
-    :return:
+    :param chunk_size: length of characters to read per chunk of file. Rounded up to a whole number of pages.
+    :param cache: HashCache to look up and store the MD5 in. Defaults to the cache from the config file, False
+                  disables it.
+    :return: Tuple of the hex md5 string and the file size.
     """
-
-    with open(file_name, 'rb') as fin:
-        md5 = hashlib.md5()
-        size = 0
-        data = fin.read(chunk_size)
-        while data:
-            size += len(data)
-            md5.update(data)
-            data = fin.read(chunk_size)
-        return md5.hexdigest(), size
-
-
-def initiate_new_upload(article_id, file_name, token):
+    if cache is None:
+        cache = default_hash_cache()
+
+    stat = os.stat(file_name)
+    if cache:
+        md5 = cache.get(file_name, stat)
+        if md5 is not None:
+            return md5, stat.st_size
+
+    # Read page aligned chunks straight into one reusable buffer, through an unbuffered file, and hash slices of it.
+    chunk_size = -(-chunk_size // mmap.PAGESIZE) * mmap.PAGESIZE
+    buffer = bytearray(chunk_size)
+    md5 = hashlib.md5()
+    size = 0
+    with open(file_name, 'rb', buffering=0) as fin, memoryview(buffer) as view:
+        n = fin.readinto(buffer)
+        while n:
+            size += n
+            md5.update(view[:n])
+            n = fin.readinto(buffer)
+
+    # Only cache the result if the file did not change while it was being read.
+    if cache and os.stat(file_name).st_mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+        cache.put(file_name, md5.hexdigest(), stat)
+
+    return md5.hexdigest(), size
+
+
+def initiate_new_upload(article_id, file_name, token, journal=None):
     """
     Use to begin a new file upload to figshare API.
     :param article_id: id number of figshare article file is to be uploaded to.
     :param file_name: name of file to be stored on figshare.
     :param token: figshare authentication token.
+    :param journal: Optional UploadJournal in which the returned file_info is recorded.
     :return:
     """
 
@@ -127,40 +322,125 @@ def initiate_new_upload(article_id, file_name, token):
     # Use returned complete url to get the figshare file_info from API.
     result = raw_issue_request(method='GET', url=result['location'], token=token)
 
+    if journal is not None:
+        journal.start(file_name, result)
+
     # Return figshare file_info.
     return result
 
 
-def upload_parts(file_name, file_info, token):
+def upload_parts(file_name, file_info, token, workers=None, part_retries=None, retry=None, journal=None,
+                 use_mmap=None):
     """
     Use to upload the parts of the file to the endpoint from the file_info returned by initiate_new_upload().
+    Parts are uploaded concurrently, each worker reading its own byte range of the file. Parts the upload service
+    already reports as complete are skipped, so calling this again after an interruption only sends what is missing.
     :param file_name: Local path to file to be uploaded.
     :param file_info: file_info returned from fighsare.
     :param token: Authentication token.
-    :return:
+    :param workers: Maximum number of parts in flight at once. Defaults to config.upload_workers.
+    :param part_retries: Number of times a failed part is re-sent on its own. Defaults to config.upload_part_retries.
+    :param retry: RetryPolicy used for every part. Defaults to the policy from the config file, False disables it.
+    :param journal: Optional UploadJournal in which each uploaded part number is recorded.
+    :param use_mmap: Memory-map the file and send each part as a slice of the mapping, so no part-sized buffers are
+                     allocated however many parts are in flight. Defaults to config.upload_use_mmap.
+    :return: Dictionary summarising the upload: number of parts, bytes sent, seconds taken and MB/s.
     """
+    if workers is None:
+        workers = config.upload_workers
+    if use_mmap is None:
+        use_mmap = config.upload_use_mmap
+    if part_retries is None:
+        part_retries = config.upload_part_retries
+    if retry is None:
+        retry = default_retry_policy()
+    # Each part may be re-sent part_retries times, with all parts drawing from one budget for the whole file.
+    part_retry = retry.copy(max_retries=part_retries).for_batch() if retry else False
+
     # Get the complete figshare file url from the file_info.
     url = '{upload_url}'.format(**file_info)
     # Get the figshare file information from the url.
     result = raw_issue_request(method='GET', url=url, token=token)
+    # Only send the parts the upload service does not yet hold. The server's part status is authoritative, the journal
+    # is only consulted for parts the server reports no status for.
+    entry = journal.load() if journal is not None else None
+    journalled = entry['completed_parts'] if entry is not None else set()
+    parts = [part for part in result['parts']
+             if part.get('status', 'COMPLETE' if part['partNo'] in journalled else 'PENDING') != 'COMPLETE']
 
-    # Sequentially upload parts of the file.
     if config.verbose:
         print('Uploading parts:')
-    with open(file_name, 'rb') as fin:
-        for part in result['parts']:
-            upload_part(file_info=file_info, stream=fin, part=part, token=token)
+
+    start_time = time.perf_counter()
+    total_bytes = 0
+    failed_parts = []
+
+    # A single read-only mapping is shared by every worker. Empty files can not be mapped.
+    mapped = None
+    if use_mmap and os.path.getsize(file_name) > 0:
+        with open(file_name, 'rb') as fin:
+            mapped = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # Upload parts concurrently. complete_upload() must only follow if every part has been confirmed, so failures are
+    # collected and raised once the remaining parts have finished.
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(_upload_part_from_file, file_name, file_info, part, token, part_retry, journal,
+                                       mapped): part for part in parts}
+            for future in as_completed(futures):
+                part = futures[future]
+                try:
+                    total_bytes += future.result()
+                except RequestException as error:
+                    failed_parts.append((part['partNo'], error))
+    finally:
+        if mapped is not None:
+            mapped.close()
+
+    elapsed = time.perf_counter() - start_time
+    rate = total_bytes / elapsed / 1e6 if elapsed > 0 else 0.0
+
+    if failed_parts:
+        print('Failed to upload parts: {parts}'.format(parts=sorted(part_no for part_no, _ in failed_parts)))
+        raise failed_parts[0][1]
+
     if config.verbose:
-        print()
+        print('Uploaded {n} parts, {mb:.1f} MB in {s:.1f} s ({rate:.2f} MB/s)\n'.format(
+            n=len(parts), mb=total_bytes / 1e6, s=elapsed, rate=rate))
+
+    return {'parts': len(parts), 'bytes': total_bytes, 'seconds': elapsed, 'mb_per_s': rate}
 
 
-def upload_part(file_info, stream, part, token):
+def _upload_part_from_file(file_name, file_info, part, token, retry, journal, mapped=None):
+    """
+    Upload a single part from its own file handle, so that concurrent workers never share a file position.
+    :param file_name: Local path to file to be uploaded.
+    :param file_info: figshare file_info.
+    :param part: part dictionary from the upload service.
+    :param token: Authentication token.
+    :param retry: RetryPolicy for the part.
+    :param journal: UploadJournal to record the part in once uploaded, or None.
+    :param mapped: Shared mmap of the file. If given the part is sent from it rather than from a file handle.
+    :return: Number of bytes uploaded.
+    """
+    if mapped is not None:
+        upload_part(file_info=file_info, stream=mapped, part=part, token=token, retry=retry)
+    else:
+        with open(file_name, 'rb') as fin:
+            upload_part(file_info=file_info, stream=fin, part=part, token=token, retry=retry)
+    if journal is not None:
+        journal.mark_part(part['partNo'])
+    return part['endOffset'] - part['startOffset'] + 1
+
+
+def upload_part(file_info, stream, part, token, retry=None):
     """
     Upload a single part of a file.
     :param file_info: figshare file_info.
-    :param stream: file stream to be uploaded.
+    :param stream: file stream to be uploaded, or a bytes-like buffer such as an mmap of the file.
     :param part:
     :param token: Authentication token.
+    :param retry: RetryPolicy for the PUT of this part. Defaults to the policy from the config file.
     :return:
     """
     # Copy file info.
@@ -168,26 +448,38 @@ def upload_part(file_info, stream, part, token):
     udata.update(part)
     url = '{upload_url}/{partNo}'.format(**udata)
 
-    stream.seek(part['startOffset'])
-    data = stream.read(part['endOffset'] - part['startOffset'] + 1)
-
-    raw_issue_request(method='PUT', url=url, data=data, token=token)
+    start = part['startOffset']
+    stop = part['endOffset'] + 1
+
+    if isinstance(stream, (mmap.mmap, bytes, bytearray, memoryview)):
+        # Send a slice of the buffer itself rather than reading the part into a new bytes object. The views are
+        # released straight after the request so the mapping can be closed.
+        with memoryview(stream) as view, view[start:stop] as data:
+            raw_issue_request(method='PUT', url=url, data=data, token=token, retry=retry)
+    else:
+        stream.seek(start)
+        data = stream.read(stop - start)
+        raw_issue_request(method='PUT', url=url, data=data, token=token, retry=retry)
     if config.verbose:
         print('Upload part {partNo} from {startOffset} to {endOffset}'.format(**part))
 
 
-def complete_upload(article_id, file_id, token):
+def complete_upload(article_id, file_id, token, journal=None):
     """
     Complete upload by posting the relavent information.
     :param article_id: id number given to article, within project.
     :param file_id: id number of file, within article.
     :param token: Authentication token.
+    :param journal: Optional UploadJournal of the upload, removed once the upload is complete.
     :return:
     """
     endpoint = 'account/articles/{article_id}/files/{file_id}'
     endpoint = endpoint.format(article_id=article_id, file_id=file_id)
     issue_request(method='POST', endpoint=endpoint, token=token)
 
+    if journal is not None:
+        journal.delete()
+
 
 def login_request(username, password):
     """
@@ -205,7 +497,7 @@ def login_request(username, password):
     url = "https://api.figsh.com/v2/token"
     header = {"content-type": "application/json"}
     # Raise request to API.
-    response = requests.request(method='POST', url=url, data=data, headers=header)
+    response = get_session().request(method='POST', url=url, data=data, headers=header)
     try:
         # Raises stored HTTPError, if one occurred.
         response.raise_for_status()
@@ -229,13 +521,197 @@ def login_request(username, password):
     return OAuth_token
 
 
-def download_file(url, local_filename, token):
+def download_file(url, local_filename, token, workers=None, range_size=None, retry=None):
+    """
+    Download a file to disk. If the server supports HTTP Range requests the file is preallocated and fetched as
+    byte ranges by concurrent workers, each range retried on its own. Otherwise it is streamed over one connection.
+    :param url: Download url of the file.
+    :param local_filename: Local path to write the file to.
+    :param token: Authentication token.
+    :param workers: Maximum number of ranges in flight at once. Defaults to config.download_workers.
+    :param range_size: Size in bytes of each range. Defaults to config.download_range_size.
+    :param retry: RetryPolicy used for every range. Defaults to the policy from the config file, False disables it.
+    :return: HTTP status code of the download, 200 once the whole file has been written.
+    """
+    if workers is None:
+        workers = config.download_workers
+    if range_size is None:
+        range_size = config.download_range_size
+    if retry is None:
+        retry = default_retry_policy()
+    # All the ranges of the file draw their retries from one budget.
+    range_retry = retry.for_batch() if retry else False
 
     header = {'Authorization': 'token ' + token}
-    r = requests.get(url=url, stream=True, headers=header)
-    if r.status_code == 200:
-        with open(local_filename, 'wb') as f:
-            for chunk in r.iter_content(1048576):
-                f.write(chunk)
 
-    return r.status_code
+    # Ask for the first range. A 206 reply tells us the server supports ranges and the total size of the file, a 200
+    # reply is the whole file and is simply streamed to disk.
+    probe_header = dict(header, Range='bytes=0-{end}'.format(end=range_size - 1))
+    metrics = default_metrics()
+    r, attempt, started = _get_stream(url, probe_header, range_retry)
+
+    # Use the response as a context manager so the connection is handed back to the pool once the body is read.
+    received = 0
+    try:
+        with r:
+            total = _content_range_total(r) if r.status_code == 206 else None
+            if r.status_code == 200:
+                with open(local_filename, 'wb') as f:
+                    for chunk in r.iter_content(1048576):
+                        f.write(chunk)
+                        received += len(chunk)
+                return r.status_code
+            if r.status_code == 416:
+                # Even the first byte is out of range, so the file is empty.
+                open(local_filename, 'wb').close()
+                return 200
+            if r.status_code != 206:
+                return r.status_code
+
+            if total is not None:
+                # Preallocate the whole file, then write the first range from the probe response.
+                with open(local_filename, 'wb') as f:
+                    f.truncate(total)
+                    for chunk in r.iter_content(1048576):
+                        f.write(chunk)
+                    first_end = received = f.tell()
+    finally:
+        if metrics is not None:
+            metrics.observe('GET', url, r.status_code, time.perf_counter() - started, bytes_received=received,
+                            retry=attempt > 0)
+
+    if total is None:
+        # The server sends ranges but not the size of the file, so the file can not be split. It is fetched whole,
+        # without a Range header, instead.
+        return _download_whole(url, header, local_filename, range_retry)
+
+    ranges = [(start, min(start + range_size, total) - 1) for start in range(first_end, total, range_size)]
+
+    failed_ranges = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(_download_range, url, header, local_filename, start, end, range_retry): (start, end)
+                   for start, end in ranges}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except RequestException as error:
+                failed_ranges.append((futures[future], error))
+
+    if failed_ranges:
+        print('Failed to download byte ranges: {ranges}'.format(ranges=sorted(r for r, _ in failed_ranges)))
+        raise failed_ranges[0][1]
+
+    return 200
+
+
+def _get_stream(url, headers, retry):
+    """
+    Start a streamed GET, retrying it while the reply is a transient failure.
+    :param url: Url to request.
+    :param headers: Request headers.
+    :param retry: RetryPolicy, or False for no retries.
+    :return: Tuple of the requests.Response, the number of retries made and the time the last attempt was sent.
+    """
+    metrics = default_metrics()
+    attempt = 0
+    started = time.perf_counter()
+    r = get_session().get(url=url, stream=True, headers=headers)
+    while retry and retry.should_retry('GET', attempt, status=r.status_code, headers=r.headers):
+        r.close()
+        if metrics is not None:
+            metrics.observe('GET', url, r.status_code, time.perf_counter() - started, retry=attempt > 0)
+        retry.sleep(attempt, headers=r.headers)
+        attempt += 1
+        started = time.perf_counter()
+        r = get_session().get(url=url, stream=True, headers=headers)
+    return r, attempt, started
+
+
+def _download_whole(url, header, local_filename, retry):
+    """
+    Stream a whole file to disk over one connection.
+    :param url: Download url of the file.
+    :param header: Request headers, including authorisation.
+    :param local_filename: Local path to write the file to.
+    :param retry: RetryPolicy for starting the download.
+    :return: HTTP status code of the download, 200 once the whole file has been written.
+    """
+    metrics = default_metrics()
+    r, attempt, started = _get_stream(url, header, retry)
+    received = 0
+    try:
+        with r:
+            if r.status_code != 200:
+                return r.status_code
+            with open(local_filename, 'wb') as f:
+                for chunk in r.iter_content(1048576):
+                    f.write(chunk)
+                    received += len(chunk)
+            return 200
+    finally:
+        if metrics is not None:
+            metrics.observe('GET', url, r.status_code, time.perf_counter() - started, bytes_received=received,
+                            retry=attempt > 0)
+
+
+def _content_range_total(response):
+    """
+    Parse the total length of the resource from the Content-Range header of a 206 response.
+    :param response: requests.Response.
+    :return: Integer length, or None if it is missing or unknown.
+    """
+    match = re.match(r'bytes \d+-\d+/(\d+)', response.headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else None
+
+
+def _download_range(url, header, local_filename, start, end, retry):
+    """
+    Fetch one byte range of a file and write it in place into the preallocated local file. If the transfer fails
+    part way, only the bytes not yet written are requested again.
+    :param url: Download url of the file.
+    :param header: Request headers, including authorisation.
+    :param local_filename: Preallocated local file.
+    :param start: First byte of the range.
+    :param end: Last byte of the range, inclusive.
+    :param retry: RetryPolicy for the range.
+    :return: Number of bytes written.
+    """
+    position = start
+    attempt = 0
+    metrics = default_metrics()
+    with open(local_filename, 'r+b') as f:
+        while position <= end:
+            range_header = dict(header, Range='bytes={start}-{end}'.format(start=position, end=end))
+            started, first, status, is_retry = time.perf_counter(), position, None, attempt > 0
+            wait, retry_headers = False, None
+            try:
+                with get_session().get(url=url, stream=True, headers=range_header) as r:
+                    status = r.status_code
+                    if r.status_code != 206:
+                        if not retry or not retry.should_retry('GET', attempt, status=r.status_code,
+                                                               headers=r.headers):
+                            r.raise_for_status()
+                            raise HTTPError('Range request answered with {status}'.format(status=r.status_code),
+                                            response=r)
+                        wait, retry_headers = True, r.headers
+                    else:
+                        f.seek(position)
+                        for chunk in r.iter_content(1048576):
+                            f.write(chunk)
+                            position += len(chunk)
+                        if position <= end:
+                            raise requests.exceptions.ChunkedEncodingError('Range response ended early.')
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, Timeout):
+                if not retry or not retry.should_retry('GET', attempt):
+                    raise
+                wait = True
+            finally:
+                if metrics is not None:
+                    metrics.observe('GET', url, status, time.perf_counter() - started,
+                                    bytes_received=position - first, retry=is_retry)
+
+            if wait:
+                retry.sleep(attempt, headers=retry_headers)
+                attempt += 1
+
+    return end - start + 1
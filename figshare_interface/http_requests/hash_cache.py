@@ -0,0 +1,106 @@
+"""
+Persistent File Hash Cache.
+
+Remembers the MD5 of local files in a small SQLite database so that a file which has not changed since it was last
+hashed is never read again just to compute its checksum. A file is considered unchanged while its path, inode, size
+and modification time (in nanoseconds) are all the same as when it was hashed.
+"""
+
+import os
+import sqlite3
+import threading
+
+from .. import config
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class HashCache:
+    """
+    SQLite backed cache of file MD5s keyed by (path, inode, size, mtime_ns).
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: Path of the SQLite database. Defaults to config.hash_cache_path. ':memory:' gives a cache that
+                     lasts for the life of the object.
+        """
+        if path is None:
+            path = config.hash_cache_path
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        # A single connection guarded by a lock, so the cache can be used from the upload worker threads.
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS file_hashes ('
+                                     'path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, '
+                                     'md5 TEXT)')
+
+    def get(self, file_name, stat=None):
+        """
+        Look up the MD5 of a file.
+        :param file_name: Path to the file.
+        :param stat: os.stat_result of the file, if already known.
+        :return: Hex MD5 string, or None if the file has not been hashed since it last changed.
+        """
+        if stat is None:
+            stat = os.stat(file_name)
+        with self._lock:
+            row = self._connection.execute('SELECT md5 FROM file_hashes '
+                                           'WHERE path = ? AND inode = ? AND size = ? AND mtime_ns = ?',
+                                           (os.path.realpath(file_name), stat.st_ino, stat.st_size,
+                                            stat.st_mtime_ns)).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, file_name, md5, stat=None):
+        """
+        Store the MD5 of a file, replacing any entry for an earlier version of it.
+        :param file_name: Path to the file.
+        :param md5: Hex MD5 string.
+        :param stat: os.stat_result of the file the MD5 was computed from.
+        :return:
+        """
+        if stat is None:
+            stat = os.stat(file_name)
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO file_hashes (path, inode, size, mtime_ns, md5) '
+                                     'VALUES (?, ?, ?, ?, ?)',
+                                     (os.path.realpath(file_name), stat.st_ino, stat.st_size, stat.st_mtime_ns, md5))
+
+    def close(self):
+        """
+        Close the database connection.
+        :return:
+        """
+        with self._lock:
+            self._connection.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_hash_cache():
+    """
+    Return the cache at config.hash_cache_path, or None if the cache is disabled in the config file.
+    :return: HashCache or None.
+    """
+    global _default_cache
+    if not config.hash_cache_enabled:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = HashCache()
+    return _default_cache
@@ -0,0 +1,74 @@
+"""
+Lazily Fetched Information.
+
+In lean mode, calls that create or change something on figshare do not follow up with a GET of the full information of
+the item. They return a LazyInfo instead: a read-only mapping answering the keys already known, such as the id and
+location, straight away, and fetching the rest on the first access to anything else.
+"""
+
+import threading
+from collections.abc import Mapping
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def location_id(location):
+    """
+    Return the id number at the end of a location url returned by figshare, e.g. '.../account/articles/123'.
+    :param location: Location url.
+    :return: Integer id number.
+    """
+    return int(location.rstrip('/').rsplit('/', 1)[-1])
+
+
+class LazyInfo(Mapping):
+    """
+    Thread safe mapping of item information, fetched once on first need.
+    """
+
+    def __init__(self, fetch, known=None):
+        """
+        :param fetch: Function taking no arguments returning the full dictionary of information.
+        :param known: Dictionary of the information already known, returned without fetching.
+        """
+        self._fetch = fetch
+        self._known = dict(known or {})
+        self._info = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        """True once the full information has been fetched."""
+        return self._info is not None
+
+    def load(self):
+        """
+        Fetch the full information, if it has not been already.
+        :return: Dictionary of information.
+        """
+        with self._lock:
+            if self._info is None:
+                self._info = self._fetch()
+        return self._info
+
+    def __getitem__(self, key):
+        if self._info is None and key in self._known:
+            return self._known[key]
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __repr__(self):
+        if self._info is None:
+            return '{name}({known!r}, not loaded)'.format(name=type(self).__name__, known=self._known)
+        return '{name}({info!r})'.format(name=type(self).__name__, info=self._info)
@@ -0,0 +1,208 @@
+"""
+HTTP Request Metrics.
+
+Counts every HTTP request made to figshare, grouped by method and endpoint template, i.e. the url path with its id
+numbers and upload tokens replaced by {id} and {token}. For each group the registry keeps the number of responses with
+each status code, the requests that got no response at all, retries, bytes sent and received, and a histogram of
+latencies. Retried attempts are counted as requests of their own.
+
+The metrics can be read back as a dictionary, through MetricsRegistry.snapshot(), or in the Prometheus text exposition
+format, through MetricsRegistry.to_prometheus(). Metrics are off by default, in which case no time is spent on them
+beyond checking config.metrics_enabled once per request.
+"""
+
+import bisect
+import re
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+from .. import config
+from .response_cache import endpoint_path, endpoint_template
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+# Upper bounds, in seconds, of the latency histogram buckets. A last, unbounded bucket catches everything slower.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def metrics_template(url):
+    """
+    Return the endpoint template a request is counted under.
+    figshare API urls give their endpoint template, e.g. 'account/articles/{id}/files'. Urls of other hosts, such as
+    the upload service, give the host followed by the templated path, e.g. 'fup.figshare.com/upload/{token}/{id}'.
+    :param url: Full url of the request.
+    :return: String template.
+    """
+    endpoint = endpoint_path(url)
+    if endpoint is not None:
+        return endpoint_template(endpoint)
+    parts = urlsplit(url)
+    path = re.sub(r'(?<![^/])[0-9a-fA-F-]{16,}(?![^/])', '{token}', parts.path)
+    return parts.netloc + endpoint_template(path)
+
+
+def body_size(data):
+    """
+    Number of bytes in a request body.
+    :param data: Body as passed to the session, i.e. None, a string or a bytes-like object.
+    :return: Integer.
+    """
+    if data is None:
+        return 0
+    if isinstance(data, str):
+        return len(data.encode('utf-8'))
+    if isinstance(data, memoryview):
+        return data.nbytes
+    return len(data)
+
+
+class _EndpointStats:
+    """
+    Counters of one (method, endpoint template) pair.
+    """
+
+    def __init__(self):
+        self.statuses = Counter()
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+
+class MetricsRegistry:
+    """
+    Thread safe registry of request metrics.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method, url, status, seconds, bytes_sent=0, bytes_received=0, retry=False):
+        """
+        Record one HTTP request.
+        :param method: HTTP method.
+        :param url: Full url of the request.
+        :param status: Status code of the response, or None if no response was received.
+        :param seconds: Time from sending the request to receiving the whole response, or failing.
+        :param bytes_sent: Size of the request body.
+        :param bytes_received: Size of the response body.
+        :param retry: True if the request is a retry of an earlier, failed, attempt.
+        :return:
+        """
+        key = (method, metrics_template(url))
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _EndpointStats()
+            if status is None:
+                stats.errors += 1
+            else:
+                stats.statuses[status] += 1
+            if retry:
+                stats.retries += 1
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.latency_counts[bucket] += 1
+            stats.latency_sum += seconds
+
+    def snapshot(self):
+        """
+        Return a copy of the metrics collected so far.
+        :return: Dictionary keyed by (method, endpoint template), of dictionaries with keys 'count', 'statuses',
+                 'errors', 'retries', 'bytes_sent', 'bytes_received', 'latency_sum' and 'latency_buckets'. The
+                 latency buckets are a list of (upper bound in seconds, cumulative count) pairs ending with infinity.
+        """
+        bounds = LATENCY_BUCKETS + (float('inf'),)
+        result = {}
+        with self._lock:
+            for key, stats in self._stats.items():
+                cumulative, buckets = 0, []
+                for bound, count in zip(bounds, stats.latency_counts):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+                result[key] = {'count': cumulative,
+                               'statuses': dict(stats.statuses),
+                               'errors': stats.errors,
+                               'retries': stats.retries,
+                               'bytes_sent': stats.bytes_sent,
+                               'bytes_received': stats.bytes_received,
+                               'latency_sum': stats.latency_sum,
+                               'latency_buckets': buckets}
+        return result
+
+    def to_prometheus(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        :return: String.
+        """
+        snapshot = sorted(self.snapshot().items())
+
+        def labels(method, endpoint, **extra):
+            pairs = [('method', method), ('endpoint', endpoint)] + sorted(extra.items())
+            return '{' + ','.join('{0}="{1}"'.format(name, _escape(value)) for name, value in pairs) + '}'
+
+        lines = ['# HELP figshare_http_requests_total HTTP responses received, by status code.',
+                 '# TYPE figshare_http_requests_total counter']
+        for (method, endpoint), stats in snapshot:
+            for status, count in sorted(stats['statuses'].items()):
+                lines.append('figshare_http_requests_total{labels} {count}'.format(
+                    labels=labels(method, endpoint, status=str(status)), count=count))
+
+        for name, key, description in [('errors', 'errors', 'HTTP requests that received no response.'),
+                                       ('retries', 'retries', 'HTTP requests that were retries of a failed attempt.'),
+                                       ('sent_bytes', 'bytes_sent', 'Bytes sent in request bodies.'),
+                                       ('received_bytes', 'bytes_received', 'Bytes received in response bodies.')]:
+            lines.append('# HELP figshare_http_{name}_total {description}'.format(name=name, description=description))
+            lines.append('# TYPE figshare_http_{name}_total counter'.format(name=name))
+            for (method, endpoint), stats in snapshot:
+                lines.append('figshare_http_{name}_total{labels} {value}'.format(
+                    name=name, labels=labels(method, endpoint), value=stats[key]))
+
+        lines.append('# HELP figshare_http_request_duration_seconds HTTP request latency.')
+        lines.append('# TYPE figshare_http_request_duration_seconds histogram')
+        for (method, endpoint), stats in snapshot:
+            for bound, count in stats['latency_buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('figshare_http_request_duration_seconds_bucket{labels} {count}'.format(
+                    labels=labels(method, endpoint, le=le), count=count))
+            lines.append('figshare_http_request_duration_seconds_sum{labels} {value!r}'.format(
+                labels=labels(method, endpoint), value=stats['latency_sum']))
+            lines.append('figshare_http_request_duration_seconds_count{labels} {count}'.format(
+                labels=labels(method, endpoint), count=stats['count']))
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """
+        Discard the metrics collected so far.
+        :return:
+        """
+        with self._lock:
+            self._stats.clear()
+
+
+def _escape(value):
+    """Escape a Prometheus label value."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_registry = MetricsRegistry()
+
+
+def default_metrics():
+    """
+    Return the shared metrics registry, or None if metrics are disabled in the config file.
+    :return: MetricsRegistry or None.
+    """
+    return _registry if config.metrics_enabled else None
@@ -0,0 +1,146 @@
+"""
+Paginated Listings.
+
+Generators over the paged list and search endpoints of the figshare API. Items are yielded as soon as their page has
+arrived, and while they are being consumed the next page is already fetched in the background. When the total number
+of items is known up front the pages are fetched concurrently instead, a bounded number at a time, and still yielded
+in order. Closing the generator early, e.g. breaking out of a for loop, stops it from requesting any further pages.
+
+Pages are addressed either by page/page_size or, when an offset is given, by offset/limit. Listings send these as
+query string parameters, searches in the POSTed body alongside the query.
+"""
+
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .. import config
+from .figshare_requests import issue_request
+from .retry import default_retry_policy
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def paginate(method, endpoint, token, data=None, page_size=None, page=1, page_max=None, offset=None, total=None,
+             workers=None, retry=None, prefetch=True):
+    """
+    Iterate over the items of a paged endpoint, one page after another until a page comes back short.
+    :param method: API request method, GET for listings or POST for searches.
+    :param endpoint: target of the API request.
+    :param token: Authentication token.
+    :param data: Additional data sent with every page, e.g. the search query.
+    :param page_size: Number of items requested per page, up to config.max_page_size. Defaults to config.page_size.
+    :param page: First page to request.
+    :param page_max: Last page to request. No limit if None. Only used when paging by page number.
+    :param offset: If given, page by offset/limit starting from this item instead of by page number.
+    :param total: Total number of items in the listing, if known. The pages holding them are then fetched concurrently.
+    :param workers: Maximum number of pages fetched at once when the total is known. Defaults to
+                    config.pagination_workers.
+    :param retry: RetryPolicy shared by every page. Defaults to a batch of the policy from the config file.
+    :param prefetch: If True, request the next page in the background while the current one is consumed.
+    :return: Generator of the items.
+    """
+    pages = Pages(method, data=data, page_size=page_size, page=page, page_max=page_max, offset=offset, total=total)
+    if workers is None:
+        workers = config.pagination_workers
+    if retry is None:
+        retry = default_retry_policy().for_batch()
+
+    def get_page(index):
+        return issue_request(method=method, endpoint=endpoint, token=token, retry=retry, **pages.request(index))
+
+    ahead = workers if pages.known else int(bool(prefetch))
+    executor = ThreadPoolExecutor(max_workers=ahead) if ahead else None
+    pending = deque()
+    next_index = 0
+
+    try:
+        index = 0
+        while pages.allowed(index):
+            # Keep up to `ahead` of the known pages in flight.
+            while (executor is not None and len(pending) < ahead and next_index < pages.known
+                   and pages.allowed(next_index)):
+                pending.append(executor.submit(get_page, next_index))
+                next_index += 1
+
+            if pending:
+                result = pending.popleft().result()
+            else:
+                result = get_page(index)
+                next_index = index + 1
+
+            more = pages.more(result, index)
+            if more and executor is not None and not pending and next_index == index + 1:
+                # Past the known pages only a full page shows there may be another, so fetch just the next one.
+                pending.append(executor.submit(get_page, next_index))
+                next_index += 1
+
+            for item in result:
+                yield item
+
+            if not more:
+                return
+            index += 1
+    finally:
+        # Reached on exhaustion, error, or the caller closing the generator early.
+        for future in pending:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+class Pages:
+    """
+    The page requests of one walk over a paged endpoint. Shared by paginate and its asyncio counterpart, which only
+    differ in how the pages are fetched.
+    """
+
+    def __init__(self, method, data=None, page_size=None, page=1, page_max=None, offset=None, total=None):
+        """
+        See paginate for the arguments.
+        """
+        if page_size is None:
+            page_size = config.page_size
+        if not 0 < page_size <= config.max_page_size:
+            raise ValueError('page_size must be between 1 and {max}.'.format(max=config.max_page_size))
+
+        self.method = method
+        self.data = data
+        self.page_size = page_size
+        self.page = page
+        self.page_max = page_max
+        self.offset = offset
+
+        # Number of pages known to hold items, which can be requested without waiting for the page before them.
+        self.known = 0
+        if total is not None:
+            first_item = offset if offset is not None else (page - 1) * page_size
+            self.known = max(0, math.ceil((total - first_item) / page_size))
+
+    def request(self, index):
+        """
+        Arguments of issue_request, besides the method, endpoint, token and retry, for a page.
+        :param index: Number of the page among those requested by this walk, from 0.
+        :return: Dictionary of keyword arguments.
+        """
+        if self.offset is None:
+            paging = {'page': self.page + index, 'page_size': self.page_size}
+        else:
+            paging = {'offset': self.offset + index * self.page_size, 'limit': self.page_size}
+        if self.method == 'GET':
+            return {'params': dict(self.data or {}, **paging)}
+        return {'data': dict(self.data or {}, **paging)}
+
+    def allowed(self, index):
+        """Return True if the page may be requested under page_max."""
+        return self.offset is not None or self.page_max is None or self.page + index <= self.page_max
+
+    def more(self, result, index):
+        """Return True if there may be a page after the page at index, which returned result."""
+        return len(result) >= self.page_size and self.allowed(index + 1)
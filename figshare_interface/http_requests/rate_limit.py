@@ -0,0 +1,82 @@
+"""
+Request Rate Limiting.
+
+A token bucket shared by the threads of a batch of work, so that however many workers it has the batch as a whole
+never sends more than a set number of requests per second to figshare. A thread opts in to a limiter with
+use_rate_limiter(), after which every HTTP request raw_issue_request() sends from that thread, retries included, first
+takes a token from it.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class RateLimiter:
+    """
+    Thread safe token bucket.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: Requests allowed per second, on average.
+        :param burst: Requests that may be sent at once after a quiet spell. Defaults to rate, and is at least 1.
+        """
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0.')
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst if burst is not None else rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take one token, waiting until one is available.
+        :return: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+_local = threading.local()
+
+
+def current_rate_limiter():
+    """
+    Return the rate limiter the current thread is using.
+    :return: RateLimiter or None.
+    """
+    return getattr(_local, 'limiter', None)
+
+
+@contextmanager
+def use_rate_limiter(limiter):
+    """
+    Limit the requests made from the current thread within a with block.
+    :param limiter: RateLimiter, or None for no limit.
+    """
+    previous = current_rate_limiter()
+    _local.limiter = limiter
+    try:
+        yield limiter
+    finally:
+        _local.limiter = previous
@@ -0,0 +1,203 @@
+"""
+Response Cache.
+
+An in-memory, size bounded cache of decoded GET responses from the figshare API. Each endpoint is cached for its own
+time to live, looked up by the endpoint template with the id numbers replaced by {id} (e.g. 'account/projects/{id}').
+Endpoints without a time to live are never cached. Once an entry has expired it is revalidated with its ETag, if the
+server sent one, so an unchanged resource costs a 304 rather than a full response.
+
+Any PUT, POST or DELETE to an entity drops the cached responses about that entity, i.e. every cached url sharing one of
+its (collection, id) pairs, along with the listing the entity belongs to.
+"""
+
+import copy
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from .. import config
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def endpoint_path(url):
+    """
+    Return the endpoint of a figshare API url, i.e. the path relative to the base url.
+    :param url: Full url of the request.
+    :return: String endpoint, or None if the url is not part of the figshare API.
+    """
+    base = urlsplit(config.base_url.format(endpoint=''))
+    parts = urlsplit(url)
+    if parts.netloc != base.netloc or not parts.path.startswith(base.path):
+        return None
+    return parts.path[len(base.path):].strip('/')
+
+
+def endpoint_template(endpoint):
+    """
+    Replace the id numbers in an endpoint with {id}, e.g. 'account/articles/12/files' -> 'account/articles/{id}/files'.
+    :param endpoint: String endpoint.
+    :return: String endpoint template.
+    """
+    return re.sub(r'(?<![^/])\d+(?![^/])', '{id}', endpoint)
+
+
+def entity_keys(endpoint):
+    """
+    Return the entities an endpoint refers to, as (collection, id) pairs.
+    e.g. 'account/projects/3/articles/12' -> {('projects', '3'), ('articles', '12')}
+    :param endpoint: String endpoint.
+    :return: Set of tuples.
+    """
+    segments = endpoint.split('/')
+    return {(segments[i - 1], segments[i]) for i in range(1, len(segments)) if segments[i].isdigit()}
+
+
+class ResponseCache:
+    """
+    Thread safe TTL + LRU cache of decoded GET responses.
+    """
+
+    def __init__(self, max_entries=None, ttls=None):
+        """
+        :param max_entries: Maximum number of responses held. The least recently used is evicted first. Defaults to
+                            config.response_cache_max_entries.
+        :param ttls: Dictionary of endpoint template to time to live in seconds. Defaults to config.response_cache_ttls.
+        """
+        if max_entries is None:
+            max_entries = config.response_cache_max_entries
+        if ttls is None:
+            ttls = config.response_cache_ttls
+
+        self.max_entries = max_entries
+        self.ttls = dict(ttls)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, data=None, token=None):
+        """
+        Key of a request in the cache. Responses are only shared between requests made with the same token.
+        :return: Tuple.
+        """
+        if data is not None and not isinstance(data, str):
+            data = json.dumps(data, sort_keys=True)
+        return token, url, data
+
+    def ttl(self, url):
+        """
+        Time to live of the responses from a url.
+        :param url: Full url of the request.
+        :return: Seconds, or None if the url is not cached.
+        """
+        endpoint = endpoint_path(url)
+        if endpoint is None:
+            return None
+        return self.ttls.get(endpoint_template(endpoint))
+
+    def lookup(self, key):
+        """
+        Look up a response.
+        :param key: Key from ResponseCache.key().
+        :return: Tuple of (data, fresh, etag), or None if nothing is cached. data is a copy the caller may modify.
+                 A stale entry is returned so its ETag can be used to revalidate it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            data, expires, etag = entry
+        return copy.deepcopy(data), time.monotonic() < expires, etag
+
+    def store(self, key, url, data, etag=None):
+        """
+        Cache a decoded response, evicting the least recently used responses beyond max_entries.
+        :param key: Key from ResponseCache.key().
+        :param url: Full url of the request.
+        :param data: Decoded response.
+        :param etag: ETag header of the response, if any.
+        :return:
+        """
+        ttl = self.ttl(url)
+        if ttl is None:
+            return
+        entry = (copy.deepcopy(data), time.monotonic() + ttl, etag)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key, url):
+        """
+        Restart the time to live of an entry after the server confirmed it is unchanged.
+        :param key: Key from ResponseCache.key().
+        :param url: Full url of the request.
+        :return:
+        """
+        ttl = self.ttl(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and ttl is not None:
+                self._entries[key] = (entry[0], time.monotonic() + ttl, entry[2])
+
+    def invalidate(self, url):
+        """
+        Drop every cached response about the entity a mutating request was made to.
+        :param url: Full url of the PUT, POST or DELETE request.
+        :return:
+        """
+        endpoint = endpoint_path(url)
+        if endpoint is None:
+            return
+        segments = endpoint.split('/')
+        if segments[-1] == 'search':
+            # Searches are POSTed, but do not change anything.
+            return
+
+        keys = entity_keys(endpoint)
+        # The entity itself and the listing it is created in or removed from, e.g. 'account/projects'.
+        paths = {endpoint, '/'.join(segments[:-1])}
+
+        with self._lock:
+            for key in list(self._entries):
+                cached = endpoint_path(key[1])
+                if cached in paths or keys & entity_keys(cached):
+                    del self._entries[key]
+
+    def clear(self):
+        """
+        Drop every cached response.
+        :return:
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_response_cache():
+    """
+    Return the shared response cache, or None if response caching is disabled in the config file.
+    :return: ResponseCache or None.
+    """
+    global _default_cache
+    if not config.response_cache_enabled:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache()
+    return _default_cache
@@ -0,0 +1,181 @@
+"""
+Lazy Response Stream.
+
+A readable, seekable file-like view of a file being downloaded, that reads from the HTTP response only as far as the
+caller asks for. Nothing is held in memory beyond the read buffer. Forward seeks skip over the response, and only if a
+seek goes backwards are the bytes before the current position fetched again and spilled to a temporary file, which
+then also keeps everything read from that point on.
+"""
+
+import io
+import tempfile
+
+from .retry import default_retry_policy
+from .transport import get_session
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class ResponseStream(io.RawIOBase):
+    """
+    Raw binary stream over a streamed HTTP download. Normally wrapped in an io.BufferedReader, see open_stream().
+    """
+
+    def __init__(self, response, url, headers):
+        """
+        :param response: requests.Response of the download, requested with stream=True.
+        :param url: Download url, used to re-fetch the start of the file if a seek goes backwards.
+        :param headers: Request headers, including authorisation.
+        """
+        super().__init__()
+        self._response = response
+        self._url = url
+        self._headers = headers
+
+        # Content-Length is only the length of the file if the body is not content-encoded.
+        content_length = response.headers.get('Content-Length')
+        if content_length is not None and 'Content-Encoding' not in response.headers:
+            self._length = int(content_length)
+        else:
+            self._length = None
+
+        self._position = 0  # Position of the caller in the file.
+        self._live_position = 0  # Number of bytes consumed from the live response.
+        self._spill = None  # Temporary file holding bytes [0, _live_position) once a backward seek has happened.
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, b):
+        """
+        Read up to len(b) bytes at the current position into b.
+        :param b: Writable buffer.
+        :return: Number of bytes read, 0 at the end of the file.
+        """
+        if self._spill is not None and self._position < self._live_position:
+            # Serve already downloaded bytes from the spill file.
+            self._spill.seek(self._position)
+            n = self._spill.readinto(memoryview(b)[:self._live_position - self._position])
+        else:
+            self._advance_live(self._position)
+            n = self._read_live(b)
+        self._position += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """
+        Move to a new position. Seeking backwards past what has been streamed spills the file to a temporary file.
+        :param offset: Offset relative to whence.
+        :param whence: io.SEEK_SET, io.SEEK_CUR or io.SEEK_END.
+        :return: The new absolute position.
+        """
+        if whence == io.SEEK_SET:
+            target = offset
+        elif whence == io.SEEK_CUR:
+            target = self._position + offset
+        elif whence == io.SEEK_END:
+            if self._length is None:
+                # The length is only known once the response has been read to the end.
+                self._start_spill()
+                self._advance_live()
+                self._length = self._live_position
+            target = self._length + offset
+        else:
+            raise ValueError('Invalid whence: {whence}'.format(whence=whence))
+
+        if target < 0:
+            raise ValueError('Negative seek position {target}'.format(target=target))
+        if target < self._live_position and self._spill is None:
+            self._start_spill()
+
+        self._position = target
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._response.close()
+            if self._spill is not None:
+                self._spill.close()
+        super().close()
+
+    def _read_live(self, b):
+        """Read from the live response into b, keeping a copy in the spill file if there is one."""
+        n = self._response.raw.readinto(b)
+        if n and self._spill is not None:
+            self._spill.seek(self._live_position)
+            self._spill.write(memoryview(b)[:n])
+        self._live_position += n
+        return n
+
+    def _advance_live(self, target=None):
+        """Consume the live response up to target, or to its end if target is None, for a forward seek."""
+        if target is not None and self._live_position >= target:
+            return
+        buffer = bytearray(1048576)
+        with memoryview(buffer) as view:
+            while target is None or self._live_position < target:
+                size = len(buffer) if target is None else min(len(buffer), target - self._live_position)
+                if not self._read_live(view[:size]):
+                    break
+
+    def _start_spill(self):
+        """Create the spill file and fill it with the bytes already consumed from the live response."""
+        if self._spill is not None:
+            return
+        self._spill = tempfile.TemporaryFile()
+        if self._live_position == 0:
+            return
+
+        headers = dict(self._headers, Range='bytes=0-{end}'.format(end=self._live_position - 1))
+        with get_session().get(url=self._url, stream=True, headers=headers) as r:
+            r.raise_for_status()
+            # A server without range support sends the whole file, so stop once the prefix has been copied.
+            remaining = self._live_position
+            for chunk in r.iter_content(1048576):
+                self._spill.write(chunk[:remaining])
+                remaining -= len(chunk)
+                if remaining <= 0:
+                    break
+        if remaining > 0:
+            raise IOError('Could not re-read the first {n} bytes of {url}'.format(n=self._live_position,
+                                                                                   url=self._url))
+
+
+def open_stream(url, token, buffer_size=1048576, retry=None):
+    """
+    Start downloading a file and return it as a lazy, buffered, seekable binary stream.
+    :param url: Download url of the file.
+    :param token: Authentication token.
+    :param buffer_size: Size of the read buffer.
+    :param retry: RetryPolicy for starting the download. Defaults to the policy from the config file, False disables it.
+    :return: io.BufferedReader, or None if the download was unsuccessful.
+    """
+    if retry is None:
+        retry = default_retry_policy()
+
+    headers = {'Authorization': 'token ' + token}
+    attempt = 0
+    response = get_session().get(url=url, stream=True, headers=headers)
+    while retry and retry.should_retry('GET', attempt, status=response.status_code, headers=response.headers):
+        response.close()
+        retry.sleep(attempt, headers=response.headers)
+        attempt += 1
+        response = get_session().get(url=url, stream=True, headers=headers)
+    if response.status_code != 200:
+        response.close()
+        return None
+    # Let urllib3 undo any content encoding, so the stream yields the bytes of the file itself.
+    response.raw.decode_content = True
+    return io.BufferedReader(ResponseStream(response, url, headers), buffer_size=buffer_size)
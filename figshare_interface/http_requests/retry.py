@@ -0,0 +1,172 @@
+"""
+Retry Policy for HTTP Requests.
+
+Transient failures (dropped connections, 429 and 5xx gateway responses) are retried with exponential backoff and full
+jitter, honouring any Retry-After header sent by the server. Each call has its own retry limit, and a RetryBudget can
+be shared by every call in a batch so a failing server cannot multiply the retries of a large job.
+"""
+
+import copy
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from .. import config
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class RetryBudget:
+    """
+    Thread-safe count of the retries a batch of calls may still spend between them.
+    """
+
+    def __init__(self, retries):
+        """
+        :param retries: Total number of retries allowed across the batch.
+        """
+        self.remaining = retries
+        self._lock = threading.Lock()
+
+    def spend(self):
+        """
+        Take one retry from the budget.
+        :return: True if a retry was available, False if the budget is exhausted.
+        """
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed request is retried and how long to wait before doing so.
+    """
+
+    def __init__(self, max_retries=None, backoff_factor=None, max_backoff=None, max_retry_after=None,
+                 status_forcelist=None, methods=None, budget=None):
+        """
+        Any argument left as None is taken from the [retry] section of the config file.
+        :param max_retries: Number of retries allowed for a single call.
+        :param backoff_factor: Seconds of the first backoff window, doubled on each subsequent retry.
+        :param max_backoff: Upper limit in seconds of the backoff window.
+        :param max_retry_after: Longest Retry-After wait, in seconds, that will be honoured. A server asking for longer
+                                is not retried.
+        :param status_forcelist: HTTP status codes that are retried.
+        :param methods: HTTP methods that are retried. Defaults to the idempotent methods.
+        :param budget: Optional RetryBudget shared with other calls of the same batch.
+        """
+        self.max_retries = config.retry_max_retries if max_retries is None else max_retries
+        self.backoff_factor = config.retry_backoff_factor if backoff_factor is None else backoff_factor
+        self.max_backoff = config.retry_max_backoff if max_backoff is None else max_backoff
+        self.max_retry_after = config.retry_max_retry_after if max_retry_after is None else max_retry_after
+        self.status_forcelist = frozenset(config.retry_status_forcelist if status_forcelist is None
+                                          else status_forcelist)
+        self.methods = frozenset(m.upper() for m in (config.retry_methods if methods is None else methods))
+        self.budget = budget
+
+    def copy(self, **kwargs):
+        """
+        Return a copy of the policy with the given attributes replaced, e.g. policy.copy(max_retries=5).
+        :return: RetryPolicy.
+        """
+        policy = copy.copy(self)
+        for key, value in kwargs.items():
+            setattr(policy, key, value)
+        return policy
+
+    def for_batch(self, retries=None):
+        """
+        Return a copy of the policy whose retries are also drawn from a new budget shared by the whole batch.
+        :param retries: Total retries for the batch. Defaults to config.retry_batch_budget.
+        :return: RetryPolicy.
+        """
+        return self.copy(budget=RetryBudget(config.retry_batch_budget if retries is None else retries))
+
+    def should_retry(self, method, attempt, status=None, headers=None):
+        """
+        Decide whether a failed call should be retried. Spends from the batch budget if it is.
+        :param method: HTTP method of the call.
+        :param attempt: Number of retries already made for this call.
+        :param status: HTTP status code of the failed call, or None if no response was received.
+        :param headers: Response headers of the failed call, or None.
+        :return: Boolean.
+        """
+        if method.upper() not in self.methods or attempt >= self.max_retries:
+            return False
+        if status is not None and status not in self.status_forcelist:
+            return False
+        if headers is not None:
+            retry_after = self.retry_after(headers)
+            if retry_after is not None and retry_after > self.max_retry_after:
+                return False
+        if self.budget is not None and not self.budget.spend():
+            return False
+        return True
+
+    def backoff(self, attempt, headers=None):
+        """
+        Seconds to wait before the next retry: full-jitter exponential backoff, or the server's Retry-After if longer.
+        :param attempt: Number of retries already made for this call.
+        :param headers: Response headers of the failed call, or None.
+        :return: Float number of seconds.
+        """
+        window = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        delay = random.uniform(0, window)
+        if headers is not None:
+            retry_after = self.retry_after(headers)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+        return delay
+
+    def sleep(self, attempt, headers=None):
+        """
+        Block for the backoff delay of the given attempt.
+        :param attempt: Number of retries already made for this call.
+        :param headers: Response headers of the failed call, or None.
+        :return:
+        """
+        time.sleep(self.backoff(attempt, headers))
+
+    @staticmethod
+    def retry_after(headers):
+        """
+        Parse a Retry-After header, which is either a number of seconds or an HTTP date.
+        :param headers: Case-insensitive mapping of response headers.
+        :return: Float number of seconds, or None if the header is missing or malformed.
+        """
+        value = headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_date.timestamp() - time.time())
+
+
+_default_policy = None
+
+
+def default_retry_policy():
+    """
+    Return the policy built from the config file, used by raw_issue_request when no policy is given.
+    :return: RetryPolicy.
+    """
+    global _default_policy
+    if _default_policy is None:
+        _default_policy = RetryPolicy()
+    return _default_policy
@@ -0,0 +1,89 @@
+"""
+Single-Flight Request Coalescing.
+
+When several threads make the same request at the same time only the first, the leader, sends it. The others wait for
+the leader to finish and receive their own copy of its decoded result, or the same exception.
+"""
+
+import copy
+import json
+import threading
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class _Call:
+    """
+    A request in flight, and the result it finished with.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread safe registry of the requests in flight, keyed by SingleFlight.key().
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method, url, data=None, token=None):
+        """
+        Key identifying a request. Only requests made with the same token are coalesced.
+        :return: Tuple.
+        """
+        if data is not None and not isinstance(data, (str, bytes)):
+            data = json.dumps(data, sort_keys=True)
+        return method, url, data, token
+
+    def do(self, key, function, *args, **kwargs):
+        """
+        Call function(*args, **kwargs), unless a call with the same key is already in flight, in which case wait for
+        it and share its result.
+        :param key: Key from SingleFlight.key().
+        :param function: Function making the request.
+        :return: The result of the call. When it is shared every caller gets its own deep copy.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = function(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            # Once removed no more followers can join, so the count is final.
+            with self._lock:
+                del self._calls[key]
+                shared = call.followers > 0
+            call.done.set()
+
+        if shared:
+            # The followers copy call.result, so the leader must not be handed the object they are copying.
+            return copy.deepcopy(call.result)
+        return call.result
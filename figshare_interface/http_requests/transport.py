@@ -0,0 +1,75 @@
+"""
+Shared HTTP Transport.
+
+A single pooled, keep-alive requests.Session is shared by every call into the figshare API so that the TCP and TLS
+handshakes are paid once per connection rather than once per request.
+"""
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from .. import config
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def new_session(pool_connections=None, pool_maxsize=None, pool_block=None):
+    """
+    Create a requests session with a pooled adapter mounted for http and https.
+    :param pool_connections: Number of per-host connection pools to cache. Defaults to config.pool_connections.
+    :param pool_maxsize: Maximum number of connections kept alive per host. Defaults to config.pool_maxsize.
+    :param pool_block: Block when a host's pool is exhausted rather than open an extra connection.
+                       Defaults to config.pool_block.
+    :return: requests.Session.
+    """
+    if pool_connections is None:
+        pool_connections = config.pool_connections
+    if pool_maxsize is None:
+        pool_maxsize = config.pool_maxsize
+    if pool_block is None:
+        pool_block = config.pool_block
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+
+def get_session():
+    """
+    Return the shared session, creating it from the config settings on first use.
+    :return: requests.Session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = new_session()
+    return _session
+
+
+def set_session(session):
+    """
+    Replace the shared session, e.g. with one from new_session() sized for a particular worker.
+    The previous session is closed.
+    :param session: requests.Session, or None to fall back to a default session on next use.
+    :return:
+    """
+    global _session
+    with _session_lock:
+        previous = _session
+        _session = session
+    if previous is not None and previous is not session:
+        previous.close()
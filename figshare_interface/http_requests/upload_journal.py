@@ -0,0 +1,130 @@
+"""
+Upload Journal.
+
+Records the progress of a multipart upload on local disk so that an upload interrupted part way through can be
+resumed by a later process rather than restarted from byte zero.
+
+A journal is a JSON-lines file. The first line holds the figshare file_info together with the size and modification
+time of the local file, each following line holds the number of a part the upload service has accepted. Lines are only
+ever appended, so a crash can at worst lose the last, partially written, line.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from .. import config
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+class UploadJournal:
+    """
+    On-disk record of one in-progress upload of a local file to a figshare article.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the journal file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_file(cls, article_id, file_name, directory=None):
+        """
+        Return the journal of the upload of a local file to an article.
+        :param article_id: id number of the figshare article the file is uploaded to.
+        :param file_name: Local path to the file.
+        :param directory: Directory holding the journals. Defaults to config.upload_journal_dir.
+        :return: UploadJournal.
+        """
+        if directory is None:
+            directory = config.upload_journal_dir
+        key = '{article_id}:{path}'.format(article_id=article_id, path=os.path.abspath(file_name))
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.journal'
+        return cls(os.path.join(directory, name))
+
+    def load(self, file_name=None):
+        """
+        Read the journal.
+        :param file_name: Optional local path to the file. If given, a journal recorded for a different size or
+                          modification time of the file is treated as stale and ignored.
+        :return: Dictionary with keys 'file_info', 'size', 'mtime_ns' and 'completed_parts', or None if there is no
+                 usable journal.
+        """
+        try:
+            with open(self.path, 'r') as fin:
+                lines = fin.read().splitlines()
+        except FileNotFoundError:
+            return None
+
+        try:
+            entry = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return None
+
+        completed_parts = set()
+        for line in lines[1:]:
+            try:
+                completed_parts.add(json.loads(line)['part'])
+            except (ValueError, KeyError, TypeError):
+                # The last line may have been cut short by a crash.
+                continue
+        entry['completed_parts'] = completed_parts
+
+        if file_name is not None:
+            stat = os.stat(file_name)
+            if stat.st_size != entry.get('size') or stat.st_mtime_ns != entry.get('mtime_ns'):
+                return None
+
+        return entry
+
+    def start(self, file_name, file_info):
+        """
+        Begin a new journal for an upload, replacing any previous one.
+        :param file_name: Local path to the file being uploaded.
+        :param file_info: figshare file_info returned by initiate_new_upload().
+        :return:
+        """
+        stat = os.stat(file_name)
+        entry = {'file_info': file_info, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            with open(self.path, 'w') as fout:
+                fout.write(json.dumps(entry) + '\n')
+                fout.flush()
+                os.fsync(fout.fileno())
+
+    def mark_part(self, part_no):
+        """
+        Record that a part has been accepted by the upload service.
+        :param part_no: Number of the uploaded part.
+        :return:
+        """
+        with self._lock:
+            with open(self.path, 'a') as fout:
+                fout.write(json.dumps({'part': part_no}) + '\n')
+                fout.flush()
+                os.fsync(fout.fileno())
+
+    def delete(self):
+        """
+        Remove the journal once the upload is complete, or abandoned.
+        :return:
+        """
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
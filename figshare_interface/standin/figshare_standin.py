@@ -0,0 +1,509 @@
+"""
+Figshare API Stand-in.
+
+A local, in-process imitation of the parts of the figshare v2 API that this package uses: the account, institution
+groups, projects, articles, files, the upload service, downloads, collections and search. Everything is held in memory
+and lost when the server stops. The stand-in does not check tokens, and only implements as much of each endpoint as
+the request layer and the figshare structures rely on.
+
+Every request can be slowed by a fixed latency, with optional random jitter, and a fraction of requests can be answered
+with an error status instead, to exercise retries.
+
+    with StandinServer(latency=0.02, error_rate=0.01) as server, server.use():
+        projects = Projects('any token')
+        ...
+"""
+
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .. import config
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def _now():
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+def _summary(item):
+    """The fields of an item returned in listings and search results."""
+    return {key: item[key] for key in ('id', 'title', 'url', 'modified_date', 'published_date') if key in item}
+
+
+def _page(items, params):
+    """Return one page of items, addressed by page/page_size or offset/limit, defaulting to the first 10."""
+    items = sorted(items, key=lambda item: item['id'])
+    if 'offset' in params or 'limit' in params:
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 10))
+        return items[offset:offset + limit]
+    page_size = int(params.get('page_size', 10))
+    page = int(params.get('page', 1))
+    return items[(page - 1) * page_size:page * page_size]
+
+
+class StandinState:
+    """
+    In-memory store of everything held by the stand-in.
+    """
+
+    def __init__(self, part_size=10485760):
+        """
+        :param part_size: Size in bytes of the parts the upload service splits files into.
+        """
+        self.lock = threading.RLock()
+        self.part_size = part_size
+        self.ids = itertools.count(1000)
+        self.projects = {}
+        self.articles = {}
+        self.files = {}
+        self.collections = {}
+        self.request_count = 0
+
+    def add_article(self, project_id, **fields):
+        """
+        Create an article directly, without a request, e.g. to seed a project for a benchmark.
+        :param project_id: id number of the project the article belongs to.
+        :param fields: Article metadata, e.g. title.
+        :return: id number of the article.
+        """
+        with self.lock:
+            article_id = next(self.ids)
+            self.articles[article_id] = dict(fields, id=article_id, project_id=project_id, modified_date=_now(),
+                                             files=[])
+        return article_id
+
+    def add_file(self, article_id, name, data):
+        """
+        Attach a file directly, without uploading it.
+        :param article_id: id number of the article.
+        :param name: File name.
+        :param data: bytes of the file.
+        :return: id number of the file.
+        """
+        with self.lock:
+            file_id = next(self.ids)
+            self.files[file_id] = {'id': file_id, 'name': name, 'size': len(data), 'status': 'available',
+                                   'supplied_md5': hashlib.md5(data).hexdigest(),
+                                   'computed_md5': hashlib.md5(data).hexdigest(),
+                                   'upload_token': 'token{id}'.format(id=file_id), 'data': bytearray(data),
+                                   'done': set(), 'article_id': article_id}
+            self.articles[article_id]['files'].append(file_id)
+        return file_id
+
+    def upload_parts(self, file):
+        """The upload service's list of parts of a file."""
+        parts = []
+        for part_no, start in enumerate(range(0, max(file['size'], 1), self.part_size), 1):
+            parts.append({'partNo': part_no, 'startOffset': start,
+                          'endOffset': min(start + self.part_size, file['size']) - 1,
+                          'status': 'COMPLETE' if part_no in file['done'] else 'PENDING', 'locked': False})
+        return parts
+
+    def file_by_token(self, upload_token):
+        for file in self.files.values():
+            if file['upload_token'] == upload_token:
+                return file
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    """
+    Request handler dispatching each request to the method of the first route matching its path.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, so without this each response waits on the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    routes = [
+        (r'/v2/account', {'GET': 'account'}),
+        (r'/v2/account/institution/groups', {'GET': 'groups'}),
+        (r'/v2/account/projects', {'GET': 'list_projects', 'POST': 'create_project'}),
+        (r'/v2/account/projects/search', {'POST': 'search_projects'}),
+        (r'/v2/account/projects/(\d+)', {'GET': 'project', 'PUT': 'project', 'DELETE': 'project'}),
+        (r'/v2/account/projects/(\d+)/collaborators', {'POST': 'invite'}),
+        (r'/v2/account/projects/(\d+)/articles', {'GET': 'project_articles', 'POST': 'project_articles'}),
+        (r'/v2/account/projects/(\d+)/articles/(\d+)', {'GET': 'project_article', 'DELETE': 'project_article'}),
+        (r'/v2/account/articles/search', {'POST': 'search_articles'}),
+        (r'/v2/account/articles/(\d+)', {'GET': 'article', 'PUT': 'article', 'DELETE': 'article'}),
+        (r'/v2/account/articles/(\d+)/publish', {'POST': 'publish'}),
+        (r'/v2/account/articles/(\d+)/files', {'GET': 'files', 'POST': 'files'}),
+        (r'/v2/account/articles/(\d+)/files/(\d+)', {'GET': 'file', 'POST': 'file', 'DELETE': 'file'}),
+        (r'/v2/articles/(\d+)', {'GET': 'article'}),
+        (r'/v2/account/collections', {'GET': 'collections', 'POST': 'collections'}),
+        (r'/v2/account/collections/search', {'POST': 'search_collections'}),
+        (r'/v2/collections/search', {'POST': 'search_collections'}),
+        (r'/v2/account/collections/(\d+)', {'GET': 'collection', 'PUT': 'collection', 'DELETE': 'collection'}),
+        (r'/v2/account/collections/(\d+)/(articles|authors|categories|references)',
+         {'GET': 'collection_items', 'POST': 'collection_items'}),
+        (r'/v2/account/collections/(\d+)/publish', {'POST': 'publish_collection'}),
+        (r'/upload/(\w+)', {'GET': 'upload'}),
+        (r'/upload/(\w+)/(\d+)', {'PUT': 'upload_part'}),
+        (r'/download/(\d+)', {'GET': 'download', 'HEAD': 'download'}),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self):
+        server = self.server
+        state = server.state
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+        parts = urlsplit(self.path)
+
+        with state.lock:
+            state.request_count += 1
+
+        if server.latency or server.latency_jitter:
+            time.sleep(server.latency + random.uniform(0, server.latency_jitter))
+        if server.error_rate and (server.error_methods is None or self.command in server.error_methods) and \
+                random.random() < server.error_rate:
+            return self.send(server.error_status, {'message': 'Injected error'}, headers={'Retry-After': '0'})
+
+        # Parameters may arrive in a JSON body or in the query string. Upload parts are raw bytes.
+        params = {}
+        if self.body and not parts.path.startswith('/upload/'):
+            try:
+                data = json.loads(self.body.decode('utf-8'))
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                params.update(data)
+        params.update({key: value[-1] for key, value in parse_qs(parts.query).items()})
+        self.params = params
+
+        for route, methods in self.routes:
+            match = re.fullmatch(route, parts.path)
+            if match and self.command in methods:
+                with state.lock:
+                    return getattr(self, 'r_' + methods[self.command])(state, *match.groups())
+        return self.send(404, {'message': 'Not found: {path}'.format(path=parts.path)})
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _dispatch
+
+    def send(self, status, obj=None, raw=None, headers=None):
+        body = raw if raw is not None else (b'' if obj is None else json.dumps(obj).encode('utf-8'))
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        if obj is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def url(self, path):
+        return 'http://{host}:{port}{path}'.format(host=self.server.server_address[0],
+                                                   port=self.server.server_address[1], path=path)
+
+    def created(self, path):
+        return self.send(201, {'location': self.url(path)})
+
+    def get_or_404(self, items, item_id, name):
+        item = items.get(int(item_id))
+        if item is None:
+            self.send(404, {'message': '{name} {id} not found'.format(name=name, id=item_id)})
+        return item
+
+    def send_entity(self, item):
+        # The ETag lets the response cache revalidate with If-None-Match.
+        etag = '"{id}-{date}"'.format(id=item['id'], date=item.get('modified_date', ''))
+        if self.headers.get('If-None-Match') == etag:
+            return self.send(304, headers={'ETag': etag})
+        return self.send(200, item, headers={'ETag': etag})
+
+    # Account.
+
+    def r_account(self, state):
+        return self.send(200, {'id': 1, 'first_name': 'Stand', 'last_name': 'In', 'email': 'standin@example.com'})
+
+    def r_groups(self, state):
+        return self.send(200, [{'id': 1, 'name': 'Stand-in group', 'parent_id': 0}])
+
+    # Projects.
+
+    def r_list_projects(self, state):
+        return self.send(200, _page([_summary(p) for p in state.projects.values()], self.params))
+
+    def r_create_project(self, state):
+        project_id = next(state.ids)
+        state.projects[project_id] = dict(self.params, id=project_id, modified_date=_now())
+        return self.created('/v2/account/projects/{id}'.format(id=project_id))
+
+    def r_search_projects(self, state):
+        search = self.params.get('search_for', '')
+        return self.send(200, [_summary(p) for p in state.projects.values() if search in p.get('title', '')])
+
+    def r_project(self, state, project_id):
+        project = self.get_or_404(state.projects, project_id, 'Project')
+        if project is None:
+            return
+        if self.command == 'GET':
+            return self.send_entity(project)
+        if self.command == 'PUT':
+            project.update(self.params, modified_date=_now())
+            return self.send(205)
+        del state.projects[project['id']]
+        return self.send(204)
+
+    def r_invite(self, state, project_id):
+        return self.send(201, {'message': 'Invitation sent'})
+
+    def r_project_articles(self, state, project_id):
+        project_id = int(project_id)
+        if self.command == 'GET':
+            articles = [_summary(a) for a in state.articles.values() if a['project_id'] == project_id]
+            return self.send(200, _page(articles, self.params))
+        article_id = state.add_article(project_id, **self.params)
+        state.articles[article_id]['url'] = self.url('/v2/account/articles/{id}'.format(id=article_id))
+        return self.created('/v2/account/projects/{project_id}/articles/{id}'.format(project_id=project_id,
+                                                                                     id=article_id))
+
+    def r_project_article(self, state, project_id, article_id):
+        article = self.get_or_404(state.articles, article_id, 'Article')
+        if article is None:
+            return
+        if self.command == 'GET':
+            return self.send_entity(article)
+        del state.articles[article['id']]
+        return self.send(204)
+
+    # Articles.
+
+    def r_search_articles(self, state):
+        search = self.params.get('search_for', '')
+        articles = [_summary(a) for a in state.articles.values() if search in a.get('title', '')]
+        return self.send(200, _page(articles, self.params))
+
+    def r_article(self, state, article_id):
+        article = self.get_or_404(state.articles, article_id, 'Article')
+        if article is None:
+            return
+        if self.command == 'GET':
+            return self.send_entity(article)
+        if self.command == 'PUT':
+            article.update(self.params, modified_date=_now())
+            return self.send(205)
+        del state.articles[article['id']]
+        return self.send(204)
+
+    def r_publish(self, state, article_id):
+        article = self.get_or_404(state.articles, article_id, 'Article')
+        if article is None:
+            return
+        article['published_date'] = _now()
+        return self.created('/v2/articles/{id}'.format(id=article['id']))
+
+    # Files and the upload service.
+
+    def file_info(self, file):
+        info = {key: file[key] for key in ('id', 'name', 'size', 'status', 'computed_md5', 'supplied_md5',
+                                           'upload_token')}
+        info['upload_url'] = self.url('/upload/{token}'.format(token=file['upload_token']))
+        info['download_url'] = self.url('/download/{id}'.format(id=file['id']))
+        return info
+
+    def r_files(self, state, article_id):
+        article = self.get_or_404(state.articles, article_id, 'Article')
+        if article is None:
+            return
+        if self.command == 'GET':
+            return self.send(200, [self.file_info(state.files[f]) for f in article['files']])
+        file_id = next(state.ids)
+        size = int(self.params['size'])
+        state.files[file_id] = {'id': file_id, 'name': self.params['name'], 'size': size, 'status': 'created',
+                                'supplied_md5': self.params.get('md5'), 'computed_md5': '',
+                                'upload_token': 'token{id}'.format(id=file_id), 'data': bytearray(size),
+                                'done': set(), 'article_id': article['id']}
+        article['files'].append(file_id)
+        return self.created('/v2/account/articles/{article_id}/files/{id}'.format(article_id=article['id'],
+                                                                                  id=file_id))
+
+    def r_file(self, state, article_id, file_id):
+        file = self.get_or_404(state.files, file_id, 'File')
+        if file is None:
+            return
+        if self.command == 'GET':
+            return self.send(200, self.file_info(file))
+        if self.command == 'DELETE':
+            state.articles[file['article_id']]['files'].remove(file['id'])
+            del state.files[file['id']]
+            return self.send(204)
+        # Completing the upload.
+        file['computed_md5'] = hashlib.md5(file['data']).hexdigest()
+        file['status'] = 'available'
+        return self.send(202)
+
+    def r_upload(self, state, upload_token):
+        file = state.file_by_token(upload_token)
+        if file is None:
+            return self.send(404, {'message': 'Upload not found'})
+        return self.send(200, {'token': upload_token, 'size': file['size'], 'status': 'PENDING',
+                               'parts': state.upload_parts(file)})
+
+    def r_upload_part(self, state, upload_token, part_no):
+        file = state.file_by_token(upload_token)
+        if file is None:
+            return self.send(404, {'message': 'Upload not found'})
+        part = state.upload_parts(file)[int(part_no) - 1]
+        if len(self.body) != part['endOffset'] - part['startOffset'] + 1:
+            return self.send(400, {'message': 'Part {n} has the wrong length'.format(n=part_no)})
+        file['data'][part['startOffset']:part['endOffset'] + 1] = self.body
+        file['done'].add(int(part_no))
+        return self.send(200)
+
+    def r_download(self, state, file_id):
+        file = self.get_or_404(state.files, file_id, 'File')
+        if file is None:
+            return
+        data = bytes(file['data'])
+        byte_range = self.headers.get('Range')
+        if byte_range and self.server.ranges:
+            match = re.fullmatch(r'bytes=(\d+)-(\d*)', byte_range)
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else len(data) - 1, len(data) - 1)
+            if start >= len(data):
+                return self.send(416, headers={'Content-Range': 'bytes */{size}'.format(size=len(data))})
+            return self.send(206, raw=data[start:end + 1], headers={
+                'Content-Range': 'bytes {start}-{end}/{size}'.format(start=start, end=end, size=len(data)),
+                'Accept-Ranges': 'bytes'})
+        return self.send(200, raw=data, headers={'Accept-Ranges': 'bytes'} if self.server.ranges else None)
+
+    # Collections.
+
+    def r_collections(self, state):
+        if self.command == 'GET':
+            return self.send(200, _page([_summary(c) for c in state.collections.values()], self.params))
+        collection_id = next(state.ids)
+        state.collections[collection_id] = dict(self.params, id=collection_id, modified_date=_now(),
+                                                articles=list(self.params.get('articles', [])))
+        return self.created('/v2/account/collections/{id}'.format(id=collection_id))
+
+    def r_search_collections(self, state):
+        search = self.params.get('search_for', '')
+        return self.send(200, [_summary(c) for c in state.collections.values() if search in c.get('title', '')])
+
+    def r_collection(self, state, collection_id):
+        collection = self.get_or_404(state.collections, collection_id, 'Collection')
+        if collection is None:
+            return
+        if self.command == 'GET':
+            return self.send_entity(dict(collection, articles_count=len(collection['articles'])))
+        if self.command == 'PUT':
+            collection.update(self.params, modified_date=_now())
+            return self.send(205)
+        del state.collections[collection['id']]
+        return self.send(204)
+
+    def r_collection_items(self, state, collection_id, key):
+        collection = self.get_or_404(state.collections, collection_id, 'Collection')
+        if collection is None:
+            return
+        if self.command == 'GET':
+            if key != 'articles':
+                return self.send(200, collection.get(key, []))
+            articles = [_summary(state.articles[a]) for a in collection['articles'] if a in state.articles]
+            return self.send(200, _page(articles, self.params))
+        collection.setdefault(key, []).extend(self.params.get(key) or self.params.get('figshare_' + key) or [])
+        collection['modified_date'] = _now()
+        return self.send(201, {'location': self.url(self.path)})
+
+    def r_publish_collection(self, state, collection_id):
+        collection = self.get_or_404(state.collections, collection_id, 'Collection')
+        if collection is None:
+            return
+        collection['published_date'] = _now()
+        return self.created('/v2/collections/{id}'.format(id=collection['id']))
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server running the stand-in on a local port.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, latency_jitter=0.0, error_rate=0.0, error_status=503,
+                 error_methods=None, part_size=10485760, ranges=True):
+        """
+        :param host: Interface to listen on.
+        :param port: Port to listen on. 0 picks a free port.
+        :param latency: Seconds every request is delayed by.
+        :param latency_jitter: Up to this many further seconds, chosen at random, are added to each delay.
+        :param error_rate: Fraction of requests, between 0 and 1, answered with error_status instead.
+        :param error_status: Status code of injected errors.
+        :param error_methods: HTTP methods errors are injected into, e.g. only those that are retried. All if None.
+        :param part_size: Size in bytes of the parts the upload service splits files into.
+        :param ranges: If False, Range headers on downloads are ignored and the whole file is always sent.
+        """
+        super().__init__((host, port), _StandinHandler)
+        self.state = StandinState(part_size=part_size)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_methods = error_methods
+        self.ranges = ranges
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """The stand-in's equivalent of the Staging_url or Live_url in the config file."""
+        return 'http://{host}:{port}/v2'.format(host=self.server_address[0], port=self.server_address[1])
+
+    def start(self):
+        """
+        Serve requests on a background thread.
+        :return: The server.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket.
+        :return:
+        """
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @contextmanager
+    def use(self):
+        """
+        Point the package at the stand-in, instead of the figshare site in the config file, for the duration of a
+        with block.
+        """
+        previous = config.base_url
+        config.base_url = self.base_url + '/{endpoint}'
+        try:
+            yield self
+        finally:
+            config.base_url = previous
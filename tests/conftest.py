@@ -0,0 +1,55 @@
+"""
+Shared fixtures: a figshare stand-in the package is pointed at, with quiet output, fast retries and scratch
+directories instead of the user's home.
+"""
+
+import pytest
+
+from figshare_interface import config
+from figshare_interface.standin.figshare_standin import StandinServer
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'verbose', False)
+    monkeypatch.setattr(config, 'retry_backoff_factor', 0.001)
+    monkeypatch.setattr(config, 'retry_max_backoff', 0.01)
+    monkeypatch.setattr(config, 'upload_journal_dir', str(tmp_path / 'journals'))
+    monkeypatch.setattr(config, 'hash_cache_enabled', False)
+    monkeypatch.setattr(config, 'response_cache_enabled', False)
+    monkeypatch.setattr(config, 'coalesce_requests', False)
+    monkeypatch.setattr(config, 'lean', False)
+
+
+@pytest.fixture
+def standin():
+    with StandinServer() as server, server.use():
+        yield server
+
+
+def download_url(server, file_id):
+    """The url the stand-in serves a file's content from."""
+    return '{base}/download/{id}'.format(base=server.base_url[:-len('/v2')], id=file_id)
+
+
+def new_article(server, title='Article', files=()):
+    """
+    Seed a project holding one article.
+    :param files: (name, bytes) pairs attached to the article.
+    :return: Tuple of the project id, the article id and the file ids.
+    """
+    state = server.state
+    project_id = next(state.ids)
+    state.projects[project_id] = {'id': project_id, 'title': 'Project {id}'.format(id=project_id),
+                                  'modified_date': '2020'}
+    article_id = state.add_article(project_id, title=title)
+    file_ids = [state.add_file(article_id, name, data) for name, data in files]
+    return project_id, article_id, file_ids
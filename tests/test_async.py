@@ -0,0 +1,114 @@
+"""
+Tests of the asyncio projects and collections against the figshare stand-in, checked against their blocking
+counterparts.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from requests.exceptions import HTTPError
+
+from conftest import new_article
+from figshare_interface.figshare_structures.projects import Projects
+from figshare_interface.figshare_structures.async_projects import AsyncProjects
+from figshare_interface.figshare_structures.async_collections import AsyncCollections
+from figshare_interface.http_requests.async_figshare_requests import close_client_session, issue_request
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def run(coroutine):
+    """Run a coroutine on a new event loop, closing the shared aiohttp session before the loop goes."""
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await close_client_session()
+
+    return asyncio.run(main())
+
+
+def test_list_articles_pages_like_the_blocking_api(standin):
+    project_id, _, _ = new_article(standin, title='Article 0')
+    for n in range(1, 12):
+        standin.state.add_article(project_id, title='Article {n}'.format(n=n))
+
+    articles = run(AsyncProjects('token').list_articles(project_id, page_size=5))
+
+    assert articles == Projects('token').list_articles(project_id, page_size=5)
+    assert len(articles) == 12
+
+
+def test_create_article_checks_titles_against_the_index(standin):
+    project_id, _, _ = new_article(standin, title='Existing')
+    projects = AsyncProjects('token')
+
+    async def create_two():
+        article_id = await projects.create_article(project_id, {'title': 'New article'})
+        before = standin.state.request_count
+        second_id = await projects.create_article(project_id, {'title': 'Another article'})
+        return article_id, second_id, standin.state.request_count - before
+
+    article_id, second_id, requests_sent = run(create_two())
+
+    # The articles were listed once, for the first creation. The second only creates and fetches the article.
+    assert requests_sent == 2
+    assert standin.state.articles[second_id]['title'] == 'Another article'
+    with pytest.raises(FileExistsError):
+        run(projects.create_article(project_id, {'title': 'New article'}))
+
+
+def test_article_delete_returns_the_error_body_like_the_blocking_api(standin):
+    project_id, _, _ = new_article(standin)
+
+    message = run(AsyncProjects('token').article_delete(project_id, 999))
+
+    assert message == Projects('token').article_delete(project_id, 999)
+    assert 'Article 999 not found' in message
+
+
+def test_delete_prompts_off_the_event_loop(standin, monkeypatch):
+    project_id, _, _ = new_article(standin)
+    prompted = []
+
+    def answer(prompt):
+        prompted.append(threading.current_thread())
+        return 'y'
+
+    monkeypatch.setattr('builtins.input', answer)
+    run(AsyncProjects('token').delete(project_id))
+
+    assert prompted and prompted[0] is not threading.main_thread()
+    assert project_id not in standin.state.projects
+
+
+def test_failed_requests_raise_the_blocking_http_error(standin):
+    with pytest.raises(HTTPError) as error:
+        run(issue_request('GET', 'account/projects/999', token='token'))
+
+    assert error.value.response.status_code == 404
+    assert 'Project 999 not found' in error.value.response.text
+
+
+def test_collection_delete_prompts_off_the_event_loop(standin, monkeypatch):
+    collection_id = next(standin.state.ids)
+    standin.state.collections[collection_id] = {'id': collection_id, 'title': 'Collection', 'articles': [],
+                                                'modified_date': '2020'}
+    prompted = []
+
+    def answer(prompt):
+        prompted.append(threading.current_thread())
+        return 'yes'
+
+    monkeypatch.setattr('builtins.input', answer)
+    run(AsyncCollections('token').delete(collection_id))
+
+    assert prompted and prompted[0] is not threading.main_thread()
+    assert collection_id not in standin.state.collections
@@ -0,0 +1,87 @@
+"""
+Tests of bulk operations and their reports against the figshare stand-in.
+"""
+
+import time
+
+from requests.exceptions import HTTPError
+
+from figshare_interface.figshare_structures.projects import Projects
+from figshare_interface.http_requests.bulk import run_bulk
+from figshare_interface.http_requests.figshare_requests import issue_request
+from figshare_interface.http_requests.rate_limit import RateLimiter
+
+from conftest import new_article
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def test_report_keeps_the_order_and_the_errors_of_the_items():
+    def invert(n):
+        return 1 / n
+
+    report = run_bulk(invert, [1, 0, 4], workers=3, rate=0)
+
+    assert [entry['item'] for entry in report] == [1, 0, 4]
+    assert [entry['result'] for entry in report] == [1, None, 0.25]
+    assert report[0]['error'] is None and isinstance(report[1]['error'], ZeroDivisionError)
+
+
+def test_rate_limiter_spaces_out_requests_after_the_burst():
+    limiter = RateLimiter(rate=50, burst=2)
+
+    started = time.perf_counter()
+    for _ in range(7):
+        limiter.acquire()
+
+    # Two at once, then one every 1/50 s.
+    assert time.perf_counter() - started >= 5 / 50 * 0.9
+
+
+def test_requests_of_a_batch_share_the_rate_limit(standin):
+    started = time.perf_counter()
+    report = run_bulk(lambda _: issue_request('GET', 'account', token='token'), range(6), workers=6, rate=20, burst=1)
+
+    assert all(entry['error'] is None for entry in report)
+    assert time.perf_counter() - started >= 5 / 20 * 0.9
+
+
+def test_bulk_create_refuses_duplicate_titles_within_the_batch(standin):
+    project_id, _, _ = new_article(standin, title='Existing')
+    articles = [{'title': 'New'}, {'title': 'Existing'}, {'title': 'New'}, {'title': 'Other'}]
+
+    report = Projects('token').bulk_create_articles(project_id, articles, rate=0)
+
+    errors = [type(entry['error']) if entry['error'] else None for entry in report]
+    assert errors.count(None) == 2 and errors.count(FileExistsError) == 2
+    assert report[1]['error'] is not None
+    titles = sorted(a['title'] for a in standin.state.articles.values() if a['project_id'] == project_id)
+    assert titles == ['Existing', 'New', 'Other']
+
+
+def test_bulk_delete_reports_the_http_error_of_a_failed_item(standin):
+    project_id, article_id, _ = new_article(standin)
+
+    report = Projects('token').bulk_delete_articles(project_id, [article_id, 999], rate=0)
+
+    assert report[0]['error'] is None and article_id not in standin.state.articles
+    assert isinstance(report[1]['error'], HTTPError)
+    assert report[1]['error'].response.status_code == 404
+
+
+def test_bulk_update_renames_articles_in_the_title_index(standin):
+    project_id, article_id, _ = new_article(standin, title='Before')
+    projects = Projects('token')
+    assert 'Before' in projects.article_titles(project_id)
+
+    report = projects.bulk_update_articles([(article_id, {'title': 'After'})], rate=0)
+
+    assert report[0]['error'] is None
+    assert standin.state.articles[article_id]['title'] == 'After'
+    assert 'After' in projects.article_titles(project_id) and 'Before' not in projects.article_titles(project_id)
@@ -0,0 +1,67 @@
+"""
+Tests of download_file against the figshare stand-in: ranged downloads, retried ranges and the whole-file fallbacks.
+"""
+
+import os
+import random
+
+from figshare_interface.http_requests.figshare_requests import download_file
+from figshare_interface.standin import figshare_standin
+
+from conftest import download_url, new_article
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+DATA = os.urandom(1000)
+
+
+def _download(server, tmp_path, data=DATA, **kwargs):
+    _, _, (file_id,) = new_article(server, files=[('data.bin', data)])
+    local_filename = str(tmp_path / 'data.bin')
+    status = download_file(download_url(server, file_id), local_filename, 'token', **kwargs)
+    with open(local_filename, 'rb') as fin:
+        return status, fin.read()
+
+
+def test_ranged_download(standin, tmp_path):
+    before = standin.state.request_count
+    assert _download(standin, tmp_path, range_size=100, workers=4) == (200, DATA)
+    # The probe, then the nine other ranges.
+    assert standin.state.request_count - before == 10
+
+
+def test_ranges_are_retried_on_their_own(standin, tmp_path):
+    random.seed(0)
+    standin.error_rate = 0.3
+    assert _download(standin, tmp_path, range_size=100, workers=4) == (200, DATA)
+
+
+def test_empty_file(standin, tmp_path):
+    assert _download(standin, tmp_path, data=b'', range_size=100) == (200, b'')
+
+
+def test_server_without_ranges_sends_the_whole_file(tmp_path):
+    with figshare_standin.StandinServer(ranges=False) as server, server.use():
+        before = server.state.request_count
+        assert _download(server, tmp_path, range_size=100) == (200, DATA)
+        assert server.state.request_count - before == 1
+
+
+class _UnknownTotalHandler(figshare_standin._StandinHandler):
+    """Answers ranges with the total size of the file left out, as 'bytes 0-99/*'."""
+
+    def send(self, status, obj=None, raw=None, headers=None):
+        if headers and 'Content-Range' in headers:
+            headers = dict(headers, **{'Content-Range': headers['Content-Range'].rsplit('/', 1)[0] + '/*'})
+        return super().send(status, obj=obj, raw=raw, headers=headers)
+
+
+def test_range_of_unknown_total_fetches_the_whole_file(standin, tmp_path):
+    standin.RequestHandlerClass = _UnknownTotalHandler
+    assert _download(standin, tmp_path, range_size=10) == (200, DATA)
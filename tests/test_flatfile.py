@@ -0,0 +1,130 @@
+"""
+Tests of the Omicron flat file parser on small synthetic topography files.
+"""
+
+import io
+import os
+import struct
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from figshare_interface.file_parsers import flatfile_3, flatfile_stream
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def _string(text):
+    if not text:
+        return struct.pack('<i', 0)
+    return struct.pack('<i', len(text)) + text.encode('utf-16-le')
+
+
+def _int(value):
+    return struct.pack('<i', value)
+
+
+def _double(value):
+    return struct.pack('<d', value)
+
+
+def _axis(name, clock):
+    return (_string(name) + _string('X') + _string('m') + _int(clock) + _int(0) + _int(1) + _double(0.0) +
+            _double(1e-10) + _int(0) + _int(0))
+
+
+def _topography(columns, rows):
+    """The bytes of a flat file holding one forward topography image of random raw values."""
+    data = np.random.default_rng(0).integers(-2 ** 31, 2 ** 31 - 1, columns * rows)
+    out = b'FLAT0100' + _int(2) + _axis('X', columns) + _axis('Y', rows)
+    out += (_string('Z') + _string('TFF_Linear1D') + _string('m') + _int(2) + _string('Offset') + _double(3.0) +
+            _string('Factor') + _double(7.5))
+    out += _int(1) + _int(3) + struct.pack('<q', 1500000000) + _string('comment')
+    out += _int(columns * rows) + _int(columns * rows) + np.asarray(data, dtype='<i4').tobytes()
+    out += _int(0)
+    for text in ['Exp', '1.0', 'desc', 'spec', 'creator', 'MATRIX V3.0', 'user', 'account', 'rspec']:
+        out += _string(text)
+    out += _int(3) + _int(7)
+    # Experiment elements, with the parameters read into the info, then no deployment parameters.
+    out += _int(2)
+    for element, parameter, unit, value in [('Regulator', 'Setpoint_1', 'A', '1e-10'),
+                                            ('GapVoltageControl', 'Voltage', 'V', '1.5')]:
+        out += _string(element) + _int(1) + _string(parameter) + _int(2) + _string(unit) + _string(value)
+    out += _int(0)
+    return out
+
+
+class _Pipe(io.RawIOBase):
+    """A binary stream that can not seek."""
+
+    def __init__(self, content):
+        self.content = io.BytesIO(content)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.content.readinto(buffer)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'topography.flat'
+    path.write_bytes(_topography(1024, 1024))
+    return str(path)
+
+
+def test_scan_of_a_non_seekable_stream_drops_the_data_block(path):
+    with open(path, 'rb') as fin:
+        pipe = _Pipe(fin.read())
+    tracemalloc.start()
+    try:
+        info = flatfile_stream.scan('topography.flat', pipe)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert info['filename'] == 'topography.flat'
+    assert info['comment'] == flatfile_3.scan(path)['comment']
+    assert pipe.content.tell() == len(pipe.content.getvalue())
+    # The 4 MB data block is read and dropped a chunk at a time, never held whole.
+    assert peak < 1048576
+
+
+def test_eager_load_closes_the_file(path):
+    ff = flatfile_3.FlatFile(path)
+    assert ff.buffer is None and ff._mapping is None and ff.stream is None
+    assert ff.getData()[0].data.shape == (1024, 1024)
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='Needs /proc to count open files.')
+def test_loading_many_files_does_not_leak_file_handles(path):
+    flatfile_3.load(path)
+    opened = len(os.listdir('/proc/self/fd'))
+    for _ in range(50):
+        flatfile_3.load(path)
+        flatfile_3.scan(path)
+    assert len(os.listdir('/proc/self/fd')) == opened
+
+
+@pytest.mark.parametrize('mode', ['memmap', 'lazy'])
+def test_close_releases_a_mapped_file(path, mode):
+    expected = flatfile_3.load(path)[0].data
+    with flatfile_3.FlatFile(path, **{mode: True}) as ff:
+        data_array = ff.getData()[0]
+        assert np.array_equal(np.asarray(data_array.data[:10]), expected[:10])
+        assert ff._mapping is not None
+    assert ff._mapping is None and ff.buffer is None
+    if mode == 'memmap':
+        # A PhysicalView can not outlive the mapping.
+        assert data_array.data is None
+    else:
+        # Lazy data read before closing was converted in memory, and is kept.
+        assert np.array_equal(data_array.data, expected)
@@ -0,0 +1,78 @@
+"""
+Tests of lean mode, which skips the follow-up GETs after creating or changing an item, against the figshare stand-in.
+"""
+
+from figshare_interface import config
+from figshare_interface.figshare_structures.projects import Projects
+from figshare_interface.http_requests.lazy_info import LazyInfo, location_id
+
+from conftest import new_article
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def test_lazy_info_only_fetches_for_unknown_keys():
+    fetched = []
+
+    def fetch():
+        fetched.append(1)
+        return {'id': 1, 'title': 'Full', 'size': 10}
+
+    info = LazyInfo(fetch, {'id': 1, 'title': 'Known'})
+    assert info['id'] == 1 and info['title'] == 'Known' and not info.loaded
+    assert info['size'] == 10 and info.loaded
+    # Once fetched, the full information is used for every key.
+    assert info['title'] == 'Full' and dict(info) == {'id': 1, 'title': 'Full', 'size': 10}
+    assert len(fetched) == 1
+
+
+def test_location_id():
+    assert location_id('https://api.figshare.com/v2/account/articles/123') == 123
+    assert location_id('https://api.figshare.com/v2/account/projects/45/') == 45
+
+
+def test_lean_create_sends_no_follow_up_get(standin):
+    projects = Projects('token')
+    projects.project_titles()
+
+    before = standin.state.request_count
+    project = projects.create('Lean project', 'Description', 'Funding', 1, lean=True)
+    assert standin.state.request_count - before == 1
+
+    assert project['title'] == 'Lean project' and project['id'] in standin.state.projects
+    assert standin.state.request_count - before == 1
+    assert project['modified_date'] == standin.state.projects[project['id']]['modified_date']
+    assert standin.state.request_count - before == 2
+
+
+def test_lean_article_creation_takes_the_id_from_the_location(standin):
+    project_id, _, _ = new_article(standin)
+    projects = Projects('token')
+    projects.article_titles(project_id)
+
+    before = standin.state.request_count
+    article_id = projects.create_article(project_id, {'title': 'Lean article'}, lean=True)
+
+    assert standin.state.request_count - before == 1
+    assert standin.state.articles[article_id]['title'] == 'Lean article'
+
+
+def test_lean_mode_follows_the_config(standin, monkeypatch):
+    project_id, _, _ = new_article(standin)
+    projects = Projects('token')
+
+    monkeypatch.setattr(config, 'lean', True)
+    before = standin.state.request_count
+    project = projects.update(project_id, title='Renamed')
+    assert isinstance(project, LazyInfo) and project['title'] == 'Renamed'
+    # The duplicate check lists the projects, then the update is sent.
+    assert standin.state.request_count - before == 2
+
+    monkeypatch.setattr(config, 'lean', False)
+    assert not isinstance(projects.update(project_id, funding='Funding'), LazyInfo)
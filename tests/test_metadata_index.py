@@ -0,0 +1,67 @@
+"""
+Tests of the local metadata index against the figshare stand-in.
+"""
+
+import pytest
+
+from figshare_interface import config
+from figshare_interface.standin.figshare_standin import StandinServer
+from figshare_interface.figshare_structures.metadata_index import MetadataIndex
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # Small pages, so that a handful of items spans several of them.
+    monkeypatch.setattr(config, 'page_size', 4)
+    monkeypatch.setattr(config, 'verbose', False)
+    with StandinServer() as server, server.use():
+        yield server
+
+
+def test_sync_lists_every_page_of_projects(server):
+    state = server.state
+    project_ids = []
+    for n in range(15):
+        project_id = next(state.ids)
+        state.projects[project_id] = {'id': project_id, 'title': 'Project {n}'.format(n=n), 'modified_date': '2020'}
+        project_ids.append(project_id)
+    state.add_article(project_ids[-1], title='Last article', custom_fields=[{'name': 'vgap', 'value': '1.5'}])
+
+    index = MetadataIndex('token', path=':memory:')
+    assert index.sync(collections=False)['projects'] == 15
+    assert all(index.get_project(project_id) is not None for project_id in project_ids)
+    assert index.article_exists(project_ids[-1], 'Last article')
+
+    # A second sync must not take the projects beyond the first page for deleted.
+    counts = index.sync(collections=False)
+    assert counts['articles_removed'] == 0
+    assert index.article_exists(project_ids[-1], 'Last article')
+    assert [article['title'] for article in index.find_by_custom_field('vgap', '>', 1)] == ['Last article']
+
+
+def test_sync_lists_every_page_of_collections(server):
+    state = server.state
+    project_id = next(state.ids)
+    state.projects[project_id] = {'id': project_id, 'title': 'Project', 'modified_date': '2020'}
+    members = {}
+    for n in range(12):
+        article_id = state.add_article(project_id, title='Article {n}'.format(n=n))
+        collection_id = next(state.ids)
+        state.collections[collection_id] = {'id': collection_id, 'title': 'Collection {n}'.format(n=n),
+                                            'modified_date': '2020', 'articles': [article_id]}
+        members[collection_id] = article_id
+
+    index = MetadataIndex('token', path=':memory:')
+    assert index.sync()['collections'] == 12
+    counts = index.sync()
+    assert counts['collections_removed'] == 0
+    for collection_id, article_id in members.items():
+        assert [article['id'] for article in index.get_articles(collection_id)] == [article_id]
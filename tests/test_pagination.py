@@ -0,0 +1,122 @@
+"""
+Tests of paginated listings against the figshare stand-in.
+"""
+
+import json
+import time
+
+from figshare_interface.figshare_structures.projects import Projects
+from figshare_interface.standin import figshare_standin
+
+from conftest import new_article
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def _project(server, n):
+    """Seed a project holding n articles, titled by their number."""
+    project_id, _, _ = new_article(server, title='Article 0')
+    for i in range(1, n):
+        server.state.add_article(project_id, title='Article {i}'.format(i=i))
+    return project_id
+
+
+def _titles(articles):
+    return [article['title'] for article in articles]
+
+
+def test_every_page_is_listed_until_a_short_one(standin):
+    project_id = _project(standin, 12)
+
+    before = standin.state.request_count
+    articles = Projects('token').list_articles(project_id, page_size=5)
+
+    assert _titles(articles) == ['Article {i}'.format(i=i) for i in range(12)]
+    assert standin.state.request_count - before == 3
+
+
+def test_a_full_last_page_is_followed_by_an_empty_one(standin):
+    project_id = _project(standin, 10)
+
+    before = standin.state.request_count
+    assert len(Projects('token').list_articles(project_id, page_size=5)) == 10
+    assert standin.state.request_count - before == 3
+
+
+def test_closing_early_stops_the_requests(standin):
+    project_id = _project(standin, 50)
+    standin.latency = 0.05
+
+    before = standin.state.request_count
+    articles = Projects('token').iter_articles(project_id, page_size=5)
+    assert _titles(next(articles) for _ in range(3)) == ['Article 0', 'Article 1', 'Article 2']
+    articles.close()
+    time.sleep(4 * standin.latency)
+
+    # The first page, and at most the next one, fetched in the background.
+    assert standin.state.request_count - before <= 2
+
+
+def test_without_prefetch_pages_are_only_fetched_when_reached(standin):
+    project_id = _project(standin, 50)
+
+    before = standin.state.request_count
+    articles = Projects('token').iter_articles(project_id, page_size=5, prefetch=False)
+    for _ in range(5):
+        next(articles)
+    assert standin.state.request_count - before == 1
+    next(articles)
+    assert standin.state.request_count - before == 2
+    articles.close()
+
+
+class _RecordingHandler(figshare_standin._StandinHandler):
+    """Records the path and JSON body of every request."""
+
+    def _dispatch(self):
+        try:
+            return super()._dispatch()
+        finally:
+            self.server.seen.append((self.command, self.path, json.loads(self.body) if self.body else None))
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _dispatch
+
+
+def test_listings_page_in_the_query_string_and_searches_in_the_body(standin):
+    standin.seen = []
+    standin.RequestHandlerClass = _RecordingHandler
+    project_id = _project(standin, 3)
+
+    Projects('token').list_articles(project_id, page_size=5)
+    Projects('token').search_articles('Article', page_size=5)
+
+    assert standin.seen == [
+        ('GET', '/v2/account/projects/{id}/articles?page=1&page_size=5'.format(id=project_id), None),
+        ('POST', '/v2/account/articles/search', {'search_for': 'Article', 'page': 1, 'page_size': 5})]
+
+
+def test_offset_and_limit(standin):
+    project_id = _project(standin, 12)
+
+    articles = Projects('token').list_articles(project_id, page_size=4, offset=3)
+
+    assert _titles(articles) == ['Article {i}'.format(i=i) for i in range(3, 12)]
+
+
+def test_known_totals_are_fetched_concurrently_and_in_order(standin):
+    project_id = _project(standin, 50)
+    standin.latency = 0.1
+
+    started = time.perf_counter()
+    articles = Projects('token').list_articles(project_id, page_size=5, total=50)
+    elapsed = time.perf_counter() - started
+
+    assert _titles(articles) == ['Article {i}'.format(i=i) for i in range(50)]
+    # Eleven pages, the last one empty, one after another would take at least eleven times the latency.
+    assert elapsed < 8 * standin.latency
@@ -0,0 +1,91 @@
+"""
+Tests of the GET response cache, on its own and against the figshare stand-in.
+"""
+
+from figshare_interface import config
+from figshare_interface.http_requests.figshare_requests import issue_request
+from figshare_interface.http_requests.response_cache import ResponseCache
+
+from conftest import new_article
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+TTLS = {'account/projects': 60, 'account/projects/{id}': 60, 'account/projects/{id}/articles/{id}': 60}
+
+
+def get(endpoint, cache, token='token'):
+    return issue_request('GET', endpoint, token=token, cache=cache)
+
+
+def config_url(endpoint):
+    return config.base_url.format(endpoint=endpoint)
+
+
+def test_fresh_responses_are_served_from_the_cache(standin):
+    project_id, _, _ = new_article(standin)
+    cache = ResponseCache(ttls=TTLS)
+    endpoint = 'account/projects/{id}'.format(id=project_id)
+
+    before = standin.state.request_count
+    first = get(endpoint, cache)
+    first['title'] = 'Changed by the caller'
+    assert get(endpoint, cache)['title'] == 'Project {id}'.format(id=project_id)
+    assert standin.state.request_count - before == 1
+
+    # Other tokens do not share the response.
+    get(endpoint, cache, token='other')
+    assert standin.state.request_count - before == 2
+
+
+def test_stale_responses_are_revalidated_with_their_etag(standin):
+    project_id, _, _ = new_article(standin)
+    cache = ResponseCache(ttls={'account/projects/{id}': 0})
+    endpoint = 'account/projects/{id}'.format(id=project_id)
+    get(endpoint, cache)
+
+    # Left with its ETag unchanged, so the stand-in answers 304 and the cached response is used.
+    standin.state.projects[project_id]['title'] = 'Changed behind the ETag'
+    before = standin.state.request_count
+    assert get(endpoint, cache)['title'] == 'Project {id}'.format(id=project_id)
+    assert standin.state.request_count - before == 1
+
+    standin.state.projects[project_id]['modified_date'] = '2021'
+    assert get(endpoint, cache)['title'] == 'Changed behind the ETag'
+
+
+def test_writes_drop_the_entity_and_its_listing(standin):
+    project_id, article_id, _ = new_article(standin)
+    cache = ResponseCache(ttls=TTLS)
+    project = 'account/projects/{id}'.format(id=project_id)
+    article = 'account/projects/{project_id}/articles/{id}'.format(project_id=project_id, id=article_id)
+    listing = get('account/projects', cache)
+    get(project, cache)
+    get(article, cache)
+
+    issue_request('PUT', project, data={'title': 'Renamed'}, token='token', cache=cache)
+    assert get(project, cache)['title'] == 'Renamed'
+    assert get('account/projects', cache) != listing
+    # The article holds the project's id, so it was dropped too.
+    assert cache.lookup(cache.key(config_url(article), token='token')) is None
+
+    issue_request('POST', 'account/projects', data={'title': 'Another'}, token='token', cache=cache)
+    assert len(get('account/projects', cache)) == 2
+
+
+def test_least_recently_used_responses_are_evicted():
+    cache = ResponseCache(max_entries=2, ttls={'a/{id}': 60})
+    urls = [config_url('a/{n}'.format(n=n)) for n in range(3)]
+    for url in urls[:2]:
+        cache.store(cache.key(url), url, {'url': url})
+    cache.lookup(cache.key(urls[0]))
+    cache.store(cache.key(urls[2]), urls[2], {'url': urls[2]})
+
+    assert cache.lookup(cache.key(urls[0])) is not None
+    assert cache.lookup(cache.key(urls[1])) is None
+    assert cache.ttl(config_url('b/1')) is None
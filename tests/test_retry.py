@@ -0,0 +1,98 @@
+"""
+Tests of the retry policy, on its own and against the figshare stand-in.
+"""
+
+import random
+import time
+from email.utils import formatdate
+
+import pytest
+from requests.exceptions import HTTPError
+
+from figshare_interface.http_requests.figshare_requests import issue_request
+from figshare_interface.http_requests.retry import RetryPolicy
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def policy(**kwargs):
+    return RetryPolicy(**dict(dict(max_retries=3, backoff_factor=0.001, max_backoff=0.01, max_retry_after=5,
+                                   status_forcelist=[429, 503], methods=['GET', 'PUT']), **kwargs))
+
+
+def test_only_transient_failures_of_idempotent_methods_are_retried():
+    retry = policy()
+
+    assert retry.should_retry('GET', 0, status=503)
+    assert retry.should_retry('put', 2, status=429)
+    assert retry.should_retry('GET', 0)  # No response at all.
+    assert not retry.should_retry('POST', 0, status=503)
+    assert not retry.should_retry('GET', 0, status=404)
+    assert not retry.should_retry('GET', 3, status=503)
+
+
+def test_long_retry_after_is_not_waited_for():
+    retry = policy()
+
+    assert retry.should_retry('GET', 0, status=503, headers={'Retry-After': '5'})
+    assert not retry.should_retry('GET', 0, status=503, headers={'Retry-After': '60'})
+
+
+def test_retry_after_is_read_as_seconds_or_a_date():
+    assert RetryPolicy.retry_after({'Retry-After': '2.5'}) == 2.5
+    assert RetryPolicy.retry_after({}) is None
+    assert RetryPolicy.retry_after({'Retry-After': 'soon'}) is None
+    in_a_minute = formatdate(time.time() + 60, usegmt=True)
+    assert RetryPolicy.retry_after({'Retry-After': in_a_minute}) == pytest.approx(60, abs=2)
+
+
+def test_backoff_grows_within_its_cap_and_honours_retry_after():
+    retry = policy(backoff_factor=1, max_backoff=4)
+    random.seed(0)
+
+    assert all(0 <= retry.backoff(0) <= 1 for _ in range(100))
+    assert all(0 <= retry.backoff(10) <= 4 for _ in range(100))
+    assert retry.backoff(0, headers={'Retry-After': '3'}) == 3
+
+
+def test_a_batch_shares_one_budget():
+    retry = policy().for_batch(retries=2)
+
+    assert retry.should_retry('GET', 0, status=503)
+    assert retry.copy().should_retry('GET', 0, status=503)
+    assert not retry.should_retry('GET', 0, status=503)
+
+
+def test_requests_are_retried_up_to_the_limit(standin):
+    standin.error_rate = 1.0
+
+    with pytest.raises(HTTPError) as error:
+        issue_request('GET', 'account', token='token', retry=policy())
+
+    assert error.value.response.status_code == 503
+    assert standin.state.request_count == 4
+
+
+def test_post_is_not_retried(standin):
+    standin.error_rate = 1.0
+
+    with pytest.raises(HTTPError):
+        issue_request('POST', 'account/projects', data={'title': 'Project'}, token='token', retry=policy())
+
+    assert standin.state.request_count == 1
+
+
+def test_transient_failures_are_recovered_from(standin):
+    random.seed(1)
+    standin.error_rate = 0.5
+
+    results = [issue_request('GET', 'account', token='token', retry=policy(max_retries=10)) for _ in range(10)]
+
+    assert all(result['id'] == 1 for result in results)
+    assert standin.state.request_count > 10
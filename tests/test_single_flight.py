@@ -0,0 +1,105 @@
+"""
+Tests of request coalescing, on its own and against the figshare stand-in.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from figshare_interface.http_requests.figshare_requests import issue_request
+from figshare_interface.http_requests.single_flight import SingleFlight
+
+from conftest import new_article
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def _concurrently(n, function):
+    """Call function from n threads, released together."""
+    barrier = threading.Barrier(n)
+
+    def call():
+        barrier.wait()
+        return function()
+
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        futures = [executor.submit(call) for _ in range(n)]
+    return futures
+
+
+def test_concurrent_identical_calls_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return {'items': [1, 2]}
+
+    def call():
+        return flight.do(SingleFlight.key('GET', 'url', token='token'), slow)
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = [future.result() for future in _concurrently(4, call)]
+
+    assert calls == [1]
+    assert all(result == {'items': [1, 2]} for result in results)
+    # Every caller has its own copy.
+    assert len({id(result) for result in results}) == 4
+
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError('failed')
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    for future in _concurrently(3, lambda: flight.do('key', failing)):
+        with pytest.raises(ValueError):
+            future.result()
+
+    assert flight.do('key', lambda: 'next call') == 'next call'
+
+
+def test_keys_only_match_identical_requests():
+    key = SingleFlight.key('GET', 'url', {'a': 1, 'b': 2}, 'token')
+    assert key == SingleFlight.key('GET', 'url', {'b': 2, 'a': 1}, 'token')
+    assert SingleFlight.key('GET', 'url', token='token') != SingleFlight.key('GET', 'url', token='other')
+    assert SingleFlight.key('GET', 'url') != SingleFlight.key('HEAD', 'url')
+
+
+def test_coalesced_gets_send_one_request(standin):
+    project_id, _, _ = new_article(standin)
+    standin.latency = 0.2
+    endpoint = 'account/projects/{id}'.format(id=project_id)
+
+    before = standin.state.request_count
+    futures = _concurrently(4, lambda: issue_request('GET', endpoint, token='token', coalesce=True))
+
+    assert all(future.result()['id'] == project_id for future in futures)
+    assert standin.state.request_count - before == 1
+
+
+def test_uncoalesced_gets_are_sent_separately(standin):
+    project_id, _, _ = new_article(standin)
+    standin.latency = 0.1
+    endpoint = 'account/projects/{id}'.format(id=project_id)
+
+    before = standin.state.request_count
+    for future in _concurrently(3, lambda: issue_request('GET', endpoint, token='token', coalesce=False)):
+        future.result()
+
+    assert standin.state.request_count - before == 3
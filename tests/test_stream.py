@@ -0,0 +1,86 @@
+"""
+Tests of lazy download streams against the figshare stand-in.
+"""
+
+import io
+import os
+import random
+
+from figshare_interface.figshare_structures.projects import Projects
+from figshare_interface.http_requests.response_stream import open_stream
+from figshare_interface.standin.figshare_standin import StandinServer
+
+from conftest import download_url, new_article
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+DATA = os.urandom(1000)
+
+
+def _open(server, **kwargs):
+    _, _, (file_id,) = new_article(server, files=[('data.bin', DATA)])
+    # A small buffer, so that reads do not run far ahead of the caller.
+    return open_stream(download_url(server, file_id), 'token', buffer_size=64, **kwargs)
+
+
+def test_forward_seeks_skip_over_the_download(standin):
+    before = standin.state.request_count
+    with _open(standin) as stream:
+        assert stream.read(10) == DATA[:10]
+        stream.seek(500)
+        assert stream.read(100) == DATA[500:600]
+        stream.seek(50, io.SEEK_CUR)
+        assert stream.read() == DATA[650:]
+    assert standin.state.request_count - before == 1
+
+
+def test_backward_seeks_refetch_only_what_was_passed(standin):
+    before = standin.state.request_count
+    with _open(standin) as stream:
+        stream.seek(600)
+        assert stream.read(100) == DATA[600:700]
+        stream.seek(100)
+        assert stream.read(600) == DATA[100:700]
+        stream.seek(-10, io.SEEK_END)
+        assert stream.read() == DATA[-10:]
+        stream.seek(0)
+        assert stream.read() == DATA
+    # The download, then one range request for the bytes before the first backward seek.
+    assert standin.state.request_count - before == 2
+
+
+def test_backward_seeks_without_range_support():
+    with StandinServer(ranges=False) as server, server.use():
+        with _open(server) as stream:
+            stream.seek(700)
+            stream.read(10)
+            stream.seek(5)
+            assert stream.read(20) == DATA[5:25]
+
+
+def test_opening_is_retried(standin):
+    random.seed(0)
+    standin.error_rate = 0.5
+    with _open(standin) as stream:
+        assert stream.read() == DATA
+
+
+def test_missing_file_opens_as_none(standin):
+    assert open_stream(download_url(standin, 999), 'token') is None
+
+
+def test_stream_article_lazily(standin):
+    _, article_id, _ = new_article(standin, files=[('data.bin', DATA)])
+
+    file_name, stream = Projects('token').stream_article(article_id, lazy=True)
+
+    with stream:
+        assert file_name == 'data.bin'
+        stream.seek(900)
+        assert stream.read() == DATA[900:]
@@ -0,0 +1,109 @@
+"""
+Tests of the in-memory title indexes used for duplicate checks, on their own and against the figshare stand-in.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from requests.exceptions import HTTPError
+
+from figshare_interface.figshare_structures.projects import Projects, _TitleIndex
+
+from conftest import new_article
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+
+def test_title_index():
+    titles = _TitleIndex([{'id': 1, 'title': 'A'}, {'id': 2, 'title': 'A'}, {'id': 3, 'title': 'B'}])
+
+    assert not titles.claim('A')
+    assert titles.claim('C') and not titles.claim('C') and 'C' in titles
+    titles.release('C')
+    assert 'C' not in titles
+
+    # A title shared by two items stays taken until both are gone.
+    titles.remove(1)
+    assert 'A' in titles
+    assert titles.rename(2, 'D') and 'A' not in titles and 'D' in titles
+    assert not titles.rename(99, 'E')
+
+    assert titles.claim('F')
+    titles.add(4, 'F')
+    assert 'F' in titles and not titles.claim('F')
+
+
+def test_articles_are_listed_once_for_every_duplicate_check(standin):
+    project_id, _, _ = new_article(standin, title='Existing')
+    projects = Projects('token')
+    projects.create_article(project_id, {'title': 'First'})
+
+    before = standin.state.request_count
+    projects.create_article(project_id, {'title': 'Second'})
+    # Creating and fetching the article, without listing the project again.
+    assert standin.state.request_count - before == 2
+
+    for title in ['Existing', 'First', 'Second']:
+        with pytest.raises(FileExistsError):
+            projects.create_article(project_id, {'title': title})
+
+
+def test_a_failed_creation_gives_its_title_back(standin):
+    project_id, _, _ = new_article(standin)
+    projects = Projects('token')
+    standin.error_rate = 1.0
+    standin.error_methods = ('POST',)
+    standin.error_status = 400
+
+    with pytest.raises(HTTPError):
+        projects.create_article(project_id, {'title': 'Retried'})
+
+    standin.error_rate = 0.0
+    assert projects.create_article(project_id, {'title': 'Retried'})
+
+
+def test_concurrent_creations_cannot_share_a_title(standin):
+    project_id, _, _ = new_article(standin)
+    projects = Projects('token')
+    projects.article_titles(project_id)
+
+    def create(_):
+        try:
+            return projects.create_article(project_id, {'title': 'Same'})
+        except FileExistsError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        created = [article_id for article_id in executor.map(create, range(4)) if article_id is not None]
+
+    assert len(created) == 1
+
+
+def test_deletions_free_their_titles(standin):
+    project_id, article_id, _ = new_article(standin, title='Deleted article')
+    projects = Projects('token')
+    assert projects.check_if_exists('Project {id}'.format(id=project_id))
+    assert 'Deleted article' in projects.article_titles(project_id)
+
+    projects.article_delete(project_id, article_id)
+    assert 'Deleted article' not in projects.article_titles(project_id)
+
+    projects.delete(project_id, safe=False)
+    assert not projects.check_if_exists('Project {id}'.format(id=project_id))
+
+
+def test_forgotten_titles_are_listed_again(standin):
+    project_id, _, _ = new_article(standin)
+    projects = Projects('token')
+    projects.article_titles(project_id)
+    standin.state.add_article(project_id, title='Made elsewhere')
+
+    assert 'Made elsewhere' not in projects.article_titles(project_id)
+    projects.forget_titles(project_id)
+    assert 'Made elsewhere' in projects.article_titles(project_id)
@@ -0,0 +1,193 @@
+"""
+Tests of file uploads against the figshare stand-in.
+"""
+
+import os
+import random
+
+import pytest
+from requests.exceptions import HTTPError
+
+from figshare_interface import config
+from figshare_interface.figshare_structures.projects import Projects
+from figshare_interface.http_requests.figshare_requests import initiate_new_upload, upload_parts
+from figshare_interface.http_requests.upload_journal import UploadJournal
+from figshare_interface.standin.figshare_standin import StandinServer
+
+from conftest import new_article
+
+__author__ = "Tobias Gill"
+__credits__ = ["Tobias Gill", "Adrian-Tudor Panescu", "Miriam Keshani"]
+__license__ = ""
+__version__ = "0.0.1"
+__maintainer__ = "Tobias Gill"
+__email__ = "toby.gill.09@ucl.ac.uk"
+__status__ = "Development"
+
+PART_SIZE = 100
+DATA = os.urandom(10 * PART_SIZE)
+
+
+@pytest.fixture
+def server():
+    # Small parts, so that a small file is uploaded in several of them.
+    with StandinServer(part_size=PART_SIZE) as server, server.use():
+        yield server
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(DATA)
+    return str(path)
+
+
+def _interrupted_upload(server, article_id, local_file, parts_done):
+    """Initiate an upload with a journal, and mark its first parts as received, holding placeholder bytes."""
+    file_info = initiate_new_upload(article_id, local_file, 'token', journal=UploadJournal.for_file(article_id,
+                                                                                                    local_file))
+    file = server.state.files[file_info['id']]
+    for part_no in range(1, parts_done + 1):
+        file['data'][(part_no - 1) * PART_SIZE:part_no * PART_SIZE] = b'x' * PART_SIZE
+        file['done'].add(part_no)
+    return file
+
+
+def test_parts_are_sent_concurrently(server, local_file):
+    _, article_id, _ = new_article(server)
+    file_info = initiate_new_upload(article_id, local_file, 'token')
+    server.latency = 0.05
+
+    summary = upload_parts(local_file, file_info, 'token', workers=5)
+
+    assert summary['parts'] == 10 and summary['bytes'] == len(DATA)
+    # One part after another would take at least ten times the latency.
+    assert summary['seconds'] < 6 * server.latency
+    assert bytes(server.state.files[file_info['id']]['data']) == DATA
+
+
+def test_failed_parts_are_retried_on_their_own(server, local_file):
+    _, article_id, _ = new_article(server)
+    random.seed(0)
+    server.error_rate = 0.3
+    server.error_methods = ('PUT',)
+
+    Projects('token').upload_file(article_id, local_file)
+
+    (file_id,) = server.state.articles[article_id]['files']
+    assert bytes(server.state.files[file_id]['data']) == DATA
+    assert server.state.files[file_id]['status'] == 'available'
+
+
+def test_upload_is_not_completed_while_parts_are_missing(server, local_file):
+    _, article_id, _ = new_article(server)
+    server.error_rate = 1.0
+    server.error_methods = ('PUT',)
+
+    with pytest.raises(HTTPError):
+        Projects('token').upload_file(article_id, local_file)
+
+    (file_id,) = server.state.articles[article_id]['files']
+    assert server.state.files[file_id]['status'] == 'created'
+
+
+def test_resume_only_sends_the_missing_parts(server, local_file):
+    _, article_id, _ = new_article(server)
+    file = _interrupted_upload(server, article_id, local_file, parts_done=4)
+
+    Projects('token').upload_file(article_id, local_file)
+
+    assert server.state.articles[article_id]['files'] == [file['id']]
+    # The parts already received were not sent again.
+    assert bytes(file['data']) == b'x' * 4 * PART_SIZE + DATA[4 * PART_SIZE:]
+    assert file['status'] == 'available'
+    assert UploadJournal.for_file(article_id, local_file).load() is None
+
+
+def test_resume_of_an_expired_upload_starts_again(server, local_file):
+    _, article_id, _ = new_article(server)
+    stale = _interrupted_upload(server, article_id, local_file, parts_done=4)
+    # The upload service no longer knows the upload.
+    stale['upload_token'] = 'expired'
+
+    projects = Projects('token')
+    projects.upload_file(article_id, local_file)
+
+    (file_id,) = server.state.articles[article_id]['files']
+    assert file_id != stale['id'] and stale['id'] not in server.state.files
+    assert bytes(server.state.files[file_id]['data']) == DATA
+    assert list(projects.file_manifest(article_id)) == ['data.bin']
+
+
+def test_upload_failing_part_way_resumes_from_its_journal(server, local_file, monkeypatch):
+    _, article_id, _ = new_article(server)
+    monkeypatch.setattr(config, 'upload_part_retries', 0)
+    random.seed(2)
+    server.error_rate = 0.5
+    server.error_methods = ('PUT',)
+    with pytest.raises(HTTPError):
+        Projects('token').upload_file(article_id, local_file)
+    done = UploadJournal.for_file(article_id, local_file).load(local_file)['completed_parts']
+    assert 0 < len(done) < 10
+
+    server.error_rate = 0.0
+    before = server.state.request_count
+    Projects('token').upload_file(article_id, local_file)
+
+    (file_id,) = server.state.articles[article_id]['files']
+    assert bytes(server.state.files[file_id]['data']) == DATA
+    # Listing the parts, sending the missing ones and completing the upload.
+    assert server.state.request_count - before == 1 + (10 - len(done)) + 1
+
+
+def test_journal_ignores_a_torn_last_line_and_a_changed_file(tmp_path, local_file):
+    journal = UploadJournal(str(tmp_path / 'upload.journal'))
+    journal.start(local_file, {'id': 1})
+    journal.mark_part(1)
+    journal.mark_part(2)
+    with open(journal.path, 'a') as fout:
+        fout.write('{"par')
+
+    assert journal.load(local_file)['completed_parts'] == {1, 2}
+
+    with open(local_file, 'ab') as fout:
+        fout.write(b'more')
+    assert journal.load(local_file) is None
+
+
+def test_duplicate_file_names_are_refused_from_the_manifest(server, local_file):
+    projects = Projects('token')
+    project_id, _, _ = new_article(server)
+    article_id = projects.create_article(project_id, {'title': 'New article'})
+    projects.upload_file(article_id, local_file)
+
+    before = server.state.request_count
+    with pytest.raises(FileExistsError):
+        projects.upload_file(article_id, local_file)
+    # A new article starts with an empty manifest, kept up to date by the upload, so nothing was listed.
+    assert server.state.request_count == before
+    assert list(projects.file_manifest(article_id)) == ['data.bin']
+
+
+def test_manifest_is_listed_again_after_a_failed_upload(server, local_file):
+    _, article_id, _ = new_article(server, files=[('other.bin', b'other')])
+    projects = Projects('token')
+    server.error_rate = 1.0
+    server.error_methods = ('PUT',)
+    with pytest.raises(HTTPError):
+        projects.upload_file(article_id, local_file)
+
+    server.error_rate = 0.0
+    assert sorted(projects.file_manifest(article_id)) == ['data.bin', 'other.bin']
+
+
+def test_deleting_an_article_drops_its_manifest(server, local_file):
+    project_id, article_id, _ = new_article(server, files=[('other.bin', b'other')])
+    projects = Projects('token')
+    assert list(projects.file_manifest(article_id)) == ['other.bin']
+
+    projects.article_delete(project_id, article_id)
+
+    # The manifest is listed again, and the article is gone.
+    with pytest.raises(HTTPError):
+        projects.file_manifest(article_id)